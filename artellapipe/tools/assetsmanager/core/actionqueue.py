@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the queue of server actions requested while Artella was not available
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import json
+import time
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+QUEUE_FILE_NAME = 'pending_actions.json'
+QUEUE_VERSION = 1
+
+SYNC_ACTION = 'sync'
+
+
+class PendingActionsQueue(object):
+    """
+    Stores in disk the actions that need Artella and were requested while it was not available, so they can be
+    replayed once Artella is available again, even if the application was closed in between.
+    Requesting an action that is already queued does not queue it again.
+    """
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self._actions = list()
+        self._keys = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_project(cls, project):
+        """
+        Returns the pending actions queue of the given project
+        :param project: ArtellaProject
+        :return: PendingActionsQueue
+        """
+
+        return cls(utils.get_data_path(project, QUEUE_FILE_NAME))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._actions)
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    def load(self):
+        """
+        Loads queued actions from disk
+        """
+
+        data = utils.read_json(self._file_path, default=dict()) or dict()
+        actions = data.get('actions', list()) if data.get('version') == QUEUE_VERSION else list()
+        with self._lock:
+            self._actions = actions
+            self._update_keys()
+
+    def enqueue(self, action, **params):
+        """
+        Queues a new action
+        :param action: str, name of the action
+        :param params: dict, parameters of the action. Must be serializable
+        :return: bool, True if the action was queued; False if it was already queued
+        """
+
+        return bool(self.enqueue_many(action, [params]))
+
+    def enqueue_many(self, action, params_list):
+        """
+        Queues several actions of the same type at once. Queue is stored in disk only once
+        :param action: str, name of the action
+        :param params_list: list(dict), parameters of each action. Must be serializable
+        :return: int, number of queued actions. Actions that were already queued are not counted
+        """
+
+        queued = 0
+        with self._lock:
+            queue_time = time.time()
+            for params in params_list:
+                key = self._get_key(action, params)
+                if key in self._keys:
+                    continue
+                self._keys.add(key)
+                self._actions.append({'action': action, 'params': params, 'time': queue_time})
+                queued += 1
+            if queued:
+                self._save()
+
+        return queued
+
+    def get_actions(self):
+        """
+        Returns queued actions, in the order they were queued
+        :return: list(dict)
+        """
+
+        with self._lock:
+            return list(self._actions)
+
+    def remove(self, actions):
+        """
+        Removes the given actions from the queue
+        :param actions: list(dict), actions returned by get_actions
+        :return: int, number of removed actions
+        """
+
+        with self._lock:
+            remaining_actions = [action for action in self._actions if action not in actions]
+            removed = len(self._actions) - len(remaining_actions)
+            if removed:
+                self._actions = remaining_actions
+                self._update_keys()
+                self._save()
+
+        return removed
+
+    def take_all(self):
+        """
+        Removes all the actions from the queue and returns them
+        :return: list(dict)
+        """
+
+        with self._lock:
+            actions, self._actions = self._actions, list()
+            self._keys.clear()
+            if actions:
+                self._save()
+
+        return actions
+
+    @staticmethod
+    def _get_key(action, params):
+        """
+        Internal function that returns the key used to find duplicated actions
+        :param action: str
+        :param params: dict
+        :return: tuple(str, str)
+        """
+
+        return action, json.dumps(params, sort_keys=True)
+
+    def _update_keys(self):
+        """
+        Internal function that updates the keys of the queued actions. Must be called with the lock acquired
+        """
+
+        self._keys = set(self._get_key(action['action'], action['params']) for action in self._actions)
+
+    def _save(self):
+        """
+        Internal function that stores queued actions in disk. Must be called with the lock acquired
+        """
+
+        try:
+            utils.write_json(self._file_path, {'version': QUEUE_VERSION, 'actions': self._actions})
+        except Exception as exc:
+            LOGGER.error('Impossible to save pending actions "{}": {}'.format(self._file_path, exc))
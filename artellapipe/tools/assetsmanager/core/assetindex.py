@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the persistent index that stores assets state across DCC sessions
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+INDEX_FILE_NAME = 'assets_index.db'
+SCHEMA_VERSION = 1
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS assets (
+        asset_id TEXT PRIMARY KEY,
+        name TEXT,
+        asset_type TEXT,
+        path TEXT,
+        last_sync REAL,
+        updated REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS asset_files (
+        asset_id TEXT NOT NULL,
+        file_type TEXT NOT NULL,
+        local_version TEXT,
+        remote_version TEXT,
+        locked INTEGER,
+        last_sync REAL,
+        updated REAL,
+        PRIMARY KEY (asset_id, file_type)
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS assets_type_idx ON assets (asset_type)',
+]
+
+
+class AssetStateIndex(object):
+    """
+    SQLite database that stores the type, file types, local and remote versions, lock status and last sync time of
+    project assets. Database is opened in WAL mode so several DCC sessions of the same workstation can read it while
+    one of them is writing. Writes are done inside IMMEDIATE transactions so concurrent writers are serialized.
+    """
+
+    def __init__(self, db_path, timeout=30.0):
+        self._db_path = db_path
+        self._timeout = timeout
+        self._local = threading.local()
+        self._connections = list()
+        self._connections_lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.isdir(db_dir):
+            try:
+                os.makedirs(db_dir)
+            except OSError:
+                if not os.path.isdir(db_dir):
+                    raise
+
+        self._create_schema()
+
+    @classmethod
+    def for_project(cls, project, **kwargs):
+        """
+        Returns the asset index of the given project
+        :param project: ArtellaProject
+        :return: AssetStateIndex
+        """
+
+        return cls(utils.get_data_path(project, INDEX_FILE_NAME), **kwargs)
+
+    @property
+    def db_path(self):
+        return self._db_path
+
+    def close(self):
+        """
+        Closes all the connections opened by this index, including the ones opened by other threads.
+        It must be called once the threads that use the index stopped using it
+        """
+
+        with self._connections_lock:
+            for connection in self._connections:
+                try:
+                    connection.close()
+                except sqlite3.Error as exc:
+                    LOGGER.warning('Impossible to close assets index connection "{}": {}'.format(self._db_path, exc))
+            self._connections = list()
+        self._local = threading.local()
+
+    def update_asset(self, asset_id, name=None, asset_type=None, path=None):
+        """
+        Inserts or updates the given asset in the index
+        :param asset_id: str
+        :param name: str
+        :param asset_type: str
+        :param path: str
+        """
+
+        self.update_assets([{'asset_id': asset_id, 'name': name, 'asset_type': asset_type, 'path': path}])
+
+    def update_assets(self, assets_data):
+        """
+        Inserts or updates given assets in the index using a single transaction
+        :param assets_data: list(dict), each dict contains asset_id, name, asset_type and path keys
+        """
+
+        now = time.time()
+        rows = [(
+            data['asset_id'], data.get('name'), data.get('asset_type'), data.get('path'), now)
+            for data in assets_data if data.get('asset_id')]
+        if not rows:
+            return
+
+        with self._write() as cursor:
+            cursor.executemany(
+                'INSERT OR IGNORE INTO assets (asset_id, updated) VALUES (?, ?)', [(row[0], now) for row in rows])
+            cursor.executemany(
+                'UPDATE assets SET name=COALESCE(?, name), asset_type=COALESCE(?, asset_type), '
+                'path=COALESCE(?, path), updated=? WHERE asset_id=?',
+                [(name, asset_type, path, updated, asset_id) for asset_id, name, asset_type, path, updated in rows])
+
+    def update_from_assets(self, assets):
+        """
+        Inserts or updates given asset objects in the index
+        :param assets: list(ArtellaAsset)
+        """
+
+        assets_data = list()
+        for asset in assets:
+            get_path = getattr(asset, 'get_path', None)
+            assets_data.append({
+                'asset_id': utils.get_asset_id(asset),
+                'name': asset.get_name() if hasattr(asset, 'get_name') else None,
+                'asset_type': assetstate.get_asset_type(asset),
+                'path': get_path() if get_path else None
+            })
+
+        self.update_assets(assets_data)
+
+    def update_file(self, asset_id, file_type, local_version=None, remote_version=None, locked=None, last_sync=None):
+        """
+        Inserts or updates the state of an asset file. Values that are None are not modified
+        :param asset_id: str
+        :param file_type: str
+        :param local_version: str or None
+        :param remote_version: str or None
+        :param locked: bool or None
+        :param last_sync: float or None
+        """
+
+        with self._write() as cursor:
+            self._update_file(cursor, asset_id, file_type, local_version, remote_version, locked, last_sync)
+
+    def mark_synced(self, asset_id, file_types=None, server_states=None, timestamp=None):
+        """
+        Stores that the given asset files were synced. Local version of the files is set to the server one
+        :param asset_id: str
+        :param file_types: list(str) or None, if None, only asset last sync time is updated
+        :param server_states: dict(str, dict) or None, server state of each synced file type
+        :param timestamp: float or None
+        """
+
+        timestamp = timestamp or time.time()
+        server_states = server_states or dict()
+        file_types = [file_type for file_type in (file_types or list()) if file_type]
+
+        with self._write() as cursor:
+            cursor.execute('INSERT OR IGNORE INTO assets (asset_id, updated) VALUES (?, ?)', (asset_id, timestamp))
+            cursor.execute('UPDATE assets SET last_sync=? WHERE asset_id=?', (timestamp, asset_id))
+            for file_type in file_types:
+                server_state = server_states.get(file_type) or dict()
+                version = server_state.get(assetstate.VERSION_KEY)
+                self._update_file(
+                    cursor, asset_id, file_type, local_version=version, remote_version=version,
+                    locked=server_state.get(assetstate.LOCKED_KEY), last_sync=timestamp)
+
+    def update_remote_versions(self, files_states):
+        """
+        Stores the remote version and lock status of several asset files using a single transaction. Local version and
+        last sync time of the files are not modified
+        :param files_states: dict(str, dict(str, dict)), server state of each file type of each asset id
+        """
+
+        rows = [
+            (asset_id, file_type, server_state) for asset_id, file_states in files_states.items()
+            for file_type, server_state in file_states.items() if asset_id and file_type and server_state]
+        if not rows:
+            return
+
+        with self._write() as cursor:
+            for asset_id, file_type, server_state in rows:
+                self._update_file(
+                    cursor, asset_id, file_type, remote_version=server_state.get(assetstate.VERSION_KEY),
+                    locked=server_state.get(assetstate.LOCKED_KEY))
+
+    def invalidate_file(self, asset_id, file_type):
+        """
+        Stores that the local copy of the given asset file is not valid, so it is reported as outdated
+        :param asset_id: str
+        :param file_type: str
+        """
+
+        with self._write() as cursor:
+            cursor.execute(
+                'UPDATE asset_files SET local_version=NULL, last_sync=NULL, updated=? WHERE asset_id=? AND file_type=?',
+                (time.time(), asset_id, file_type))
+
+    def remove_asset(self, asset_id):
+        """
+        Removes given asset from the index
+        :param asset_id: str
+        """
+
+        self.remove_assets([asset_id])
+
+    def remove_assets(self, asset_ids):
+        """
+        Removes given assets from the index using a single transaction
+        :param asset_ids: list(str)
+        """
+
+        rows = [(asset_id,) for asset_id in asset_ids if asset_id]
+        if not rows:
+            return
+
+        with self._write() as cursor:
+            cursor.executemany('DELETE FROM asset_files WHERE asset_id=?', rows)
+            cursor.executemany('DELETE FROM assets WHERE asset_id=?', rows)
+
+    def get_asset(self, asset_id):
+        """
+        Returns stored state of the given asset
+        :param asset_id: str
+        :return: dict or None, asset data with a files key containing the state of each one of its file types
+        """
+
+        connection = self._get_connection()
+        row = connection.execute('SELECT * FROM assets WHERE asset_id=?', (asset_id,)).fetchone()
+        if not row:
+            return None
+
+        asset_data = dict(row)
+        asset_data['files'] = self.get_files(asset_id)
+
+        return asset_data
+
+    def get_files(self, asset_id):
+        """
+        Returns stored state of the files of the given asset
+        :param asset_id: str
+        :return: dict(str, dict)
+        """
+
+        connection = self._get_connection()
+        rows = connection.execute('SELECT * FROM asset_files WHERE asset_id=?', (asset_id,)).fetchall()
+
+        return dict((row['file_type'], dict(row)) for row in rows)
+
+    def get_assets(self, asset_type=None):
+        """
+        Returns all the assets stored in the index
+        :param asset_type: str or None, if given only assets of that type are returned
+        :return: list(dict)
+        """
+
+        connection = self._get_connection()
+        if asset_type:
+            rows = connection.execute(
+                'SELECT * FROM assets WHERE asset_type=? ORDER BY name', (asset_type,)).fetchall()
+        else:
+            rows = connection.execute('SELECT * FROM assets ORDER BY name').fetchall()
+
+        return [dict(row) for row in rows]
+
+    def get_synced_files(self):
+        """
+        Returns the file types of each asset that were synced and were not invalidated afterwards
+        :return: dict(str, list(str))
+        """
+
+        connection = self._get_connection()
+        rows = connection.execute(
+            'SELECT asset_id, file_type FROM asset_files WHERE last_sync IS NOT NULL').fetchall()
+
+        synced_files = dict()
+        for asset_id, file_type in rows:
+            synced_files.setdefault(asset_id, list()).append(file_type)
+
+        return synced_files
+
+    def get_asset_types(self):
+        """
+        Returns all the asset types stored in the index
+        :return: list(str)
+        """
+
+        connection = self._get_connection()
+        rows = connection.execute(
+            'SELECT DISTINCT asset_type FROM assets WHERE asset_type IS NOT NULL ORDER BY asset_type').fetchall()
+
+        return [row[0] for row in rows]
+
+    def get_sync_summary(self, asset_ids=None):
+        """
+        Returns how many of the given assets were synced at least once and the oldest of their last sync times
+        :param asset_ids: list(str) or None, if None all the assets in the index are taken into account
+        :return: dict, with synced and oldest_sync keys
+        """
+
+        connection = self._get_connection()
+        if asset_ids is None:
+            rows = connection.execute('SELECT last_sync FROM assets').fetchall()
+        else:
+            rows = list()
+            asset_ids = list(asset_ids)
+            for i in range(0, len(asset_ids), 500):
+                chunk = asset_ids[i:i + 500]
+                rows.extend(connection.execute(
+                    'SELECT last_sync FROM assets WHERE asset_id IN ({})'.format(','.join('?' * len(chunk))),
+                    chunk).fetchall())
+
+        sync_times = [row[0] for row in rows if row[0]]
+
+        return {'synced': len(sync_times), 'oldest_sync': min(sync_times) if sync_times else None}
+
+    def _get_connection(self):
+        """
+        Internal function that returns the connection of the current thread. SQLite connections cannot be shared
+        between threads so each thread opens its own one. Connections are only used by the thread that opened them,
+        but they are created without the same thread check so close can close all of them from the calling thread
+        :return: sqlite3.Connection
+        """
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            return connection
+
+        connection = sqlite3.connect(
+            self._db_path, timeout=self._timeout, isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA busy_timeout={}'.format(int(self._timeout * 1000)))
+        self._local.connection = connection
+        with self._connections_lock:
+            self._connections.append(connection)
+
+        return connection
+
+    def _update_file(self, cursor, asset_id, file_type, local_version=None, remote_version=None, locked=None,
+                     last_sync=None):
+        """
+        Internal function that inserts or updates the state of an asset file using the given cursor
+        """
+
+        now = time.time()
+        locked = None if locked is None else int(bool(locked))
+        local_version = None if local_version is None else str(local_version)
+        remote_version = None if remote_version is None else str(remote_version)
+
+        cursor.execute('INSERT OR IGNORE INTO assets (asset_id, updated) VALUES (?, ?)', (asset_id, now))
+        cursor.execute(
+            'INSERT OR IGNORE INTO asset_files (asset_id, file_type, updated) VALUES (?, ?, ?)',
+            (asset_id, file_type, now))
+        cursor.execute(
+            'UPDATE asset_files SET local_version=COALESCE(?, local_version), '
+            'remote_version=COALESCE(?, remote_version), locked=COALESCE(?, locked), '
+            'last_sync=COALESCE(?, last_sync), updated=? WHERE asset_id=? AND file_type=?',
+            (local_version, remote_version, locked, last_sync, now, asset_id, file_type))
+        if last_sync is not None:
+            cursor.execute(
+                'UPDATE assets SET last_sync=MAX(COALESCE(last_sync, 0), ?) WHERE asset_id=?', (last_sync, asset_id))
+
+    def _create_schema(self):
+        """
+        Internal function that creates index tables if they do not exist
+        """
+
+        with self._write() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.execute('PRAGMA user_version={}'.format(SCHEMA_VERSION))
+
+    def _write(self):
+        """
+        Internal function that returns a context manager that executes its statements in a write transaction
+        :return: _WriteTransaction
+        """
+
+        return _WriteTransaction(self._get_connection())
+
+
+class _WriteTransaction(object):
+    """
+    Context manager that wraps statements in a BEGIN IMMEDIATE transaction. The write lock is acquired when the
+    transaction starts, so concurrent writers wait for the busy timeout instead of failing in the middle
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = None
+
+    def __enter__(self):
+        self._cursor = self._connection.cursor()
+        self._cursor.execute('BEGIN IMMEDIATE')
+        return self._cursor
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self._connection.execute('COMMIT')
+            else:
+                self._connection.execute('ROLLBACK')
+        finally:
+            self._cursor.close()
+
+        return False
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the in memory lookup of project assets by type, file type and sync status
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import logging
+import threading
+from collections import OrderedDict
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+
+class AssetsLookup(object):
+    """
+    Maps asset types, file types and sync status with the assets of the project, so the assets targeted by menu
+    actions, filters and bulk operations are found without walking all project assets.
+    The lookup is updated incrementally when assets are added, removed or synced.
+    Sync status is stored per file type and it is kept for assets that are not added yet, so it can be loaded from
+    the assets index before assets are listed.
+    """
+
+    def __init__(self, file_types_fn=None):
+        self._file_types_fn = file_types_fn or assetstate.get_asset_file_types
+        self._lock = threading.Lock()
+        self._assets = OrderedDict()
+        self._asset_types = dict()
+        self._assets_by_type = dict()
+        self._file_types_by_type = dict()
+        self._synced_by_file_type = dict()
+        self._synced_file_types = dict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._assets)
+
+    def __contains__(self, asset_id):
+        with self._lock:
+            return asset_id in self._assets
+
+    def add(self, asset):
+        """
+        Adds an asset into the lookup. If the asset was already added, it is updated
+        :param asset: ArtellaAsset
+        """
+
+        asset_id = utils.get_asset_id(asset)
+        asset_type = assetstate.get_asset_type(asset)
+        file_types = None
+        if asset_type not in self._file_types_by_type:
+            # File types are defined per asset type so they are only requested once per type
+            try:
+                file_types = list(self._file_types_fn(asset) or list())
+            except Exception as exc:
+                LOGGER.warning('Impossible to retrieve file types of asset type "{}": {}'.format(asset_type, exc))
+
+        with self._lock:
+            self._remove(asset_id)
+            self._assets[asset_id] = asset
+            self._asset_types[asset_id] = asset_type
+            self._assets_by_type.setdefault(asset_type, OrderedDict())[asset_id] = asset
+            if file_types is not None:
+                self._file_types_by_type.setdefault(asset_type, file_types)
+
+    def add_assets(self, assets):
+        """
+        Adds the given assets into the lookup
+        :param assets: list(ArtellaAsset)
+        """
+
+        for asset in assets:
+            self.add(asset)
+
+    def remove(self, asset_id):
+        """
+        Removes the asset with the given id from the lookup. Its sync status is kept
+        :param asset_id: str
+        """
+
+        with self._lock:
+            self._remove(asset_id)
+
+    def clear(self):
+        """
+        Removes all the assets from the lookup. Sync status of the files is kept
+        """
+
+        with self._lock:
+            self._assets.clear()
+            self._asset_types.clear()
+            self._assets_by_type.clear()
+
+    def get_asset(self, asset_id):
+        """
+        Returns the asset with the given id
+        :param asset_id: str
+        :return: ArtellaAsset or None
+        """
+
+        with self._lock:
+            return self._assets.get(asset_id)
+
+    def get_asset_types(self):
+        """
+        Returns the types of the assets of the lookup
+        :return: list(str)
+        """
+
+        with self._lock:
+            return [asset_type for asset_type, assets in self._assets_by_type.items() if assets]
+
+    def get_file_types(self, asset_type):
+        """
+        Returns the file types of the given asset type
+        :param asset_type: str
+        :return: list(str)
+        """
+
+        with self._lock:
+            return list(self._file_types_by_type.get(asset_type, list()))
+
+    def get_assets(self, asset_type=None, file_type=None, synced=None):
+        """
+        Returns the assets that match all the given filters, in the order they were added
+        :param asset_type: str or None, if given only assets of that type are returned
+        :param file_type: str or None, if given only assets that have that file type are returned
+        :param synced: bool or None, if True only assets whose file (or any file, if no file type is given) was
+            synced are returned. If False, only assets that were not synced are returned
+        :return: list(ArtellaAsset)
+        """
+
+        with self._lock:
+            if asset_type is not None:
+                asset_types = [asset_type] if asset_type in self._assets_by_type else list()
+            else:
+                asset_types = None
+            if file_type is not None:
+                types_with_file = [
+                    each_type for each_type, file_types in self._file_types_by_type.items() if file_type in file_types]
+                asset_types = types_with_file if asset_types is None else [
+                    each_type for each_type in asset_types if each_type in types_with_file]
+
+            if asset_types is None:
+                candidates = self._assets
+            elif len(asset_types) == 1:
+                candidates = self._assets_by_type.get(asset_types[0], dict())
+            else:
+                candidates = OrderedDict(
+                    (asset_id, asset) for asset_id, asset in self._assets.items()
+                    if self._asset_types[asset_id] in asset_types)
+
+            if synced is None:
+                return list(candidates.values())
+
+            synced_ids = self._synced_by_file_type.get(file_type, set()) if file_type else self._synced_file_types
+
+            return [asset for asset_id, asset in candidates.items() if (asset_id in synced_ids) == synced]
+
+    def is_synced(self, asset_id, file_type=None):
+        """
+        Returns whether the given asset file was synced
+        :param asset_id: str
+        :param file_type: str or None, if None, returns whether any file of the asset was synced
+        :return: bool
+        """
+
+        with self._lock:
+            if file_type is None:
+                return asset_id in self._synced_file_types
+            return asset_id in self._synced_by_file_type.get(file_type, set())
+
+    def mark_synced(self, asset_id, file_types):
+        """
+        Stores that the given asset files were synced
+        :param asset_id: str
+        :param file_types: list(str or None), None means that the whole asset was synced, so all the known file types
+            of the asset are marked as synced
+        """
+
+        with self._lock:
+            file_types = list(file_types or list())
+            if None in file_types:
+                file_types.extend(self._file_types_by_type.get(self._asset_types.get(asset_id), list()))
+            for file_type in file_types:
+                if not file_type:
+                    continue
+                self._synced_by_file_type.setdefault(file_type, set()).add(asset_id)
+                self._synced_file_types.setdefault(asset_id, set()).add(file_type)
+
+    def mark_outdated(self, asset_id, file_type=None):
+        """
+        Stores that the given asset file must be synced again
+        :param asset_id: str
+        :param file_type: str or None, if None all asset files are marked as outdated
+        """
+
+        with self._lock:
+            synced_file_types = self._synced_file_types.get(asset_id, set())
+            for each_file_type in list(synced_file_types) if file_type is None else [file_type]:
+                self._synced_by_file_type.get(each_file_type, set()).discard(asset_id)
+                synced_file_types.discard(each_file_type)
+            if not synced_file_types:
+                self._synced_file_types.pop(asset_id, None)
+
+    def load_synced_files(self, synced_files):
+        """
+        Stores the sync status of several assets at once
+        :param synced_files: dict(str, list(str)), synced file types of each asset id
+        """
+
+        for asset_id, file_types in synced_files.items():
+            self.mark_synced(asset_id, file_types)
+
+    def _remove(self, asset_id):
+        """
+        Internal function that removes an asset from the lookup. Must be called with the lock acquired
+        :param asset_id: str
+        """
+
+        if self._assets.pop(asset_id, None) is None:
+            return
+
+        asset_type = self._asset_types.pop(asset_id, None)
+        self._assets_by_type.get(asset_type, dict()).pop(asset_id, None)
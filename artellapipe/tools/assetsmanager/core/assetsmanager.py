@@ -12,6 +12,8 @@ __license__ = "MIT"
 __maintainer__ = "Tomas Poveda"
 __email__ = "tpovedatd@gmail.com"
 
+import copy
+
 from artellapipe.core import tool
 
 # Defines ID of the tool
@@ -19,11 +21,29 @@ TOOL_ID = 'artellapipe-tools-assetsmanager'
 
 
 class AssetsManagerTool(tool.ArtellaTool, object):
+
+    # Tool configuration is requested several times during tools registration, so it is only built once per class
+    _config_cache = dict()
+
     def __init__(self, *args, **kwargs):
         super(AssetsManagerTool, self).__init__(*args, **kwargs)
 
     @classmethod
     def config_dict(cls, file_name=None):
+        config_key = (cls, file_name)
+        if config_key not in cls._config_cache:
+            cls._config_cache[config_key] = cls._build_config_dict(file_name=file_name)
+
+        return copy.deepcopy(cls._config_cache[config_key])
+
+    @classmethod
+    def _build_config_dict(cls, file_name=None):
+        """
+        Internal function that returns the configuration of the tool
+        :param file_name: str or None
+        :return: dict
+        """
+
         base_tool_config = tool.ArtellaTool.config_dict(file_name=file_name)
         tool_config = {
             'name': 'Assets Manager',
@@ -35,7 +55,8 @@ class AssetsManagerTool(tool.ArtellaTool, object):
             'sentry_id': 'https://503219603a654de1a4f34d677816a592@sentry.io/1764558',
             'is_checkable': False,
             'is_checked': False,
-            'import_order': ['widgets', 'core'],
+            # Widgets are imported when the tool UI is created, so registering the tool does not load Qt
+            'import_order': ['core'],
             'menu_ui': {'label': 'Assets Manager', 'load_on_startup': False, 'color': '', 'background_color': ''},
             'menu': [
                 {'label': 'Assets',
@@ -57,6 +78,31 @@ class AssetsManagerToolset(tool.ArtellaToolset, object):
         super(AssetsManagerToolset, self).__init__(*args, **kwargs)
 
         self._auto_start_assets_viewer = kwargs.pop('auto_start_assets_viewer', True)
+        self._asset_index = None
+
+    @property
+    def asset_index(self):
+        """
+        Returns the persistent index that stores the state of project assets across DCC sessions
+        :return: AssetStateIndex
+        """
+
+        if not self._asset_index:
+            from artellapipe.tools.assetsmanager.core import assetindex
+            self._asset_index = assetindex.AssetStateIndex.for_project(self._project)
+
+        return self._asset_index
+
+    def close_asset_index(self):
+        """
+        Closes the assets index, if opened. It is opened again next time it is requested
+        """
+
+        if not self._asset_index:
+            return
+
+        self._asset_index.close()
+        self._asset_index = None
 
     def contents(self):
 
@@ -64,5 +110,7 @@ class AssetsManagerToolset(tool.ArtellaToolset, object):
 
         assets_manager = assetsmanager.ArtellaAssetsManager(
             project=self._project, config=self._config, settings=self._settings, parent=self,
-            auto_start_assets_viewer=self._auto_start_assets_viewer)
+            auto_start_assets_viewer=self._auto_start_assets_viewer, asset_index=self.asset_index)
+        # Assets index is shared with the tool widget, so it is closed once the widget stops using it
+        assets_manager.shutdownFinished.connect(self.close_asset_index)
         return [assets_manager]
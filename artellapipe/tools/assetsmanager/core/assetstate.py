@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains functions to query the local and server state of assets files
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import logging
+
+from artellapipe.tools.assetsmanager.core import utils
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+# Keys of the file state dictionaries returned by this module
+VERSION_KEY = 'version'
+CHECKSUM_KEY = 'checksum'
+SIZE_KEY = 'size'
+PATH_KEY = 'path'
+LOCKED_KEY = 'locked'
+
+
+def get_asset_type(asset):
+    """
+    Returns type (category) of the given asset
+    :param asset: ArtellaAsset
+    :return: str or None
+    """
+
+    get_category = getattr(asset, 'get_category', None)
+
+    return get_category() if get_category else None
+
+
+def get_asset_file_types(asset):
+    """
+    Returns list of file types that can be synced for the given asset
+    :param asset: ArtellaAsset
+    :return: list(str)
+    """
+
+    asset_type = get_asset_type(asset)
+    if not asset_type:
+        return list()
+
+    import artellapipe
+    return artellapipe.AssetsMgr().get_asset_type_files(asset_type=asset_type) or list()
+
+
+def get_synced_file_types(asset, file_types):
+    """
+    Returns the file types synced by a sync that reported the given file types. None means that the whole asset was
+    synced, so it is replaced by all the file types of the asset
+    :param asset: ArtellaAsset
+    :param file_types: list(str or None)
+    :return: list(str)
+    """
+
+    synced_file_types = [file_type for file_type in file_types or list() if file_type]
+    if None in (file_types or list()):
+        try:
+            asset_file_types = get_asset_file_types(asset)
+        except Exception as exc:
+            LOGGER.warning('Impossible to retrieve file types of asset "{}": {}'.format(asset, exc))
+            asset_file_types = list()
+        synced_file_types.extend(
+            file_type for file_type in asset_file_types if file_type not in synced_file_types)
+
+    return synced_file_types
+
+
+def get_artella_data(asset, caller=None):
+    """
+    Returns the Artella metadata of the given asset
+    :param asset: ArtellaAsset
+    :param caller: ResilientCaller or None, if given, the request is done through it, so transient errors are retried
+        and counted by its circuit breaker
+    :return: object or None, None if the metadata cannot be retrieved
+    """
+
+    data_getter = getattr(asset, 'get_artella_data', None)
+    if not data_getter:
+        return None
+
+    try:
+        return caller.call(data_getter) if caller else data_getter()
+    except Exception as exc:
+        LOGGER.warning('Impossible to retrieve Artella data of asset "{}": {}'.format(asset, exc))
+        return None
+
+
+def get_server_file_state(asset, file_type, artella_data=None, caller=None):
+    """
+    Returns the state of the given asset file in Artella server, as a dictionary with version, checksum, size, path
+    and locked keys. Asset classes can expose it through get_server_file_state(file_type). Otherwise, it is read from
+    the file reference of the asset Artella metadata. If the state is not available, None is returned and the file is
+    always considered outdated.
+    :param asset: ArtellaAsset
+    :param file_type: str
+    :param artella_data: object or None, Artella metadata of the asset, if already retrieved
+    :param caller: ResilientCaller or None, if given, server requests are done through it
+    :return: dict or None
+    """
+
+    state_getter = getattr(asset, 'get_server_file_state', None)
+    if not state_getter:
+        if artella_data is None:
+            artella_data = get_artella_data(asset, caller=caller)
+        return get_file_state_from_artella_data(asset, file_type, artella_data)
+
+    try:
+        file_state = caller.call(state_getter, args=[file_type]) if caller else state_getter(file_type)
+    except Exception as exc:
+        LOGGER.warning('Impossible to retrieve server state of "{}" file of asset "{}": {}'.format(
+            file_type, asset, exc))
+        return None
+
+    return dict(file_state) if file_state else None
+
+
+def get_server_files_state(asset, file_types, caller=None):
+    """
+    Returns the server state of several files of the given asset. Asset Artella metadata is retrieved only once
+    :param asset: ArtellaAsset
+    :param file_types: list(str)
+    :param caller: ResilientCaller or None, if given, server requests are done through it
+    :return: dict(str, dict), server state of each file type. File types whose state is not available are not included
+    """
+
+    artella_data = None
+    if getattr(asset, 'get_server_file_state', None) is None:
+        artella_data = get_artella_data(asset, caller=caller)
+        if artella_data is None:
+            return dict()
+
+    files_state = dict()
+    for file_type in file_types:
+        file_state = get_server_file_state(asset, file_type, artella_data=artella_data, caller=caller)
+        if file_state:
+            files_state[file_type] = file_state
+
+    return files_state
+
+
+def get_files_state_from_artella_data(asset, file_types, artella_data):
+    """
+    Returns the server state of several files of the given asset reading it from already retrieved Artella metadata
+    :param asset: ArtellaAsset
+    :param file_types: list(str)
+    :param artella_data: object or None
+    :return: dict(str, dict), server state of each file type. File types whose state is not available are not included
+    """
+
+    files_state = dict()
+    for file_type in file_types:
+        file_state = get_file_state_from_artella_data(asset, file_type, artella_data)
+        if file_state:
+            files_state[file_type] = file_state
+
+    return files_state
+
+
+def get_file_state_from_artella_data(asset, file_type, artella_data):
+    """
+    Returns the server state of the given asset file reading it from the file reference, stored in the asset Artella
+    metadata, whose name matches the local file of the file type
+    :param asset: ArtellaAsset
+    :param file_type: str
+    :param artella_data: object or None
+    :return: dict or None
+    """
+
+    references = getattr(artella_data, 'references', None)
+    if not references:
+        return None
+
+    file_path = get_local_file_path(asset, file_type)
+    if not file_path:
+        return None
+
+    file_name = os.path.basename(file_path)
+    references = references.items() if hasattr(references, 'items') else [
+        (getattr(reference, 'name', None), reference) for reference in references]
+    for reference_name, reference in references:
+        reference_path = getattr(reference, 'path', None) or reference_name
+        if not reference_path or os.path.basename(reference_path) != file_name:
+            continue
+        version = getattr(reference, 'maximum_version', None)
+        if version is None:
+            version = getattr(reference, 'view_version', None)
+        return {
+            VERSION_KEY: version,
+            CHECKSUM_KEY: getattr(reference, 'checksum', None),
+            SIZE_KEY: getattr(reference, 'size', None),
+            PATH_KEY: file_path,
+            LOCKED_KEY: getattr(reference, 'locked', None)
+        }
+
+    return None
+
+
+def get_local_file_path(asset, file_type, server_state=None):
+    """
+    Returns the local path of the given asset file
+    Asset classes can expose it through get_local_file_path(file_type). Otherwise, the working file path returned by
+    the asset get_file function is used and, as last resort, the path stored in the given server state is resolved
+    relative to the asset folder.
+    :param asset: ArtellaAsset
+    :param file_type: str
+    :param server_state: dict or None, server state of the file, if already retrieved
+    :return: str or None
+    """
+
+    path_getter = getattr(asset, 'get_local_file_path', None)
+    if path_getter:
+        try:
+            return path_getter(file_type)
+        except Exception as exc:
+            LOGGER.warning('Impossible to retrieve local path of "{}" file of asset "{}": {}'.format(
+                file_type, asset, exc))
+            return None
+
+    file_getter = getattr(asset, 'get_file', None)
+    if file_getter:
+        try:
+            from artellapipe.core import defines
+            file_path = file_getter(file_type, status=defines.ArtellaFileStatus.WORKING)
+        except Exception as exc:
+            LOGGER.debug('Impossible to retrieve file of type "{}" of asset "{}": {}'.format(file_type, asset, exc))
+            file_path = None
+        if file_path:
+            return file_path
+
+    file_path = (server_state or dict()).get(PATH_KEY)
+    if not file_path:
+        return None
+    if os.path.isabs(file_path):
+        return file_path
+
+    get_path = getattr(asset, 'get_path', None)
+    asset_path = get_path() if get_path else None
+
+    return os.path.join(asset_path, file_path) if asset_path else None
+
+
+def is_same_file_state(local_state, server_state):
+    """
+    Returns whether or not local stored state and server state of a file are equal
+    :param local_state: dict or None
+    :param server_state: dict or None
+    :return: bool
+    """
+
+    if not local_state or not server_state:
+        return False
+
+    compared = False
+    for key in (VERSION_KEY, CHECKSUM_KEY):
+        server_value = server_state.get(key)
+        if server_value is None:
+            continue
+        if local_state.get(key) != server_value:
+            return False
+        compared = True
+
+    return compared
+
+
+def get_assets_artella_data(assets, caller=None):
+    """
+    Retrieves Artella metadata of the given assets.
+    Projects whose assets manager provides a bulk request (get_assets_artella_data) get the metadata of all the
+    assets with a single request. Artella assets manager does not provide it, so by default the metadata of each
+    asset is requested one after another.
+    :param assets: list(ArtellaAsset)
+    :param caller: ResilientCaller or None, if given, each Artella request is done through it, so transient errors
+        are retried and counted by its circuit breaker even if the metadata of other assets is fetched
+    :return: dict(str, object), maps each asset id with its Artella data or with the exception raised while fetching it
+    """
+
+    def _request(fn, *args):
+        return caller.call(fn, args=args) if caller else fn(*args)
+
+    bulk_getter = _get_bulk_artella_data_getter()
+    if bulk_getter:
+        return _request(bulk_getter, assets)
+
+    assets_data = dict()
+    for asset in assets:
+        asset_id = utils.get_asset_id(asset)
+        try:
+            assets_data[asset_id] = _request(asset.get_artella_data)
+        except Exception as exc:
+            assets_data[asset_id] = exc
+
+    return assets_data
+
+
+def _get_bulk_artella_data_getter():
+    """
+    Internal function that returns the function of the project assets manager that retrieves Artella metadata of
+    several assets with a single request
+    :return: fn(list(ArtellaAsset)) or None
+    """
+
+    import artellapipe
+
+    return getattr(artellapipe.AssetsMgr(), 'get_assets_artella_data', None)
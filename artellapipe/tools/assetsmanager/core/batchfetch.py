@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the batched fetcher of assets Artella metadata
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate, scheduler
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+DEFAULT_BATCH_WINDOW = 0.05
+# Short enough to not be noticed by the user, but long enough to merge requests done by the same click
+DEFAULT_INTERACTIVE_BATCH_WINDOW = 0.01
+DEFAULT_MAX_BATCH_SIZE = 50
+
+
+class BatchMetadataFetcher(object):
+    """
+    Collects assets metadata requests during a short window of time and resolves all of them with a single job
+    executed in the job scheduler. Once the job finishes, the result of each asset is sent to all its requesters.
+    Requests of an asset that is already waiting in the current window are merged into the pending one.
+    Only projects whose assets manager provides a bulk metadata request (get_assets_artella_data) get the metadata of
+    each batch with a single request. Artella assets manager does not provide it, so by default the job still requests
+    the metadata of each asset one after another: batching only removes duplicated requests and coalesces requests
+    into fewer scheduler jobs. Because of that, interactive requests use a much shorter window than other ones.
+    """
+
+    def __init__(self, job_scheduler, fetch_fn=None, window=DEFAULT_BATCH_WINDOW,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, interactive_window=DEFAULT_INTERACTIVE_BATCH_WINDOW):
+        self._scheduler = job_scheduler
+        self._fetch_fn = fetch_fn or assetstate.get_assets_artella_data
+        self._window = window
+        self._interactive_window = interactive_window
+        self._max_batch_size = max(1, max_batch_size)
+        self._pending = dict()
+        self._timers = dict()
+        self._lock = threading.Lock()
+
+    def request(self, asset, callback, priority=scheduler.JobPriority.INTERACTIVE):
+        """
+        Requests the Artella metadata of the given asset
+        :param asset: ArtellaAsset
+        :param callback: fn(asset, data, error), called from a scheduler consumer thread once metadata is available
+        :param priority: JobPriority, priority of the batch that will fetch the metadata
+        """
+
+        asset_id = utils.get_asset_id(asset)
+        window = self._interactive_window if priority == scheduler.JobPriority.INTERACTIVE else self._window
+        flush_now = False
+        with self._lock:
+            pending = self._pending.setdefault(priority, dict())
+            pending.setdefault(asset_id, (asset, list()))[1].append(callback)
+            if len(pending) >= self._max_batch_size or window <= 0:
+                flush_now = True
+            elif priority not in self._timers:
+                timer = threading.Timer(window, self.flush, args=(priority,))
+                timer.daemon = True
+                self._timers[priority] = timer
+                timer.start()
+
+        if flush_now:
+            self.flush(priority)
+
+    def fetch(self, assets):
+        """
+        Fetches the Artella metadata of the given assets in batches and returns it. Used by jobs that are already
+        running in a scheduler consumer thread and need the metadata of many assets, like sync plans
+        :param assets: list(ArtellaAsset)
+        :return: dict(str, object), maps each asset id with its Artella data or with the exception raised while
+            fetching it
+        """
+
+        assets_data = dict()
+        for i in range(0, len(assets), self._max_batch_size):
+            assets_data.update(self._fetch_fn(assets[i:i + self._max_batch_size]) or dict())
+
+        return assets_data
+
+    def flush(self, priority=None):
+        """
+        Sends pending requests to the scheduler without waiting for the batch window to finish
+        :param priority: JobPriority or None, if None pending requests of all priorities are sent
+        """
+
+        with self._lock:
+            priorities = list(self._pending.keys()) if priority is None else [priority]
+            batches = list()
+            for batch_priority in priorities:
+                timer = self._timers.pop(batch_priority, None)
+                if timer:
+                    timer.cancel()
+                pending = self._pending.pop(batch_priority, None)
+                if pending:
+                    batches.append((batch_priority, pending))
+
+        for batch_priority, pending in batches:
+            self._scheduler.queue_work(
+                self._fetch_batch, pending, priority=batch_priority, callback=self._on_batch_fetched)
+
+    def cancel(self, asset=None):
+        """
+        Cancels pending requests that were not sent to the scheduler yet
+        :param asset: ArtellaAsset or None, if None all pending requests are cancelled
+        """
+
+        asset_id = utils.get_asset_id(asset) if asset is not None else None
+        with self._lock:
+            for batch_priority in list(self._pending.keys()):
+                if asset_id is None:
+                    self._pending.pop(batch_priority)
+                else:
+                    self._pending[batch_priority].pop(asset_id, None)
+
+    def _fetch_batch(self, pending):
+        """
+        Internal function, executed in a scheduler consumer thread, that fetches the metadata of a batch of assets
+        :param pending: dict(str, tuple(ArtellaAsset, list(fn)))
+        :return: dict(str, object)
+        """
+
+        assets = [asset for asset, _ in pending.values()]
+        LOGGER.debug('Fetching Artella metadata of {} assets'.format(len(assets)))
+
+        return self._fetch_fn(assets) or dict()
+
+    def _on_batch_fetched(self, job):
+        """
+        Internal callback function that is called once the metadata of a batch of assets is fetched
+        :param job: Job
+        """
+
+        pending = job.data
+        results = job.result or dict()
+        for asset_id, (asset, callbacks) in pending.items():
+            data = results.get(asset_id)
+            if job.error:
+                error = job.error
+            elif isinstance(data, Exception):
+                error, data = str(data) or data.__class__.__name__, None
+            else:
+                error = None
+            for callback in callbacks:
+                try:
+                    callback(asset, data, error)
+                except Exception as exc:
+                    LOGGER.error('Error while notifying metadata of asset "{}": {}'.format(asset_id, exc))
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the headless API and command line entry point used to sync project assets without Qt
+
+Usage example:
+    python -m artellapipe.tools.assetsmanager.core.headless --init myproject.loader:init --type Character --workers 8
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import threading
+from functools import partial
+
+from artellapipe.tools.assetsmanager.core import utils, syncengine, manifest, assetindex, journal, planner, throttle
+from artellapipe.tools.assetsmanager.core import resilience, verify, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+# Status of each processed asset reported in progress events
+SYNCED_STATUS = 'synced'
+SKIPPED_STATUS = 'skipped'
+FAILED_STATUS = 'failed'
+
+
+class JsonProgressReporter(object):
+    """
+    Writes sync progress as JSON lines (one JSON object per line), so other processes can parse it easily
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **data):
+        """
+        Writes an event into the stream
+        :param event: str, name of the event
+        :param data: dict, data of the event
+        """
+
+        data['event'] = event
+        data['time'] = time.time()
+        line = json.dumps(data, sort_keys=True)
+        with self._lock:
+            self._stream.write(line + '\n')
+            self._stream.flush()
+
+    def report_start(self, total, **data):
+        self.emit('start', total=total, **data)
+
+    def report_progress(self, batch, job, error):
+        """
+        Writes the progress event of a processed sync job
+        :param batch: SyncBatch
+        :param job: SyncJob
+        :param error: str or None
+        """
+
+        if error:
+            status = FAILED_STATUS
+        elif job.skipped:
+            status = SKIPPED_STATUS
+        else:
+            status = SYNCED_STATUS
+
+        self.emit(
+            'progress', asset=job.asset_id, status=status, error=error, file_types=job.synced_file_types,
+            processed=batch.processed, total=batch.total)
+
+    def report_finish(self, summary):
+        self.emit('finished', **summary)
+
+
+def get_assets(asset_types=None):
+    """
+    Returns the assets of the current project
+    :param asset_types: list(str) or None, if given, only assets of those types are returned
+    :return: list(ArtellaAsset)
+    """
+
+    import artellapipe
+
+    assets_mgr = artellapipe.AssetsMgr()
+    if not asset_types:
+        return list(assets_mgr.assets or list())
+
+    assets = list()
+    for asset_type in asset_types:
+        assets.extend(assets_mgr.get_assets_by_type(asset_type) or list())
+
+    return assets
+
+
+def get_batch_summary(batch, elapsed=None):
+    """
+    Returns a serializable summary of the given sync batch
+    :param batch: SyncBatch
+    :param elapsed: float or None, seconds the sync took
+    :return: dict
+    """
+
+    summary = {
+        'total': batch.total,
+        'synced': len(batch.completed) - len(batch.skipped),
+        'skipped': len(batch.skipped),
+        'failed': len(batch.failed),
+        'cancelled': batch.is_cancelled(),
+        'errors': dict((job.asset_id, error) for job, error in batch.failed)
+    }
+    if elapsed is not None:
+        summary['elapsed'] = round(elapsed, 3)
+
+    return summary
+
+
+def sync_assets(assets, file_type=None, sync_type=None, max_workers=syncengine.DEFAULT_MAX_WORKERS,
+                sync_manifest=None, asset_index=None, sync_journal=None, sync_throttle=None, caller=None,
+                progress_callback=None):
+    """
+    Synchronizes the given assets in parallel and blocks until all of them are processed
+    :param assets: list(ArtellaAsset)
+    :param file_type: str or None, file type to sync. If None, all asset files are synced
+    :param sync_type: str or None, type of sync we want to do. If None, assets default sync type is used
+    :param max_workers: int, number of assets synced at the same time
+    :param sync_manifest: SyncManifest or None, if given, only files changed in server since last sync are synced
+    :param asset_index: AssetStateIndex or None, if given, sync state of the assets is stored in it
+    :param sync_journal: SyncJournal or None, if given, sync can be resumed from it if it is interrupted
+    :param sync_throttle: SyncThrottle or None, if given, limits the bandwidth and number of transfers of the sync
+    :param caller: ResilientCaller or None, if given, transfers that fail with transient errors are retried
+    :param progress_callback: fn(SyncBatch, SyncJob, str or None), called from worker threads
+    :return: SyncBatch
+    """
+
+    def _on_job_processed(batch, job, error):
+        if asset_index is not None and not error and not job.skipped:
+            try:
+                asset_index.mark_synced(
+                    job.asset_id, file_types=assetstate.get_synced_file_types(job.asset, job.synced_file_types),
+                    server_states=job.server_states)
+            except Exception as exc:
+                LOGGER.warning('Impossible to store sync state of "{}" in assets index: {}'.format(job.asset_id, exc))
+        if progress_callback:
+            progress_callback(batch, job, error)
+
+    engine = syncengine.SyncEngine(max_workers=max_workers, throttle=sync_throttle, caller=caller)
+    batch = engine.sync_assets(
+        assets, file_type=file_type, sync_type=sync_type, manifest=sync_manifest, journal=sync_journal,
+        progress_callback=_on_job_processed)
+    try:
+        # Wait in small steps so KeyboardInterrupt is handled in the main thread
+        while not batch.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        LOGGER.warning('Sync interrupted. Waiting for running jobs to finish ...')
+        batch.cancel()
+        batch.wait()
+    finally:
+        engine.shutdown()
+
+    return batch
+
+
+def sync_project(project=None, asset_types=None, file_type=None, sync_type=None,
+                 max_workers=syncengine.DEFAULT_MAX_WORKERS, incremental=True, resume=True, bandwidth_limit=0,
+                 max_transfers=0, reporter=None):
+    """
+    Synchronizes the assets of the current project and returns a summary of the sync
+    :param project: ArtellaProject or str or None, project used to locate sync manifest and assets index
+    :param asset_types: list(str) or None, types of the assets to sync. If None, all assets are synced
+    :param file_type: str or None, file type to sync. If None, all asset files are synced
+    :param sync_type: str or None, type of sync we want to do
+    :param max_workers: int, number of assets synced at the same time
+    :param incremental: bool, whether to sync only files that changed in server since last sync
+    :param resume: bool, whether to resume an interrupted sync of the same assets, skipping the ones already synced
+    :param bandwidth_limit: float, maximum MB per second transferred. 0 means no limit
+    :param max_transfers: int, maximum number of files transferred at the same time. 0 means no limit
+    :param reporter: JsonProgressReporter or None
+    :return: dict
+    """
+
+    start_time = time.time()
+    assets = get_assets(asset_types)
+    sync_journal = journal.SyncJournal.for_project(project)
+    if not sync_journal.acquire():
+        LOGGER.warning('Other session is running a resumable sync. This sync will not be resumable if interrupted.')
+        sync_journal = None
+    elif not resume:
+        sync_journal.discard()
+        sync_journal.acquire()
+    resumed = sync_journal is not None and sync_journal.matches(
+        [utils.get_asset_id(asset) for asset in assets], file_type=file_type, sync_type=sync_type)
+    if reporter:
+        reporter.report_start(
+            len(assets), project=utils.get_project_name(project), asset_types=asset_types or list(),
+            file_type=file_type, sync_type=sync_type, workers=max_workers, incremental=incremental,
+            resumed=resumed, already_synced=len(sync_journal.get_done_asset_ids()) if resumed else 0)
+
+    sync_manifest = manifest.SyncManifest.for_project(project) if incremental else None
+    asset_index = assetindex.AssetStateIndex.for_project(project)
+    try:
+        batch = sync_assets(
+            assets, file_type=file_type, sync_type=sync_type, max_workers=max_workers, sync_manifest=sync_manifest,
+            asset_index=asset_index, sync_journal=sync_journal,
+            sync_throttle=throttle.SyncThrottle(bandwidth_limit * throttle.MEGABYTE, max_transfers),
+            caller=resilience.ResilientCaller(),
+            progress_callback=reporter.report_progress if reporter else None)
+    finally:
+        asset_index.close()
+        if sync_journal is not None:
+            sync_journal.release()
+
+    summary = get_batch_summary(batch, elapsed=time.time() - start_time)
+    if reporter:
+        reporter.report_finish(summary)
+
+    return summary
+
+
+def plan_project(project=None, asset_types=None, file_type=None, sync_type=None, incremental=True, reporter=None):
+    """
+    Computes the files a sync of the current project assets would transfer, without downloading anything
+    :param project: ArtellaProject or str or None, project used to locate sync manifest and transfer stats
+    :param asset_types: list(str) or None, types of the assets to plan. If None, all assets are planned
+    :param file_type: str or None, file type to plan. If None, all asset files are planned
+    :param sync_type: str or None
+    :param incremental: bool, whether files that did not change in server since last sync are skipped
+    :param reporter: JsonProgressReporter or None
+    :return: dict
+    """
+
+    caller = resilience.ResilientCaller()
+    plan = planner.plan_sync(
+        get_assets(asset_types), file_type=file_type, sync_type=sync_type,
+        sync_manifest=manifest.SyncManifest.for_project(project) if incremental else None,
+        transfer_stats=planner.TransferStats.for_project(project), caller=caller,
+        fetch_fn=partial(assetstate.get_assets_artella_data, caller=caller))
+    plan_data = plan.to_dict()
+    if reporter:
+        reporter.emit('plan', **plan_data)
+
+    return plan_data
+
+
+def verify_project(project=None, asset_types=None, file_type=None, max_workers=None, reporter=None):
+    """
+    Verifies the checksums of the synced files of the current project assets. Corrupted and missing files are
+    flagged so next sync of the project transfers them again
+    :param project: ArtellaProject or str or None, project used to locate sync manifest and assets index
+    :param asset_types: list(str) or None, types of the assets to verify. If None, all assets are verified
+    :param file_type: str or None, file type to verify. If None, all asset files are verified
+    :param max_workers: int or None, number of processes used to hash files. If None, number of CPU cores is used
+    :param reporter: JsonProgressReporter or None
+    :return: dict, summary of the verification
+    """
+
+    asset_index = assetindex.AssetStateIndex.for_project(project)
+    try:
+        synced_files = asset_index.get_synced_files()
+    finally:
+        asset_index.close()
+    files_to_verify = verify.get_files_to_verify(
+        get_assets(asset_types), file_type=file_type, synced_files=synced_files, caller=resilience.ResilientCaller())
+    processed = [0]
+
+    def _on_file_verified(verified_file):
+        processed[0] += 1
+        if reporter:
+            reporter.emit('verify', processed=processed[0], total=len(files_to_verify), **verified_file.to_dict())
+
+    if reporter:
+        reporter.report_start(len(files_to_verify), stage='verify')
+    start_time = time.time()
+    verified_files = verify.verify_files(
+        files_to_verify, max_workers=max_workers, progress_callback=_on_file_verified)
+
+    asset_index = assetindex.AssetStateIndex.for_project(project)
+    try:
+        files_to_resync = verify.flag_for_resync(
+            verified_files, sync_manifest=manifest.SyncManifest.for_project(project), asset_index=asset_index)
+    finally:
+        asset_index.close()
+
+    summary = verify.get_verify_summary(verified_files)
+    summary['total'] = len(verified_files)
+    summary['flagged'] = sorted(set(verified_file.asset_id for verified_file in files_to_resync))
+    summary['elapsed'] = time.time() - start_time
+    if reporter:
+        reporter.report_finish(summary)
+
+    return summary
+
+
+def initialize(init_path):
+    """
+    Calls the function that initializes the Artella project in headless sessions
+    :param init_path: str, function path with module:function format
+    """
+
+    module_name, _, function_name = init_path.partition(':')
+    module = importlib.import_module(module_name)
+    if function_name:
+        getattr(module, function_name)()
+
+
+def get_argument_parser():
+    """
+    Returns the parser of the command line arguments
+    :return: argparse.ArgumentParser
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Synchronizes Artella project assets without user interface. '
+                    'Progress is written to stdout as JSON lines.')
+    parser.add_argument(
+        '--init', help='Function that initializes the Artella project, with module:function format')
+    parser.add_argument(
+        '--project', help='Name of the project used to store sync data. If not given, current project is used')
+    parser.add_argument(
+        '-t', '--type', dest='asset_types', action='append', default=list(),
+        help='Type of the assets to sync. Can be given multiple times. If not given, all assets are synced')
+    parser.add_argument('-f', '--file-type', help='Asset file type to sync. If not given, all files are synced')
+    parser.add_argument('-s', '--sync-type', help='Type of sync to do. If not given, assets default is used')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=syncengine.DEFAULT_MAX_WORKERS,
+        help='Number of assets synced at the same time')
+    parser.add_argument(
+        '--bandwidth', type=float, default=0, help='Maximum MB per second transferred. By default, no limit')
+    parser.add_argument(
+        '--max-transfers', type=int, default=0, help='Maximum files transferred at the same time. By default, no limit')
+    parser.add_argument(
+        '--full', action='store_true', help='Sync all files even if they did not change since last sync')
+    parser.add_argument(
+        '--restart', action='store_true', help='Do not resume interrupted sync, start it from the beginning')
+    parser.add_argument(
+        '--dry-run', action='store_true', help='Only report files to transfer, total size and estimated time')
+    parser.add_argument(
+        '--verify', action='store_true',
+        help='Verify synced files checksums instead of syncing. Corrupted files are flagged to be synced again')
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Command line entry point
+    :param argv: list(str) or None
+    :return: int, exit code. 0 if all assets were synced (or verified); 1 otherwise
+    """
+
+    args = get_argument_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    if args.init:
+        initialize(args.init)
+
+    project = args.project
+    if not project:
+        import artellapipe
+        project = getattr(artellapipe, 'project', None)
+
+    if args.verify:
+        summary = verify_project(
+            project=project, asset_types=args.asset_types, file_type=args.file_type, reporter=JsonProgressReporter())
+        return 0 if not summary['flagged'] else 1
+
+    if args.dry_run:
+        plan_project(
+            project=project, asset_types=args.asset_types, file_type=args.file_type, sync_type=args.sync_type,
+            incremental=not args.full, reporter=JsonProgressReporter())
+        return 0
+
+    summary = sync_project(
+        project=project, asset_types=args.asset_types, file_type=args.file_type, sync_type=args.sync_type,
+        max_workers=args.workers, incremental=not args.full, resume=not args.restart, bandwidth_limit=args.bandwidth,
+        max_transfers=args.max_transfers, reporter=JsonProgressReporter())
+
+    return 0 if not summary['failed'] and not summary['cancelled'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
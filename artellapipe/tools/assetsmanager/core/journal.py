@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the on disk journal used to resume interrupted bulk synchronizations
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+JOURNAL_FILE_NAME = 'sync_journal.jsonl'
+JOURNAL_LOCK_SUFFIX = '.lock'
+JOURNAL_VERSION = 1
+
+HEADER_RECORD = 'header'
+DONE_RECORD = 'done'
+
+
+class JournalOwnedError(Exception):
+    """
+    Exception raised when a session tries to write a sync journal owned by other session
+    """
+
+    pass
+
+
+class SyncJournal(object):
+    """
+    Append only journal that stores the parameters of a bulk synchronization and each asset, and asset file type,
+    that was already synced. Each record is written in its own line and flushed to disk immediately, so if the
+    application crashes the synchronization can be resumed skipping all the work already done.
+    The journal is removed once the bulk synchronization finishes successfully.
+    A session must own the journal before writing or removing it. Ownership is kept with an OS lock on a lock file
+    that is released automatically if the owner session dies, so journals of crashed sessions can be resumed, while
+    journals of sessions that are still syncing are never resumed or discarded by other sessions.
+    """
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self._header = None
+        self._done = set()
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self.load()
+
+    @classmethod
+    def for_project(cls, project):
+        """
+        Returns the sync journal of the given project
+        :param project: ArtellaProject
+        :return: SyncJournal
+        """
+
+        return cls(utils.get_data_path(project, JOURNAL_FILE_NAME))
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    @property
+    def lock_path(self):
+        return self._file_path + JOURNAL_LOCK_SUFFIX
+
+    @property
+    def owner(self):
+        return dict(self._header.get('owner', dict())) if self._header else dict()
+
+    @property
+    def file_type(self):
+        return self._header.get('file_type') if self._header else None
+
+    @property
+    def sync_type(self):
+        return self._header.get('sync_type') if self._header else None
+
+    @property
+    def asset_ids(self):
+        return list(self._header.get('assets', list())) if self._header else list()
+
+    def is_active(self):
+        """
+        Returns whether the journal stores a bulk synchronization that did not finish yet
+        :return: bool
+        """
+
+        return self._header is not None
+
+    def is_owned(self):
+        """
+        Returns whether this session owns the journal
+        :return: bool
+        """
+
+        return self._lock_file is not None
+
+    def acquire(self):
+        """
+        Takes ownership of the journal. Journal contents are reloaded, because the previous owner could have
+        updated them
+        :return: bool, True if this session owns the journal; False if it is owned by other session that is alive
+        """
+
+        with self._lock:
+            if self._lock_file is not None:
+                return True
+            file_dir = os.path.dirname(self._file_path)
+            try:
+                if not os.path.isdir(file_dir):
+                    os.makedirs(file_dir)
+                lock_file = open(self.lock_path, 'a')
+            except (IOError, OSError) as exc:
+                LOGGER.warning('Impossible to create sync journal lock "{}": {}'.format(self.lock_path, exc))
+                return True
+            if not utils.lock_file(lock_file):
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+
+        self.load()
+
+        return True
+
+    def release(self):
+        """
+        Releases the ownership of the journal, so other sessions can resume it
+        """
+
+        with self._lock:
+            lock_file, self._lock_file = self._lock_file, None
+        if lock_file is None:
+            return
+        utils.unlock_file(lock_file)
+        lock_file.close()
+
+    def load(self):
+        """
+        Loads journal contents from disk. Records that cannot be parsed (for example, a line that was being written
+        when the application crashed) are ignored
+        """
+
+        header = None
+        done = set()
+        if os.path.isfile(self._file_path):
+            try:
+                with open(self._file_path, 'r') as fh:
+                    for line in fh:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        record_type = record.get('type')
+                        if record_type == HEADER_RECORD and record.get('version') == JOURNAL_VERSION:
+                            header = record
+                            done = set()
+                        elif record_type == DONE_RECORD and header is not None:
+                            done.add((record.get('asset'), record.get('file_type')))
+            except (IOError, OSError) as exc:
+                LOGGER.warning('Impossible to read sync journal "{}": {}'.format(self._file_path, exc))
+                header, done = None, set()
+
+        with self._lock:
+            self._header = header
+            self._done = done
+
+    def begin(self, asset_ids, file_type=None, sync_type=None):
+        """
+        Starts journaling a bulk synchronization. If the journal already stores an interrupted synchronization with
+        the same parameters, it is resumed instead
+        :param asset_ids: list(str), ids of the assets to sync
+        :param file_type: str or None
+        :param sync_type: str or None
+        :return: bool, True if an interrupted synchronization was resumed; False otherwise
+        """
+
+        if not self.acquire():
+            raise JournalOwnedError(
+                'Sync journal "{}" is owned by other session: {}'.format(self._file_path, self.owner))
+
+        asset_ids = list(asset_ids)
+        if self.matches(asset_ids, file_type=file_type, sync_type=sync_type):
+            LOGGER.info('Resuming interrupted sync. {} of {} assets were already synced'.format(
+                len(self.get_done_asset_ids()), len(asset_ids)))
+            return True
+
+        header = {
+            'type': HEADER_RECORD, 'version': JOURNAL_VERSION, 'time': time.time(),
+            'file_type': file_type, 'sync_type': sync_type, 'assets': asset_ids,
+            'owner': {'host': socket.gethostname(), 'pid': os.getpid()}}
+        with self._lock:
+            self._header = header
+            self._done = set()
+            self._write(header, mode='w')
+
+        return False
+
+    def matches(self, asset_ids, file_type=None, sync_type=None):
+        """
+        Returns whether the journal stores an interrupted synchronization with the given parameters
+        :param asset_ids: list(str)
+        :param file_type: str or None
+        :param sync_type: str or None
+        :return: bool
+        """
+
+        if not self.is_active():
+            return False
+
+        return self.file_type == file_type and self.sync_type == sync_type and set(self.asset_ids) == set(asset_ids)
+
+    def record(self, asset_id, file_type=None):
+        """
+        Records that given asset, or asset file type, was synced
+        :param asset_id: str
+        :param file_type: str or None, if None, the whole asset is recorded as synced
+        """
+
+        with self._lock:
+            if self._header is None or (asset_id, file_type) in self._done:
+                return
+            self._done.add((asset_id, file_type))
+            self._write({'type': DONE_RECORD, 'asset': asset_id, 'file_type': file_type})
+
+    def is_done(self, asset_id, file_type=None):
+        """
+        Returns whether given asset, or asset file type, was already synced by the journaled synchronization
+        :param asset_id: str
+        :param file_type: str or None
+        :return: bool
+        """
+
+        with self._lock:
+            return (asset_id, None) in self._done or (asset_id, file_type) in self._done
+
+    def get_done_asset_ids(self):
+        """
+        Returns ids of the assets that were completely synced
+        :return: list(str)
+        """
+
+        with self._lock:
+            return [asset_id for asset_id, file_type in self._done if file_type is None]
+
+    def get_pending_asset_ids(self):
+        """
+        Returns ids of the assets that still need to be synced
+        :return: list(str)
+        """
+
+        done_ids = set(self.get_done_asset_ids())
+
+        return [asset_id for asset_id in self.asset_ids if asset_id not in done_ids]
+
+    def complete(self):
+        """
+        Finishes the journaled synchronization, removing the journal from disk and releasing its ownership.
+        Journals owned by other sessions are not removed
+        :return: bool, True if the journal was removed; False if it is owned by other session
+        """
+
+        if not self.acquire():
+            LOGGER.warning('Sync journal "{}" is owned by other session {}. It is not removed'.format(
+                self._file_path, self.owner))
+            return False
+
+        with self._lock:
+            self._header = None
+            self._done = set()
+            if os.path.isfile(self._file_path):
+                try:
+                    os.remove(self._file_path)
+                except OSError as exc:
+                    LOGGER.warning('Impossible to remove sync journal "{}": {}'.format(self._file_path, exc))
+        self.release()
+
+        return True
+
+    discard = complete
+
+    def _write(self, record, mode='a'):
+        """
+        Internal function that writes a record in the journal and flushes it to disk
+        Must be called with the journal lock acquired
+        :param record: dict
+        :param mode: str, file open mode
+        """
+
+        file_dir = os.path.dirname(self._file_path)
+        try:
+            if not os.path.isdir(file_dir):
+                os.makedirs(file_dir)
+            with open(self._file_path, mode) as fh:
+                fh.write(json.dumps(record) + '\n')
+                fh.flush()
+                os.fsync(fh.fileno())
+        except (IOError, OSError) as exc:
+            LOGGER.error('Impossible to write sync journal "{}": {}'.format(self._file_path, exc))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the local manifest that stores the state of the synced assets files
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import time
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+MANIFEST_FILE_NAME = 'sync_manifest.json'
+MANIFEST_VERSION = 1
+MANIFEST_LOCK_SUFFIX = '.lock'
+
+# Changes done to the manifest since it was saved
+UPDATE_CHANGE = 'update'
+INVALIDATE_CHANGE = 'invalidate'
+CLEAR_CHANGE = 'clear'
+
+
+class SyncManifest(object):
+    """
+    Stores, per asset and file type, the server version and checksum of the last synced files.
+    It is used to skip the synchronization of files that did not change in the server since last sync.
+    Several sessions can use the manifest of the same project: when it is saved, the changes done by the session are
+    merged with the manifest stored in disk while holding a file lock, so changes of other sessions are kept.
+    """
+
+    def __init__(self, file_path, autosave_interval=50):
+        self._file_path = file_path
+        self._autosave_interval = autosave_interval
+        self._entries = dict()
+        self._changes = list()
+        self._lock = threading.RLock()
+        self.load()
+
+    @classmethod
+    def for_project(cls, project, **kwargs):
+        """
+        Returns the manifest of the given project
+        :param project: ArtellaProject
+        :return: SyncManifest
+        """
+
+        return cls(utils.get_data_path(project, MANIFEST_FILE_NAME), **kwargs)
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    def load(self):
+        """
+        Loads manifest contents from disk
+        """
+
+        data = utils.read_json(self._file_path, default=dict()) or dict()
+        if data.get('version') != MANIFEST_VERSION:
+            data = dict()
+
+        with self._lock:
+            self._entries = data.get('assets', dict())
+            self._changes = list()
+
+    def save(self):
+        """
+        Stores in disk the changes done since last save. Changes are applied over the manifest stored in disk, so
+        entries stored by other sessions are not lost
+        """
+
+        with self._lock:
+            if not self._changes:
+                return
+            try:
+                with utils.locked_path(self._file_path + MANIFEST_LOCK_SUFFIX) as locked:
+                    if not locked:
+                        LOGGER.warning('Sync manifest "{}" is locked by other session. It will be saved later.'.format(
+                            self._file_path))
+                        return
+                    data = utils.read_json(self._file_path, default=dict()) or dict()
+                    entries = data.get('assets', dict()) if data.get('version') == MANIFEST_VERSION else dict()
+                    for change in self._changes:
+                        self._apply_change(entries, *change)
+                    utils.write_json(self._file_path, {'version': MANIFEST_VERSION, 'assets': entries})
+            except Exception as exc:
+                LOGGER.error('Impossible to save sync manifest "{}": {}'.format(self._file_path, exc))
+                return
+            self._entries = entries
+            self._changes = list()
+
+    def get(self, asset_id, file_type):
+        """
+        Returns stored state of the given asset file
+        :param asset_id: str
+        :param file_type: str
+        :return: dict or None
+        """
+
+        with self._lock:
+            return self._entries.get(asset_id, dict()).get(file_type)
+
+    def update(self, asset_id, file_type, file_state, sync_type=None):
+        """
+        Stores the state of a synced asset file
+        :param asset_id: str
+        :param file_type: str
+        :param file_state: dict, server state of the file at the moment it was synced
+        :param sync_type: str or None, type of sync that was done
+        """
+
+        entry = dict(file_state or dict())
+        entry['synced'] = time.time()
+        entry['sync_type'] = sync_type
+        with self._lock:
+            self._change(UPDATE_CHANGE, asset_id, file_type, entry)
+            if self._autosave_interval and len(self._changes) >= self._autosave_interval:
+                self.save()
+
+    def invalidate(self, asset_id, file_type=None):
+        """
+        Removes stored state of the given asset, forcing its next sync
+        :param asset_id: str
+        :param file_type: str or None, if None all asset file types are invalidated
+        """
+
+        with self._lock:
+            self._change(INVALIDATE_CHANGE, asset_id, file_type)
+
+    def clear(self):
+        """
+        Removes all the entries of the manifest
+        """
+
+        with self._lock:
+            self._change(CLEAR_CHANGE)
+
+    def is_up_to_date(self, asset_id, file_type, server_state, sync_type=None, local_path=None):
+        """
+        Returns whether or not stored state of the given asset file matches given server state
+        :param asset_id: str
+        :param file_type: str
+        :param server_state: dict or None
+        :param sync_type: str or None, if given, stored state must have been synced with the same sync type
+        :param local_path: str or None, local path of the file. If given, the file must exist in disk
+        :return: bool
+        """
+
+        local_state = self.get(asset_id, file_type)
+        if not local_state:
+            return False
+        if sync_type is not None and local_state.get('sync_type') != sync_type:
+            return False
+        if not assetstate.is_same_file_state(local_state, server_state):
+            return False
+
+        # Synced files deleted or moved by the user must be synced again
+        return not local_path or os.path.isfile(local_path)
+
+    def _change(self, change_type, *args):
+        """
+        Internal function that applies a change to the manifest entries and stores it, so it can be applied again
+        over the manifest stored in disk when the manifest is saved. Must be called with the lock acquired
+        :param change_type: str
+        :param args: list, arguments of the change
+        """
+
+        self._apply_change(self._entries, change_type, *args)
+        self._changes.append((change_type,) + args)
+
+    @staticmethod
+    def _apply_change(entries, change_type, asset_id=None, file_type=None, entry=None):
+        """
+        Internal function that applies a change to the given manifest entries
+        :param entries: dict
+        :param change_type: str
+        :param asset_id: str or None
+        :param file_type: str or None
+        :param entry: dict or None
+        """
+
+        if change_type == CLEAR_CHANGE:
+            entries.clear()
+        elif change_type == UPDATE_CHANGE:
+            entries.setdefault(asset_id, dict())[file_type] = entry
+        elif file_type is None:
+            entries.pop(asset_id, None)
+        else:
+            entries.get(asset_id, dict()).pop(file_type, None)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the in-memory cache used to store assets Artella metadata
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_SIZE = 512
+DEFAULT_TTL = 300
+
+
+class MetadataCache(object):
+    """
+    Thread safe cache with a maximum number of entries, evicted in least recently used order, and a time to live
+    for each entry. Hits and misses are counted so the effectiveness of the cache can be checked.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL, clock=None):
+        self._max_size = max(1, int(max_size))
+        self._ttl = ttl
+        self._clock = clock or time.time
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get_fresh(key) is not None
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def get(self, key, default=None):
+        """
+        Returns cached value of the given key if it exists and it is not expired
+        :param key: str
+        :param default: object, value returned if no fresh entry exists
+        :return: object
+        """
+
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            self._hits += 1
+            self._entries.pop(key)
+            self._entries[key] = entry
+
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value in the cache
+        :param key: str
+        :param value: object
+        :param ttl: float or None, time to live of the entry in seconds. If None, cache default TTL is used
+        """
+
+        ttl = self._ttl if ttl is None else ttl
+        expires = self._clock() + ttl if ttl else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Removes the entry of the given key
+        :param key: str
+        :return: bool, True if an entry was removed; False otherwise
+        """
+
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """
+        Removes all the entries of the cache
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        """
+        Resets hits and misses counters
+        """
+
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self):
+        """
+        Returns cache statistics
+        :return: dict
+        """
+
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': (self._hits / total) if total else 0.0,
+                'size': len(self._entries),
+                'max_size': self._max_size
+            }
+
+    def _get_fresh(self, key):
+        """
+        Internal function that returns the entry of the given key, removing it if it is expired
+        Must be called with the cache lock acquired
+        :param key: str
+        :return: tuple(float, object) or None
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= self._clock():
+            self._entries.pop(key)
+            return None
+
+        return entry
@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the sync planner used to know what a sync will transfer before running it
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+TRANSFER_STATS_FILE_NAME = 'transfer_stats.json'
+
+# Used to estimate durations until real transfers are measured
+DEFAULT_BYTES_PER_SECOND = 5 * 1024 * 1024
+DEFAULT_SECONDS_PER_FILE = 0.5
+
+# Weight of new throughput samples in the moving average
+THROUGHPUT_SMOOTHING = 0.3
+
+# Number of assets whose metadata is requested at once when planning
+DEFAULT_PLAN_BATCH_SIZE = 50
+
+
+class PlanCancelledError(Exception):
+    """
+    Raised when a sync plan is cancelled before it finishes
+    """
+
+    pass
+
+
+def format_size(size):
+    """
+    Returns human readable representation of the given number of bytes
+    :param size: int
+    :return: str
+    """
+
+    size = float(size or 0)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024.0:
+            return '{:.1f} {}'.format(size, unit) if unit != 'B' else '{:d} B'.format(int(size))
+        size /= 1024.0
+
+    return '{:.1f} TB'.format(size)
+
+
+def format_duration(seconds):
+    """
+    Returns human readable representation of the given number of seconds
+    :param seconds: float
+    :return: str
+    """
+
+    seconds = int(round(seconds or 0))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return '{}h {:02d}m'.format(hours, minutes)
+    if minutes:
+        return '{}m {:02d}s'.format(minutes, seconds)
+
+    return '{}s'.format(seconds)
+
+
+class PlannedFile(object):
+    """
+    Class that defines a file that will be transferred by a sync
+    """
+
+    def __init__(self, asset_id, file_type, size=None, server_state=None):
+        self.asset_id = asset_id
+        self.file_type = file_type
+        self.size = size
+        self.server_state = server_state
+
+    def __repr__(self):
+        return 'PlannedFile({}, {}, size={})'.format(self.asset_id, self.file_type, self.size)
+
+
+class SyncPlan(object):
+    """
+    Class that stores the result of planning a sync: files to transfer, files already up to date, total bytes and
+    estimated duration
+    """
+
+    def __init__(self, bytes_per_second=DEFAULT_BYTES_PER_SECOND, seconds_per_file=DEFAULT_SECONDS_PER_FILE):
+        self._bytes_per_second = bytes_per_second or DEFAULT_BYTES_PER_SECOND
+        self._seconds_per_file = seconds_per_file
+        self.files = list()
+        self.up_to_date = list()
+        self.total_assets = 0
+
+    @property
+    def total_files(self):
+        return len(self.files)
+
+    @property
+    def total_bytes(self):
+        return sum(planned_file.size or 0 for planned_file in self.files)
+
+    @property
+    def unknown_size_files(self):
+        return len([planned_file for planned_file in self.files if planned_file.size is None])
+
+    @property
+    def estimated_duration(self):
+        """
+        Returns estimated time, in seconds, the sync will take if files are transferred one after another
+        :return: float
+        """
+
+        return self.total_bytes / self._bytes_per_second + self.total_files * self._seconds_per_file
+
+    def get_message(self, workers=1):
+        """
+        Returns message that summarizes the plan
+        :param workers: int, number of assets synced at the same time
+        :return: str
+        """
+
+        if not self.files:
+            return 'All files of the {} assets are up to date. Nothing to transfer.'.format(self.total_assets)
+
+        message = '{} files to transfer ({} already up to date), {}. Estimated time: {}.'.format(
+            self.total_files, len(self.up_to_date), format_size(self.total_bytes),
+            format_duration(self.estimated_duration / max(1, workers)))
+        if self.unknown_size_files:
+            message += ' Size of {} files is unknown.'.format(self.unknown_size_files)
+
+        return message
+
+    def to_dict(self):
+        return {
+            'assets': self.total_assets,
+            'files': self.total_files,
+            'up_to_date': len(self.up_to_date),
+            'bytes': self.total_bytes,
+            'unknown_size_files': self.unknown_size_files,
+            'estimated_duration': round(self.estimated_duration, 3)
+        }
+
+
+class TransferStats(object):
+    """
+    Keeps a moving average of the measured transfer throughput, stored in disk, used to estimate sync durations
+    """
+
+    def __init__(self, file_path=None):
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        data = utils.read_json(file_path, default=dict()) if file_path else dict()
+        self._bytes_per_second = (data or dict()).get('bytes_per_second') or DEFAULT_BYTES_PER_SECOND
+
+    @classmethod
+    def for_project(cls, project):
+        """
+        Returns the transfer stats of the given project
+        :param project: ArtellaProject
+        :return: TransferStats
+        """
+
+        return cls(utils.get_data_path(project, TRANSFER_STATS_FILE_NAME))
+
+    @property
+    def bytes_per_second(self):
+        return self._bytes_per_second
+
+    def add_sample(self, transferred_bytes, seconds):
+        """
+        Adds a throughput measurement
+        :param transferred_bytes: int
+        :param seconds: float
+        """
+
+        if not transferred_bytes or not seconds or seconds <= 0:
+            return
+
+        with self._lock:
+            sample = transferred_bytes / seconds
+            self._bytes_per_second += THROUGHPUT_SMOOTHING * (sample - self._bytes_per_second)
+
+    def save(self):
+        """
+        Stores stats in disk
+        """
+
+        if not self._file_path:
+            return
+
+        try:
+            utils.write_json(self._file_path, {'bytes_per_second': self._bytes_per_second})
+        except Exception as exc:
+            LOGGER.warning('Impossible to save transfer stats "{}": {}'.format(self._file_path, exc))
+
+
+def plan_sync(assets, file_type=None, sync_type=None, sync_manifest=None, transfer_stats=None, is_cancelled=None,
+              caller=None, fetch_fn=None, batch_size=DEFAULT_PLAN_BATCH_SIZE):
+    """
+    Computes the files that a sync of the given assets will transfer. Only server metadata and local sync state are
+    read, nothing is downloaded.
+    Plans follow the granularity of sync jobs: when no file type is given, an asset with any outdated file is synced
+    as a whole, so all its files are planned to be transferred
+    :param assets: list(ArtellaAsset)
+    :param file_type: str or None, file type to sync. If None, all asset files are planned
+    :param sync_type: str or None
+    :param sync_manifest: SyncManifest or None, used to know which files are already up to date
+    :param transfer_stats: TransferStats or None, used to estimate sync duration
+    :param is_cancelled: fn() -> bool or None, checked before planning each asset
+    :param caller: ResilientCaller or None, if given, server metadata is requested through it
+    :param fetch_fn: fn(list(ArtellaAsset)) -> dict(str, object) or None, function that retrieves the Artella metadata
+        of several assets at once, as BatchMetadataFetcher.fetch. If None, metadata of each asset is requested when the
+        asset is planned
+    :param batch_size: int, number of assets whose metadata is requested with each fetch_fn call
+    :return: SyncPlan
+    """
+
+    plan = SyncPlan(bytes_per_second=transfer_stats.bytes_per_second if transfer_stats else None)
+    batch_size = max(1, batch_size)
+    for i in range(0, len(assets), batch_size):
+        if is_cancelled and is_cancelled():
+            raise PlanCancelledError('Sync plan was cancelled')
+        batch = assets[i:i + batch_size]
+        assets_data = _fetch_assets_data(batch, fetch_fn) if fetch_fn else dict()
+        for asset in batch:
+            if is_cancelled and is_cancelled():
+                raise PlanCancelledError('Sync plan was cancelled')
+            _plan_asset(plan, asset, file_type, sync_type, sync_manifest, caller, assets_data)
+
+    return plan
+
+
+def _fetch_assets_data(assets, fetch_fn):
+    """
+    Internal function that retrieves the Artella metadata of the given assets that do not expose the server state of
+    their files
+    :param assets: list(ArtellaAsset)
+    :param fetch_fn: fn(list(ArtellaAsset)) -> dict(str, object)
+    :return: dict(str, object)
+    """
+
+    assets_to_fetch = [asset for asset in assets if getattr(asset, 'get_server_file_state', None) is None]
+    if not assets_to_fetch:
+        return dict()
+
+    try:
+        return fetch_fn(assets_to_fetch) or dict()
+    except Exception as exc:
+        LOGGER.warning('Impossible to retrieve Artella data of {} assets: {}'.format(len(assets_to_fetch), exc))
+        return dict()
+
+
+def _plan_asset(plan, asset, file_type, sync_type, sync_manifest, caller, assets_data):
+    """
+    Internal function that adds to the given plan the files of the given asset
+    :param plan: SyncPlan
+    :param asset: ArtellaAsset
+    :param file_type: str or None
+    :param sync_type: str or None
+    :param sync_manifest: SyncManifest or None
+    :param caller: ResilientCaller or None
+    :param assets_data: dict(str, object), already fetched Artella metadata of the assets
+    """
+
+    plan.total_assets += 1
+    asset_id = utils.get_asset_id(asset)
+    file_types = [file_type] if file_type else assetstate.get_asset_file_types(asset)
+    if not file_types:
+        files_state = dict()
+    elif asset_id in assets_data:
+        artella_data = assets_data[asset_id]
+        files_state = assetstate.get_files_state_from_artella_data(
+            asset, file_types, None if isinstance(artella_data, Exception) else artella_data)
+    else:
+        files_state = assetstate.get_server_files_state(asset, file_types, caller=caller)
+
+    planned_files = list()
+    outdated = False
+    for asset_file_type in file_types or [None]:
+        server_state = files_state.get(asset_file_type)
+        size = server_state.get(assetstate.SIZE_KEY) if server_state else None
+        planned_file = PlannedFile(asset_id, asset_file_type, size=size, server_state=server_state)
+        is_up_to_date = bool(sync_manifest and asset_file_type and sync_manifest.is_up_to_date(
+            asset_id, asset_file_type, server_state, sync_type=sync_type,
+            local_path=assetstate.get_local_file_path(asset, asset_file_type, server_state=server_state)))
+        planned_files.append((planned_file, is_up_to_date))
+        outdated = outdated or not is_up_to_date
+
+    # Without file type the whole asset is synced, so its up to date files are transferred too
+    whole_asset_synced = outdated and not file_type
+    for planned_file, is_up_to_date in planned_files:
+        if is_up_to_date and not whole_asset_synced:
+            plan.up_to_date.append(planned_file)
+        else:
+            plan.files.append(planned_file)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the prefetcher that warms the metadata of the assets the user is likely to click next
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils, scheduler
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+DEFAULT_PREFETCH_RADIUS = 4
+DEFAULT_MAX_PREFETCH = 32
+
+
+def get_neighbours(ordered_ids, current_id, radius=DEFAULT_PREFETCH_RADIUS):
+    """
+    Returns the ids placed around the given one, closest ones first
+    :param ordered_ids: list(str), ids in the order they are displayed
+    :param current_id: str
+    :param radius: int, number of ids to return at each side of the current one
+    :return: list(str)
+    """
+
+    if current_id not in ordered_ids:
+        return list()
+
+    index = ordered_ids.index(current_id)
+    neighbours = list()
+    for offset in range(1, radius + 1):
+        if index + offset < len(ordered_ids):
+            neighbours.append(ordered_ids[index + offset])
+        if index - offset >= 0:
+            neighbours.append(ordered_ids[index - offset])
+
+    return neighbours
+
+
+class AssetPrefetcher(object):
+    """
+    Requests, with prefetch priority, the metadata of assets that are not cached yet and stores it in the metadata
+    cache, so when the user clicks them their info is shown without waiting for Artella
+    """
+
+    def __init__(self, metadata_fetcher, metadata_cache, max_prefetch=DEFAULT_MAX_PREFETCH):
+        self._metadata_fetcher = metadata_fetcher
+        self._metadata_cache = metadata_cache
+        self._max_prefetch = max_prefetch
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._enabled = True
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def set_enabled(self, flag):
+        self._enabled = bool(flag)
+
+    def prefetch(self, assets):
+        """
+        Requests the metadata of the given assets that are not cached or being prefetched yet
+        :param assets: list(ArtellaAsset), assets sorted by prefetch preference
+        :return: int, number of requested assets
+        """
+
+        if not self._enabled:
+            return 0
+
+        requested = 0
+        for asset in assets:
+            if requested >= self._max_prefetch:
+                break
+            asset_id = utils.get_asset_id(asset)
+            if asset_id in self._metadata_cache:
+                continue
+            with self._lock:
+                if asset_id in self._in_flight:
+                    continue
+                self._in_flight.add(asset_id)
+            self._metadata_fetcher.request(asset, self._on_prefetched, priority=scheduler.JobPriority.PREFETCH)
+            requested += 1
+
+        return requested
+
+    def _on_prefetched(self, asset, data, error):
+        """
+        Internal callback function that is called when the metadata of a prefetched asset is available
+        :param asset: ArtellaAsset
+        :param data: object
+        :param error: str or None
+        """
+
+        asset_id = utils.get_asset_id(asset)
+        with self._lock:
+            self._in_flight.discard(asset_id)
+
+        if error:
+            LOGGER.debug('Impossible to prefetch metadata of asset "{}": {}'.format(asset_id, error))
+            return
+
+        self._metadata_cache.set(asset_id, data)
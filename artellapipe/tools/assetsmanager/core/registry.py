@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the registry of in flight sync operations used to merge duplicated sync requests
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import logging
+import threading
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+
+class SyncRegistry(object):
+    """
+    Keeps track of the sync operations that are running, keyed by asset id, file type, sync type and whether the
+    operation is incremental.
+    When an operation is requested while an equivalent one is running, the request is attached to the running one
+    instead of transferring the same files again, and it is notified once the running operation finishes.
+    An operation that syncs all the files of an asset (file type None) also covers requests of a single file type.
+    A non incremental operation also covers incremental requests, but incremental operations skip files that did not
+    change in server, so they never cover non incremental requests.
+    """
+
+    def __init__(self):
+        self._in_flight = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._in_flight)
+
+    def is_in_flight(self, asset_id, file_type=None, sync_type=None, incremental=False):
+        """
+        Returns whether an operation that covers the given one is running
+        :param asset_id: str
+        :param file_type: str or None
+        :param sync_type: str or None
+        :param incremental: bool
+        :return: bool
+        """
+
+        with self._lock:
+            return self._find((asset_id, file_type, sync_type, incremental)) is not None
+
+    def begin(self, key, callback):
+        """
+        Registers a new sync operation. If an operation that covers it is already running, given callback is attached
+        to the running operation
+        :param key: tuple(str, str, str, bool), asset id, file type, sync type and incremental flag of the operation
+        :param callback: fn(*args), called with finish arguments if the operation is attached to a running one
+        :return: bool, True if the caller must run the operation; False if it was attached to a running one
+        """
+
+        with self._lock:
+            running_key = self._find(key)
+            if running_key is not None:
+                self._in_flight[running_key].append(callback)
+                LOGGER.debug('Sync of {} merged with running sync of {}'.format(key, running_key))
+                return False
+            self._in_flight[key] = list()
+
+        return True
+
+    def finish(self, key, *args):
+        """
+        Unregisters a running operation and notifies all the requests attached to it
+        :param key: tuple(str, str, str, bool)
+        :param args: list, arguments passed to attached callbacks
+        """
+
+        with self._lock:
+            callbacks = self._in_flight.pop(key, list())
+
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as exc:
+                LOGGER.error('Error while notifying merged sync of {}: {}'.format(key, exc))
+
+    def _find(self, key):
+        """
+        Internal function that returns the key of the running operation that covers the given one
+        Must be called with the registry lock acquired
+        :param key: tuple(str, str, str, bool)
+        :return: tuple(str, str, str, bool) or None
+        """
+
+        asset_id, file_type, sync_type, incremental = key
+        file_types = [file_type] if file_type is None else [file_type, None]
+        incremental_flags = [False, True] if incremental else [False]
+        for covering_file_type in file_types:
+            for covering_incremental in incremental_flags:
+                covering_key = (asset_id, covering_file_type, sync_type, covering_incremental)
+                if covering_key in self._in_flight:
+                    return covering_key
+
+        return None
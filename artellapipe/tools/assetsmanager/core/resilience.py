@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the retry policy and circuit breaker used to call Artella when it is flaky or down
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import errno
+import random
+import socket
+import logging
+import threading
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+# HTTP status codes and OS error codes that identify errors that can be solved retrying the call
+TRANSIENT_HTTP_STATUS = (429, 502, 503, 504)
+TRANSIENT_ERRNOS = tuple(getattr(errno, name) for name in (
+    'ECONNRESET', 'ECONNREFUSED', 'ECONNABORTED', 'ETIMEDOUT', 'EPIPE', 'ENETUNREACH', 'EHOSTUNREACH', 'EAGAIN')
+    if hasattr(errno, name))
+
+try:
+    TRANSIENT_ERROR_TYPES = (socket.timeout, ConnectionError)
+except NameError:
+    TRANSIENT_ERROR_TYPES = (socket.timeout, )
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is rejected because Artella is considered down
+    """
+
+    pass
+
+
+class RetryCancelledError(Exception):
+    """
+    Raised when a call is cancelled while waiting to be retried
+    """
+
+    pass
+
+
+def is_transient_error(exc):
+    """
+    Returns whether the given error is transient, so retrying the call can succeed
+    :param exc: Exception
+    :return: bool
+    """
+
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, TRANSIENT_ERROR_TYPES):
+        return True
+    if get_http_status(exc) in TRANSIENT_HTTP_STATUS:
+        return True
+    if isinstance(exc, EnvironmentError) and exc.errno in TRANSIENT_ERRNOS:
+        return True
+
+    # Errors that wrap the original one, like URLError, store it as reason
+    reason = getattr(exc, 'reason', None)
+
+    return isinstance(reason, Exception) and reason is not exc and is_transient_error(reason)
+
+
+def is_server_error(exc):
+    """
+    Returns whether the given error was answered by the server, so it proves the server is available. Errors raised
+    by local code (AttributeError, TypeError, ...) do not tell anything about the server
+    :param exc: Exception
+    :return: bool
+    """
+
+    if get_http_status(exc) is not None:
+        return True
+
+    reason = getattr(exc, 'reason', None)
+
+    return isinstance(reason, Exception) and reason is not exc and is_server_error(reason)
+
+
+def get_http_status(exc):
+    """
+    Returns the HTTP status code stored in the given error
+    Supports urllib errors (code) and requests errors (response.status_code)
+    :param exc: Exception
+    :return: int or None
+    """
+
+    for status in (getattr(exc, 'code', None), getattr(exc, 'status_code', None),
+                   getattr(getattr(exc, 'response', None), 'status_code', None)):
+        if isinstance(status, int):
+            return status
+
+    return None
+
+
+class RetryPolicy(object):
+    """
+    Defines how many times a call is retried and how long to wait between attempts. Waits grow exponentially and
+    are randomized (full jitter), so clients that failed at the same time do not retry at the same time
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=10.0, is_transient=None, rand=None):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.is_transient = is_transient or is_transient_error
+        self._random = rand or random.random
+
+    def get_delay(self, attempt):
+        """
+        Returns seconds to wait before retrying after the given failed attempt
+        :param attempt: int, number of the attempt that failed, starting from 1
+        :return: float
+        """
+
+        return self._random() * min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling Artella once too many consecutive calls fail. While the circuit is open, calls fail immediately.
+    Once the reset timeout passes, a single probe call is allowed: if it succeeds the circuit is closed again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, state_callback=None, clock=None):
+        self._failure_threshold = max(1, int(failure_threshold))
+        self._reset_timeout = reset_timeout
+        self._state_callback = state_callback
+        self._clock = clock or time.time
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_time = 0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._get_state()
+
+    def is_open(self):
+        return self.state == self.OPEN
+
+    def allow(self):
+        """
+        Returns whether a call can be done
+        :return: bool
+        """
+
+        with self._lock:
+            state = self._get_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+
+        return False
+
+    def record_success(self):
+        """
+        Notifies that a call succeeded
+        """
+
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            changed = self._set_state(self.CLOSED)
+
+        self._notify(changed)
+
+    def record_failure(self):
+        """
+        Notifies that a call failed because Artella was not available
+        """
+
+        with self._lock:
+            self._failures += 1
+            changed = None
+            if self._probing or self._failures >= self._failure_threshold:
+                self._probing = False
+                self._opened_time = self._clock()
+                changed = self._set_state(self.OPEN)
+
+        self._notify(changed)
+
+    def record_ignored(self):
+        """
+        Notifies that a call failed with an error that does not tell whether Artella is available. State is not
+        changed, but if the call was the half open probe, another probe is allowed
+        """
+
+        with self._lock:
+            self._probing = False
+
+    def reset(self):
+        """
+        Closes the circuit
+        """
+
+        self.record_success()
+
+    def _get_state(self):
+        """
+        Internal function that returns current state. Must be called with the lock acquired
+        :return: str
+        """
+
+        if self._state == self.OPEN and self._clock() - self._opened_time >= self._reset_timeout:
+            return self.HALF_OPEN
+
+        return self._state
+
+    def _set_state(self, state):
+        """
+        Internal function that updates the state. Must be called with the lock acquired
+        :param state: str
+        :return: tuple(str, str) or None, old and new states if the state changed; None otherwise
+        """
+
+        old_state = self._state
+        self._state = state
+
+        return (old_state, state) if old_state != state else None
+
+    def _notify(self, changed):
+        """
+        Internal function that calls state callback if the state changed
+        :param changed: tuple(str, str) or None
+        """
+
+        if not changed or not self._state_callback:
+            return
+
+        LOGGER.info('Artella circuit changed from {} to {}'.format(*changed))
+        try:
+            self._state_callback(*changed)
+        except Exception as exc:
+            LOGGER.error('Error while notifying Artella circuit state change: {}'.format(exc))
+
+
+class ResilientCaller(object):
+    """
+    Calls Artella functions retrying transient errors and failing fast when the circuit breaker is open.
+    Errors that are not transient are raised immediately and do not count as Artella being down. Only the ones
+    answered by the server count as Artella being available.
+    """
+
+    def __init__(self, retry_policy=None, circuit_breaker=None, sleep=None):
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._sleep = sleep or time.sleep
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @property
+    def circuit_breaker(self):
+        return self._circuit_breaker
+
+    def call(self, fn, args=None, kwargs=None, is_cancelled=None):
+        """
+        Calls the given function
+        :param fn: fn
+        :param args: list or None
+        :param kwargs: dict or None
+        :param is_cancelled: fn() -> bool or None, checked before each retry
+        :return: object, value returned by the function
+        """
+
+        args = args or list()
+        kwargs = kwargs or dict()
+        attempt = 0
+        while True:
+            if not self._circuit_breaker.allow():
+                raise CircuitOpenError('Artella is not available')
+            attempt += 1
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                if not self._retry_policy.is_transient(exc):
+                    if is_server_error(exc):
+                        # The server answered, so it is available
+                        self._circuit_breaker.record_success()
+                    else:
+                        self._circuit_breaker.record_ignored()
+                    raise
+                self._circuit_breaker.record_failure()
+                if attempt >= self._retry_policy.max_attempts:
+                    raise
+                if is_cancelled and is_cancelled():
+                    raise RetryCancelledError('Call cancelled while waiting to be retried')
+                delay = self._retry_policy.get_delay(attempt)
+                LOGGER.debug('Attempt {} of {} failed ({}). Retrying in {:.2f}s'.format(
+                    attempt, fn, exc, delay))
+                self._sleep(delay)
+            else:
+                self._circuit_breaker.record_success()
+                return result
+
+    def wrap(self, fn):
+        """
+        Returns a function that calls the given one through this caller
+        :param fn: fn
+        :return: fn
+        """
+
+        def _wrapped(*args, **kwargs):
+            return self.call(fn, args=args, kwargs=kwargs)
+
+        return _wrapped
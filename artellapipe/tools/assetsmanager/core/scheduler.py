@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains priority based job scheduler used by Assets Manager
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import uuid
+import heapq
+import logging
+import itertools
+import threading
+import traceback
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+
+class JobPriority(object):
+    """
+    Priority classes supported by the scheduler. Lower values are processed first
+    Syncs requested by the user have their own class, below info fetches, so they never delay them
+    """
+
+    INTERACTIVE = 0
+    PREFETCH = 1
+    INTERACTIVE_SYNC = 2
+    BULK = 3
+
+
+class Job(object):
+    """
+    Class that defines a unit of work processed by the scheduler
+    """
+
+    def __init__(self, fn, data=None, priority=JobPriority.INTERACTIVE, group=None, callback=None):
+        self._uid = str(uuid.uuid4())
+        self._fn = fn
+        self._data = data
+        self._priority = priority
+        self._group = group
+        self._callback = callback
+        self._cancelled = False
+        self._running = False
+        self._done = threading.Event()
+        self._heap_count = None
+        self.result = None
+        self.error = None
+        self.trace = None
+
+    def __repr__(self):
+        return 'Job({}, priority={}, group={})'.format(self._uid, self._priority, self._group)
+
+    @property
+    def uid(self):
+        return self._uid
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def priority(self):
+        return self._priority
+
+    @property
+    def group(self):
+        return self._group
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def has_callback(self):
+        return self._callback is not None
+
+    def is_running(self):
+        return self._running
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        """
+        Cancels the job. If the job is already running its result will be discarded
+        """
+
+        self._cancelled = True
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def run(self):
+        """
+        Executes the job function and stores its result or error
+        """
+
+        self._running = True
+        try:
+            self.result = self._fn(self._data) if self._data is not None else self._fn()
+        except Exception as exc:
+            self.error = str(exc) or exc.__class__.__name__
+            self.trace = traceback.format_exc()
+        finally:
+            self._running = False
+
+        if self._callback:
+            try:
+                self._callback(self)
+            except Exception as exc:
+                LOGGER.error('Error while executing callback of {}: {}'.format(self, exc))
+
+        self._done.set()
+
+
+class JobScheduler(object):
+    """
+    Scheduler that processes jobs in priority order using several consumer threads.
+    Jobs of the same priority are processed in FIFO order except interactive ones, where newest jobs go first so
+    the last click of the user is always the next one to be served.
+    Some consumers can be reserved for info fetches, and other ones for interactive syncs, so long syncs never
+    starve interactive requests.
+    """
+
+    def __init__(self, consumers=2, reserved_consumers=1, reserved_sync_consumers=0, completed_callback=None,
+                 failed_callback=None):
+        self._consumers = max(1, int(consumers or 1))
+        self._reserved_consumers = max(0, min(int(reserved_consumers or 0), self._consumers - 1))
+        self._reserved_sync_consumers = max(
+            0, min(int(reserved_sync_consumers or 0), self._consumers - 1 - self._reserved_consumers))
+        self._completed_callback = completed_callback
+        self._failed_callback = failed_callback
+        self._heap = list()
+        self._entries = dict()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = list()
+        self._stopped = True
+
+    @property
+    def consumers(self):
+        return self._consumers
+
+    def start(self):
+        """
+        Starts scheduler consumer threads
+        """
+
+        with self._condition:
+            self._stopped = False
+            self._spawn_consumers()
+
+    def stop(self):
+        """
+        Stops the scheduler. Pending jobs are cancelled and running ones are allowed to finish
+        """
+
+        with self._condition:
+            self._stopped = True
+            for job in list(self._entries.values()):
+                job.cancel()
+            self._heap = list()
+            self._entries.clear()
+            self._condition.notify_all()
+
+    def set_consumers(self, consumers):
+        """
+        Updates the number of consumer threads of the scheduler
+        :param consumers: int
+        """
+
+        with self._condition:
+            self._consumers = max(1, int(consumers or 1))
+            self._reserved_consumers = min(self._reserved_consumers, self._consumers - 1)
+            self._reserved_sync_consumers = min(
+                self._reserved_sync_consumers, self._consumers - 1 - self._reserved_consumers)
+            self._condition.notify_all()
+            if not self._stopped:
+                self._spawn_consumers()
+
+    def queue_work(self, fn, data=None, priority=JobPriority.INTERACTIVE, group=None, supersede=False,
+                   callback=None):
+        """
+        Queues a new job into the scheduler
+        :param fn: fn, function to execute. If data is given, it is passed as the only argument
+        :param data: object
+        :param priority: JobPriority
+        :param group: str or None, identifier used to cancel or reorder related jobs
+        :param supersede: bool, whether pending jobs of the same group should be cancelled
+        :param callback: fn(Job) or None, called from consumer thread once the job is processed. Jobs with their
+            own callback are not notified through scheduler completed/failed callbacks
+        :return: str, unique identifier of the queued job
+        """
+
+        job = Job(fn, data=data, priority=priority, group=group, callback=callback)
+        with self._condition:
+            if supersede and group is not None:
+                self._cancel_group(group)
+            self._push(job)
+            self._condition.notify_all()
+
+        return job.uid
+
+    def get_job(self, uid):
+        """
+        Returns pending job with given unique identifier
+        :param uid: str
+        :return: Job or None
+        """
+
+        with self._condition:
+            return self._entries.get(uid)
+
+    def cancel(self, uid):
+        """
+        Cancels pending job with given unique identifier
+        :param uid: str
+        :return: bool
+        """
+
+        with self._condition:
+            job = self._entries.pop(uid, None)
+            if not job:
+                return False
+            job.cancel()
+
+        return True
+
+    def cancel_group(self, group):
+        """
+        Cancels all pending jobs of the given group
+        :param group: str
+        :return: int, number of cancelled jobs
+        """
+
+        with self._condition:
+            return self._cancel_group(group)
+
+    def reprioritize(self, uid, priority):
+        """
+        Moves a pending job into a new priority class and puts it in front of the jobs of that class
+        :param uid: str
+        :param priority: JobPriority
+        :return: bool
+        """
+
+        with self._condition:
+            job = self._entries.get(uid)
+            if not job:
+                return False
+            job._priority = priority
+            self._push(job, front=True)
+            self._condition.notify_all()
+
+        return True
+
+    def pending_count(self, priority=None):
+        """
+        Returns the number of pending jobs
+        :param priority: JobPriority or None, if given only jobs of that priority are counted
+        :return: int
+        """
+
+        with self._condition:
+            if priority is None:
+                return len(self._entries)
+            return len([job for job in self._entries.values() if job.priority == priority])
+
+    def _push(self, job, front=False):
+        """
+        Internal function that pushes a job into the heap
+        Must be called with the scheduler condition acquired
+        """
+
+        count = next(self._counter)
+        order = -count if (front or job.priority == JobPriority.INTERACTIVE) else count
+        job._heap_count = count
+        self._entries[job.uid] = job
+        heapq.heappush(self._heap, (job.priority, order, count, job))
+
+    def _cancel_group(self, group):
+        """
+        Internal function that cancels all pending jobs of the given group
+        Must be called with the scheduler condition acquired
+        """
+
+        cancelled = [uid for uid, job in self._entries.items() if job.group == group]
+        for uid in cancelled:
+            self._entries.pop(uid).cancel()
+
+        return len(cancelled)
+
+    def _get_max_priority(self, index):
+        """
+        Internal function that returns the lowest priority class that the given consumer can process
+        Must be called with the scheduler condition acquired
+        :param index: int, index of the consumer
+        :return: JobPriority
+        """
+
+        if index < self._reserved_consumers:
+            return JobPriority.PREFETCH
+        if index < self._reserved_consumers + self._reserved_sync_consumers:
+            return JobPriority.INTERACTIVE_SYNC
+
+        return JobPriority.BULK
+
+    def _pop(self, max_priority):
+        """
+        Internal function that returns the next job to process or None if no suitable job is available
+        Must be called with the scheduler condition acquired
+        :param max_priority: JobPriority, lowest priority class that can be returned
+        """
+
+        while self._heap:
+            priority, _, count, job = self._heap[0]
+            if self._entries.get(job.uid) is not job or job._heap_count != count:
+                heapq.heappop(self._heap)
+                continue
+            if priority > max_priority:
+                return None
+            heapq.heappop(self._heap)
+            self._entries.pop(job.uid)
+            return job
+
+        return None
+
+    def _spawn_consumers(self):
+        """
+        Internal function that creates missing consumer threads
+        Must be called with the scheduler condition acquired
+        """
+
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        used_indices = set(thread.consumer_index for thread in self._threads)
+        for index in range(self._consumers):
+            if index in used_indices:
+                continue
+            thread = threading.Thread(
+                target=self._consumer_loop, args=(index,), name='AssetsManagerScheduler{}'.format(index))
+            thread.consumer_index = index
+            thread.daemon = True
+            self._threads.append(thread)
+            thread.start()
+
+    def _consumer_loop(self, index):
+        """
+        Internal function executed by each one of the consumer threads
+        :param index: int, index of the consumer. First consumers are reserved for info fetches and interactive syncs
+        """
+
+        while True:
+            with self._condition:
+                job = None
+                while not self._stopped and index < self._consumers:
+                    job = self._pop(self._get_max_priority(index))
+                    if job:
+                        break
+                    self._condition.wait()
+                if not job:
+                    return
+
+            job.run()
+            if job.is_cancelled() or job.has_callback():
+                continue
+            if job.error is None:
+                if self._completed_callback:
+                    self._completed_callback(job.uid, job.result)
+            elif self._failed_callback:
+                self._failed_callback(job.uid, job.error, job.trace)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the on disk snapshot of the last known list of project assets and shots
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import logging
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+SNAPSHOT_FILE_NAME = 'assets_snapshot.json'
+SHOTS_SNAPSHOT_FILE_NAME = 'shots_snapshot.json'
+SNAPSHOT_VERSION = 1
+
+
+def get_asset_entry(asset):
+    """
+    Returns serializable entry that stores the data needed to recreate the given asset
+    :param asset: ArtellaAsset
+    :return: dict
+    """
+
+    return {
+        'id': utils.get_asset_id(asset),
+        'name': asset.get_name(),
+        'type': assetstate.get_asset_type(asset),
+        'data': asset.data
+    }
+
+
+def get_shot_entry(shot):
+    """
+    Returns serializable entry that stores the data needed to recreate the given shot
+    :param shot: ArtellaShot
+    :return: dict
+    """
+
+    return {
+        'id': utils.get_asset_id(shot),
+        'name': shot.get_name(),
+        'data': shot.data
+    }
+
+
+def get_entries_map(items, entry_fn=None):
+    """
+    Returns the snapshot entries of the given items and a dictionary that maps the id of each entry to its item.
+    Both are built in the same pass, so items that cannot be serialized are left out of both
+    :param items: list(ArtellaAsset) or list(ArtellaShot)
+    :param entry_fn: fn or None, function that returns the entry of each item. By default, get_asset_entry
+    :return: tuple(list(dict), dict)
+    """
+
+    entry_fn = entry_fn or get_asset_entry
+    entries = list()
+    items_map = dict()
+    for item in items or list():
+        try:
+            entry = entry_fn(item)
+        except Exception as exc:
+            LOGGER.debug('Item {} cannot be stored in snapshot: {}'.format(item, exc))
+            continue
+        entries.append(entry)
+        items_map[entry['id']] = item
+
+    return entries, items_map
+
+
+def get_assets_entries(assets, entry_fn=None):
+    """
+    Returns the snapshot entries of the given assets. Assets that cannot be serialized are skipped
+    :param assets: list(ArtellaAsset)
+    :param entry_fn: fn or None, function that returns the entry of each item. By default, get_asset_entry
+    :return: list(dict)
+    """
+
+    return get_entries_map(assets, entry_fn=entry_fn)[0]
+
+
+def get_shots_entries(shots):
+    """
+    Returns the snapshot entries of the given shots. Shots that cannot be serialized are skipped
+    :param shots: list(ArtellaShot)
+    :return: list(dict)
+    """
+
+    return get_assets_entries(shots, entry_fn=get_shot_entry)
+
+
+def create_asset_from_entry(entry):
+    """
+    Creates an asset object from an snapshot entry
+    :param entry: dict
+    :return: ArtellaAsset or None
+    """
+
+    import artellapipe
+
+    try:
+        return artellapipe.AssetsMgr().create_asset(asset_data=entry['data'], category=entry.get('type'))
+    except Exception as exc:
+        LOGGER.warning('Impossible to create asset "{}" from snapshot: {}'.format(entry.get('name'), exc))
+        return None
+
+
+def create_shot_from_entry(entry):
+    """
+    Creates a shot object from an snapshot entry
+    :param entry: dict
+    :return: ArtellaShot or None
+    """
+
+    import artellapipe
+
+    try:
+        return artellapipe.ShotsMgr().create_shot(shot_data=entry['data'])
+    except Exception as exc:
+        LOGGER.warning('Impossible to create shot "{}" from snapshot: {}'.format(entry.get('name'), exc))
+        return None
+
+
+def diff_entries(old_entries, new_entries):
+    """
+    Compares two lists of snapshot entries
+    :param old_entries: list(dict)
+    :param new_entries: list(dict)
+    :return: tuple(list(str), list(str), list(str)), ids of added, removed and changed entries
+    """
+
+    old_map = dict((entry['id'], entry) for entry in old_entries)
+    new_map = dict((entry['id'], entry) for entry in new_entries)
+
+    added = [entry_id for entry_id in new_map if entry_id not in old_map]
+    removed = [entry_id for entry_id in old_map if entry_id not in new_map]
+    changed = [entry_id for entry_id, entry in new_map.items() if entry_id in old_map and old_map[entry_id] != entry]
+
+    return added, removed, changed
+
+
+class AssetsSnapshot(object):
+    """
+    Stores in disk the last known list of project assets, so the assets viewer can be populated immediately when
+    the tool is opened while the real list of assets is retrieved in background. It is also used to store the last
+    known list of shots, so both lists are available when Artella is not
+    """
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+
+    @classmethod
+    def for_project(cls, project, file_name=SNAPSHOT_FILE_NAME):
+        """
+        Returns the assets snapshot of the given project
+        :param project: ArtellaProject
+        :param file_name: str, name of the snapshot file
+        :return: AssetsSnapshot
+        """
+
+        return cls(utils.get_data_path(project, file_name))
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    def load(self):
+        """
+        Returns the entries stored in the snapshot
+        :return: list(dict) or None, None if no valid snapshot exists
+        """
+
+        data = utils.read_json(self._file_path)
+        if not data or data.get('version') != SNAPSHOT_VERSION:
+            return None
+
+        return data.get('assets', list())
+
+    def save(self, entries):
+        """
+        Stores given entries in the snapshot
+        :param entries: list(dict)
+        :return: bool
+        """
+
+        data = {'version': SNAPSHOT_VERSION, 'time': time.time(), 'assets': list(entries)}
+        try:
+            utils.write_json(self._file_path, data)
+        except Exception as exc:
+            LOGGER.warning('Impossible to save assets snapshot "{}": {}'.format(self._file_path, exc))
+            return False
+
+        return True
@@ -0,0 +1,662 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the bulk synchronization engine used by Assets Manager
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import logging
+import threading
+import traceback
+from functools import partial
+from collections import deque
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate, scheduler, registry
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class SyncJob(object):
+    """
+    Class that defines a single synchronization operation over an asset
+    If a sync manifest is given, only the files that changed in the server since last sync are transferred
+    If a sync journal is given, synced files are recorded in it and files already recorded are not synced again
+    If a sync throttle is given, file transfers wait until throttle limits allow them
+    If a resilient caller is given, transfers that fail with transient errors are retried
+    """
+
+    def __init__(self, asset, file_type=None, sync_type=None, manifest=None, journal=None, throttle=None,
+                 caller=None):
+        self._asset = asset
+        self._file_type = file_type
+        self._sync_type = sync_type
+        self._manifest = manifest
+        self._journal = journal
+        self._throttle = throttle
+        self._caller = caller
+        self._is_cancelled = None
+        self._merged_with = None
+        self._synced_file_types = list()
+        self._server_states = dict()
+        self._server_states_read = False
+        self._skipped = False
+        self._elapsed = 0.0
+
+    def __repr__(self):
+        return 'SyncJob({}, file_type={}, sync_type={})'.format(self.asset_id, self._file_type, self._sync_type)
+
+    @property
+    def asset(self):
+        return self._asset
+
+    @property
+    def file_type(self):
+        return self._file_type
+
+    @property
+    def sync_type(self):
+        return self._sync_type
+
+    @property
+    def asset_id(self):
+        return utils.get_asset_id(self._asset)
+
+    @property
+    def key(self):
+        """
+        Returns a hashable key that identifies the operation done by this job
+        :return: tuple(str, str, str, bool)
+        """
+
+        return self.asset_id, self._file_type, self._sync_type, self._manifest is not None
+
+    @property
+    def synced_file_types(self):
+        return list(self._synced_file_types)
+
+    @property
+    def server_states(self):
+        """
+        Returns server state of the files checked by the job, if known
+        :return: dict(str, dict)
+        """
+
+        return dict(self._server_states)
+
+    @property
+    def skipped(self):
+        """
+        Returns whether the job did not transfer anything because all files were already up to date
+        :return: bool
+        """
+
+        return self._skipped
+
+    @property
+    def merged_with(self):
+        """
+        Returns the job that did the sync of this one, if it was merged with an equivalent running job
+        :return: SyncJob or None
+        """
+
+        return self._merged_with
+
+    @property
+    def elapsed(self):
+        """
+        Returns the time, in seconds, the job took to run
+        :return: float
+        """
+
+        return self._elapsed
+
+    @property
+    def transferred_bytes(self):
+        """
+        Returns the number of bytes transferred by the job, if file sizes are known
+        :return: int
+        """
+
+        return sum(
+            self._server_states.get(file_type, dict()).get(assetstate.SIZE_KEY) or 0
+            for file_type in self._synced_file_types)
+
+    def run(self, is_cancelled=None):
+        """
+        Executes the synchronization of the asset
+        :param is_cancelled: fn() -> bool or None, checked while the job waits for the sync throttle
+        :return: list(str), list of synced file types
+        """
+
+        self._is_cancelled = is_cancelled
+        start_time = time.time()
+        try:
+            return self._run()
+        finally:
+            self._elapsed = time.time() - start_time
+            self._is_cancelled = None
+
+    def _run(self):
+        """
+        Internal function that executes the synchronization of the asset
+        :return: list(str)
+        """
+
+        self._synced_file_types = list()
+        self._server_states = dict()
+        self._server_states_read = False
+        self._skipped = False
+
+        asset_id = self.asset_id
+        if self._journal and self._journal.is_done(asset_id):
+            self._skipped = True
+            return self.synced_file_types
+
+        if not self._manifest:
+            self._sync_file(self._file_type)
+            self._record_done()
+            return self.synced_file_types
+
+        file_types = [self._file_type] if self._file_type else assetstate.get_asset_file_types(self._asset)
+        if not file_types:
+            self._sync_file(None)
+            self._record_done()
+            return self.synced_file_types
+
+        self._server_states = assetstate.get_server_files_state(self._asset, file_types, caller=self._caller)
+        self._server_states_read = True
+        outdated_file_types = [
+            file_type for file_type in file_types if not self._is_up_to_date(file_type) and not (
+                self._journal and self._journal.is_done(asset_id, file_type))]
+
+        if self._file_type:
+            for file_type in outdated_file_types:
+                self._sync_file(file_type)
+                self._update_manifest(file_type)
+                if self._journal:
+                    self._journal.record(asset_id, file_type)
+        elif outdated_file_types:
+            # Whole asset is synced with a single call, as done by non incremental syncs, so files that do not
+            # belong to any file type are synced too. Only assets whose files are all up to date are skipped.
+            # All file types are transferred, as counted by sync plans
+            self._sync_file(None, covered_file_types=file_types)
+            for file_type in file_types:
+                self._update_manifest(file_type)
+
+        self._skipped = not self._synced_file_types
+        self._record_done()
+
+        return self.synced_file_types
+
+    def merge(self, job, error=None):
+        """
+        Takes the result of an equivalent job that was running when this one was started
+        :param job: SyncJob
+        :param error: str or None, error of the given job
+        """
+
+        self._merged_with = job
+        self._synced_file_types = job.synced_file_types
+        self._server_states = job.server_states
+        self._skipped = job.skipped
+        if not error:
+            self._record_done()
+
+    def _record_done(self):
+        """
+        Internal function that records in the sync journal, if any, that the asset was synced
+        """
+
+        if self._journal:
+            self._journal.record(self.asset_id)
+
+    def _is_up_to_date(self, file_type):
+        """
+        Internal function that returns whether the given file type was already synced with its current server state
+        and its local file still exists
+        :param file_type: str
+        :return: bool
+        """
+
+        server_state = self._server_states.get(file_type)
+
+        return self._manifest.is_up_to_date(
+            self.asset_id, file_type, server_state, sync_type=self._sync_type,
+            local_path=assetstate.get_local_file_path(self._asset, file_type, server_state=server_state))
+
+    def _update_manifest(self, file_type):
+        """
+        Internal function that stores in the sync manifest the server state of the given synced file type, if known
+        :param file_type: str
+        """
+
+        server_state = self._server_states.get(file_type)
+        if server_state:
+            self._manifest.update(self.asset_id, file_type, server_state, sync_type=self._sync_type)
+
+    def _sync_file(self, file_type, covered_file_types=None):
+        """
+        Internal function that syncs given asset file type
+        :param file_type: str or None, if None, all asset files are synced
+        :param covered_file_types: list(str) or None, file types that need to be transferred when the whole asset is
+            synced. They are used to know the size of the transfer and are recorded as synced file types
+        """
+
+        sync_kwargs = dict()
+        if file_type is not None:
+            sync_kwargs['file_type'] = file_type
+        if self._sync_type is not None:
+            sync_kwargs['sync_type'] = self._sync_type
+
+        file_types = covered_file_types if covered_file_types is not None else [file_type]
+        if not self._throttle:
+            self._call_sync(sync_kwargs)
+        else:
+            with self._throttle.transfer(self._get_transfer_size(file_types), is_cancelled=self._is_cancelled):
+                self._call_sync(sync_kwargs)
+        self._synced_file_types.extend(file_types)
+
+    def _call_sync(self, sync_kwargs):
+        """
+        Internal function that calls asset sync, through the resilient caller if any
+        :param sync_kwargs: dict
+        """
+
+        if not self._caller:
+            self._asset.sync(**sync_kwargs)
+        else:
+            self._caller.call(self._asset.sync, kwargs=sync_kwargs, is_cancelled=self._is_cancelled)
+
+    def _get_transfer_size(self, file_types):
+        """
+        Internal function that returns the bytes charged to the sync throttle by the transfer of the given asset file
+        types. Server state already read by the job is reused; server is only queried if the job did not read it yet
+        and the sync throttle limits bandwidth. Files of unknown size are charged with the throttle default size
+        :param file_types: list(str or None)
+        :return: int or None, None if the transferred files are not known
+        """
+
+        file_types = [file_type for file_type in file_types if file_type]
+        if not file_types or not self._throttle.is_bandwidth_limited():
+            return None
+
+        if not self._server_states_read:
+            self._server_states.update(
+                assetstate.get_server_files_state(self._asset, file_types, caller=self._caller))
+            self._server_states_read = True
+
+        return self._throttle.get_transfer_size(
+            [self._server_states.get(file_type, dict()).get(assetstate.SIZE_KEY) for file_type in file_types])
+
+
+class SyncBatch(object):
+    """
+    Class that keeps track of the state of a group of sync jobs launched together
+    """
+
+    def __init__(self, jobs, progress_callback=None, finished_callback=None, manifest=None, journal=None):
+        self._jobs = list(jobs)
+        self._progress_callback = progress_callback
+        self._finished_callback = finished_callback
+        self._manifest = manifest
+        self._journal = journal
+        self._completed = list()
+        self._skipped = list()
+        self._failed = list()
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._done_event = threading.Event()
+
+    @property
+    def jobs(self):
+        return self._jobs
+
+    @property
+    def total(self):
+        return len(self._jobs)
+
+    @property
+    def completed(self):
+        return list(self._completed)
+
+    @property
+    def journal(self):
+        return self._journal
+
+    @property
+    def skipped(self):
+        return list(self._skipped)
+
+    @property
+    def failed(self):
+        return list(self._failed)
+
+    @property
+    def processed(self):
+        return len(self._completed) + len(self._failed)
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def is_done(self):
+        return self._done_event.is_set()
+
+    def cancel(self):
+        """
+        Cancels the batch. Jobs that are already running will finish but pending ones will be skipped
+        """
+
+        self._cancelled = True
+
+    def wait(self, timeout=None):
+        """
+        Blocks until all the jobs of the batch are processed
+        :param timeout: float or None
+        :return: bool, True if the batch finished; False otherwise
+        """
+
+        return self._done_event.wait(timeout)
+
+    def _job_done(self, job, error=None):
+        """
+        Internal function that is called by the engine each time a job of the batch is processed
+        :param job: SyncJob
+        :param error: str or None
+        """
+
+        with self._lock:
+            if error is None:
+                self._completed.append(job)
+                if job.skipped:
+                    self._skipped.append(job)
+            else:
+                self._failed.append((job, error))
+            processed = self.processed
+
+        if self._progress_callback:
+            try:
+                self._progress_callback(self, job, error)
+            except Exception as exc:
+                LOGGER.error('Error while reporting sync progress: {}'.format(exc))
+
+        return processed
+
+    def _finish(self):
+        """
+        Internal function that is called by the engine once all jobs of the batch are processed
+        """
+
+        if self._done_event.is_set():
+            return
+
+        if self._manifest:
+            self._manifest.save()
+
+        # Journal is kept if the batch did not finish properly, so the sync can be resumed later
+        if self._journal and not self._failed and not self._cancelled:
+            self._journal.complete()
+
+        self._done_event.set()
+        if self._finished_callback:
+            try:
+                self._finished_callback(self)
+            except Exception as exc:
+                LOGGER.error('Error while reporting sync finish: {}'.format(exc))
+
+
+class SyncEngine(object):
+    """
+    Runs asset synchronization jobs in parallel on top of a job scheduler.
+    Only max_workers sync jobs are handed to the scheduler at a time, so when the scheduler is shared with other
+    tools, interactive jobs are never queued behind the whole bulk sync.
+    Interactive syncs are not limited by max_workers and are queued immediately with their own priority.
+    Jobs started while an equivalent job is running are merged with it through the sync registry.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, job_scheduler=None, throttle=None, sync_registry=None,
+                 caller=None):
+        self._max_workers = max(1, int(max_workers or 1))
+        self._throttle = throttle
+        self._caller = caller
+        self._registry = sync_registry if sync_registry is not None else registry.SyncRegistry()
+        self._owns_scheduler = job_scheduler is None
+        if self._owns_scheduler:
+            job_scheduler = scheduler.JobScheduler(consumers=self._max_workers, reserved_consumers=0)
+            job_scheduler.start()
+        self._scheduler = job_scheduler
+        self._pending = deque()
+        self._queued = dict()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._stopped = False
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    @property
+    def throttle(self):
+        return self._throttle
+
+    @property
+    def registry(self):
+        return self._registry
+
+    def set_max_workers(self, max_workers):
+        """
+        Updates the maximum number of jobs that can run at the same time
+        :param max_workers: int
+        """
+
+        with self._lock:
+            self._max_workers = max(1, int(max_workers or 1))
+        if self._owns_scheduler:
+            self._scheduler.set_consumers(self._max_workers)
+
+        self._feed()
+
+    def sync(self, jobs, progress_callback=None, finished_callback=None, manifest=None, journal=None,
+             priority=None):
+        """
+        Queues the given jobs and returns immediately. Jobs are executed in background threads
+        :param jobs: list(SyncJob)
+        :param progress_callback: fn(SyncBatch, SyncJob, str or None), called from worker threads
+        :param finished_callback: fn(SyncBatch), called from worker threads
+        :param manifest: SyncManifest or None, manifest updated by the jobs. It is saved once the batch finishes
+        :param journal: SyncJournal or None, journal updated by the jobs. It is removed once all jobs succeed
+        :param priority: JobPriority or None, jobs with a priority higher than bulk are queued immediately; others
+            wait for a free worker
+        :return: SyncBatch
+        """
+
+        batch = SyncBatch(
+            jobs, progress_callback=progress_callback, finished_callback=finished_callback, manifest=manifest,
+            journal=journal)
+        if not batch.total:
+            batch._finish()
+            return batch
+
+        if priority is not None and priority < scheduler.JobPriority.BULK:
+            for job in batch.jobs:
+                self._queue_job((batch, job), priority, self._on_interactive_job_processed)
+            return batch
+
+        with self._lock:
+            self._stopped = False
+            for job in batch.jobs:
+                self._pending.append((batch, job))
+
+        self._feed()
+
+        return batch
+
+    def sync_assets(self, assets, file_type=None, sync_type=None, manifest=None, journal=None, throttle=None,
+                    **kwargs):
+        """
+        Helper function that creates the jobs to sync the given assets
+        :param assets: list(ArtellaAsset)
+        :param file_type: str or None
+        :param sync_type: str or None
+        :param manifest: SyncManifest or None, if given, only files changed in server are synced
+        :param journal: SyncJournal or None, if given, the sync is journaled so it can be resumed if interrupted.
+            If the journal stores an interrupted sync of the same assets, work already done is skipped
+        :param throttle: SyncThrottle or None, throttle used by the jobs. If None, engine throttle is used
+        :return: SyncBatch
+        """
+
+        assets = list(assets)
+        if journal is not None:
+            journal.begin(
+                [utils.get_asset_id(asset) for asset in assets], file_type=file_type, sync_type=sync_type)
+
+        throttle = throttle or self._throttle
+        jobs = [SyncJob(
+            asset, file_type=file_type, sync_type=sync_type, manifest=manifest, journal=journal, throttle=throttle,
+            caller=self._caller) for asset in assets]
+
+        return self.sync(jobs, manifest=manifest, journal=journal, **kwargs)
+
+    def shutdown(self):
+        """
+        Stops the engine. Pending jobs, including the ones already handed to the scheduler that did not start yet,
+        are dropped and running ones are allowed to finish
+        """
+
+        with self._lock:
+            self._stopped = True
+            dropped = list(self._pending)
+            self._pending.clear()
+            queued = list(self._queued.items())
+
+        for uid, batch_job in queued:
+            if self._scheduler.cancel(uid):
+                with self._lock:
+                    self._queued.pop(uid, None)
+                dropped.append(batch_job)
+
+        for batch, job in dropped:
+            batch.cancel()
+            if batch._job_done(job, 'Sync engine was shutdown') >= batch.total:
+                batch._finish()
+
+        if self._owns_scheduler:
+            self._scheduler.stop()
+
+    def _feed(self):
+        """
+        Internal function that hands pending jobs to the scheduler while there are free workers
+        """
+
+        to_submit = list()
+        with self._lock:
+            while not self._stopped and self._pending and self._active < self._max_workers:
+                to_submit.append(self._pending.popleft())
+                self._active += 1
+
+        for batch_job in to_submit:
+            self._queue_job(batch_job, scheduler.JobPriority.BULK, self._on_job_processed)
+
+    def _queue_job(self, batch_job, priority, callback):
+        """
+        Internal function that hands a job to the scheduler, keeping track of it until it is processed
+        :param batch_job: tuple(SyncBatch, SyncJob)
+        :param priority: JobPriority
+        :param callback: fn(Job)
+        """
+
+        with self._lock:
+            uid = self._scheduler.queue_work(self._run_job, batch_job, priority=priority, callback=callback)
+            self._queued[uid] = batch_job
+
+    def _run_job(self, batch_job):
+        """
+        Internal function that executes a single job and notifies its batch
+        :param batch_job: tuple(SyncBatch, SyncJob)
+        """
+
+        batch, job = batch_job
+
+        if batch.is_cancelled():
+            self._complete_job(batch, job, 'Cancelled')
+            return
+
+        if not self._registry.begin(job.key, partial(self._on_merged_job_done, batch, job)):
+            return
+
+        error = None
+        try:
+            job.run(is_cancelled=batch.is_cancelled)
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            LOGGER.error('Error while synchronizing {}: {}'.format(job, error))
+            LOGGER.debug(traceback.format_exc())
+        finally:
+            self._registry.finish(job.key, job, error, batch.is_cancelled())
+
+        self._complete_job(batch, job, error)
+
+    def _complete_job(self, batch, job, error=None):
+        """
+        Internal function that notifies a batch that one of its jobs was processed
+        :param batch: SyncBatch
+        :param job: SyncJob
+        :param error: str or None
+        """
+
+        processed = batch._job_done(job, error)
+        if processed >= batch.total:
+            batch._finish()
+
+    def _on_merged_job_done(self, batch, job, running_job, error, running_cancelled):
+        """
+        Internal callback function that is called when the running job a job was merged with finishes
+        :param batch: SyncBatch
+        :param job: SyncJob
+        :param running_job: SyncJob
+        :param error: str or None
+        :param running_cancelled: bool, whether the batch of the running job was cancelled
+        """
+
+        # Cancelling a sync must not cancel the requests merged with it, so in that case the job is run again
+        if error and running_cancelled and not batch.is_cancelled():
+            self._run_job((batch, job))
+            return
+
+        job.merge(running_job, error)
+        self._complete_job(batch, job, error)
+
+    def _on_job_processed(self, scheduler_job):
+        """
+        Internal callback function that is called by the scheduler each time a sync job is processed
+        :param scheduler_job: Job
+        """
+
+        with self._lock:
+            self._active -= 1
+            self._queued.pop(scheduler_job.uid, None)
+
+        self._feed()
+
+    def _on_interactive_job_processed(self, scheduler_job):
+        """
+        Internal callback function that is called by the scheduler each time an interactive sync job is processed.
+        Batch is already notified by the job itself, this callback only prevents scheduler global callbacks
+        :param scheduler_job: Job
+        """
+
+        with self._lock:
+            self._queued.pop(scheduler_job.uid, None)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the bandwidth and concurrency limiters used to throttle sync traffic
+
+Artella syncs are opaque calls that do not report their progress, so bandwidth is not limited while bytes are
+transferred. Instead, the full byte count of a transfer is charged to the bandwidth limit before its asset.sync()
+call starts, and following transfers wait until the charged bytes are paid. The average rate stays within the
+limit, but a single transfer can still run at full speed. Transfers whose size is not known are charged with a flat
+default size (10 MB by default), so, for them, the limit is only approximate.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+# Time waited between cancellation checks while throttled
+WAIT_STEP = 0.25
+
+MEGABYTE = 1024 * 1024
+
+# Bytes charged to the bandwidth limit by transfers whose size is not known
+DEFAULT_TRANSFER_SIZE = 10 * MEGABYTE
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+
+class ThrottleCancelledError(Exception):
+    """
+    Raised when a throttled operation is cancelled while waiting
+    """
+
+    pass
+
+
+class TokenBucket(object):
+    """
+    Token bucket rate limiter. Tokens (bytes) are refilled at a constant rate up to the bucket capacity.
+    Requests bigger than the available tokens are allowed but leave the bucket in debt, so following requests
+    wait until the debt is paid and the average rate never exceeds the limit.
+    """
+
+    def __init__(self, rate=0, capacity=None, clock=None, sleep=None):
+        self._clock = clock or time.time
+        self._sleep = sleep or time.sleep
+        self._lock = threading.Lock()
+        self._rate = 0
+        self._capacity = 0
+        self._tokens = 0
+        self._last_time = self._clock()
+        self.set_rate(rate, capacity)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def set_rate(self, rate, capacity=None):
+        """
+        Updates the rate of the bucket
+        :param rate: float, tokens per second. 0 means no limit
+        :param capacity: float or None, maximum tokens stored. If None, one second of tokens is used
+        """
+
+        with self._lock:
+            self._refill()
+            self._rate = max(0, rate or 0)
+            self._capacity = capacity if capacity is not None else self._rate
+            self._tokens = min(self._tokens, self._capacity)
+
+    def reserve(self, amount):
+        """
+        Takes the given amount of tokens from the bucket
+        :param amount: float
+        :return: float, seconds the caller must wait before using the tokens
+        """
+
+        with self._lock:
+            if not self._rate or not amount:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def consume(self, amount, is_cancelled=None):
+        """
+        Takes the given amount of tokens from the bucket, blocking until they are available
+        :param amount: float
+        :param is_cancelled: fn() -> bool or None, checked while waiting
+        """
+
+        wait_time = self.reserve(amount)
+        end_time = self._clock() + wait_time
+        while wait_time > 0:
+            if is_cancelled and is_cancelled():
+                raise ThrottleCancelledError('Throttled operation was cancelled')
+            self._sleep(min(wait_time, WAIT_STEP))
+            wait_time = end_time - self._clock()
+
+    def _refill(self):
+        """
+        Internal function that adds the tokens generated since last refill
+        Must be called with the bucket lock acquired
+        """
+
+        now = self._clock()
+        elapsed = max(0, now - self._last_time)
+        self._last_time = now
+        if self._rate:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+
+
+class ConcurrencyLimiter(object):
+    """
+    Limits the number of operations that are running at the same time. The limit can be changed at any time
+    """
+
+    def __init__(self, max_in_flight=0):
+        self._condition = threading.Condition()
+        self._max_in_flight = max(0, max_in_flight or 0)
+        self._in_flight = 0
+
+    @property
+    def max_in_flight(self):
+        return self._max_in_flight
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def set_max_in_flight(self, max_in_flight):
+        """
+        Updates the maximum number of operations that can run at the same time
+        :param max_in_flight: int, 0 means no limit
+        """
+
+        with self._condition:
+            self._max_in_flight = max(0, max_in_flight or 0)
+            self._condition.notify_all()
+
+    def acquire(self, is_cancelled=None):
+        """
+        Blocks until a new operation can run
+        :param is_cancelled: fn() -> bool or None, checked while waiting
+        """
+
+        with self._condition:
+            while self._max_in_flight and self._in_flight >= self._max_in_flight:
+                if is_cancelled and is_cancelled():
+                    raise ThrottleCancelledError('Throttled operation was cancelled')
+                self._condition.wait(WAIT_STEP)
+            self._in_flight += 1
+
+    def release(self):
+        """
+        Notifies that an operation finished
+        """
+
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._condition.notify()
+
+
+class SyncThrottle(object):
+    """
+    Combines a bandwidth limit and a maximum number of in flight transfers. A single throttle should be shared by
+    all the sync operations of the same kind (interactive or background) so limits apply to all of them.
+    Transfers whose size is not known are charged with the default transfer size, so the bandwidth limit also applies
+    to projects whose metadata does not store file sizes
+    """
+
+    def __init__(self, bytes_per_second=0, max_in_flight=0, default_transfer_size=DEFAULT_TRANSFER_SIZE, clock=None,
+                 sleep=None):
+        self._bucket = TokenBucket(bytes_per_second, clock=clock, sleep=sleep)
+        self._limiter = ConcurrencyLimiter(max_in_flight)
+        self._default_transfer_size = max(0, default_transfer_size or 0)
+        self._unknown_size_warned = False
+
+    @property
+    def bytes_per_second(self):
+        return self._bucket.rate
+
+    @property
+    def max_in_flight(self):
+        return self._limiter.max_in_flight
+
+    @property
+    def default_transfer_size(self):
+        return self._default_transfer_size
+
+    def is_bandwidth_limited(self):
+        return bool(self._bucket.rate)
+
+    def set_limits(self, bytes_per_second=None, max_in_flight=None, default_transfer_size=None):
+        """
+        Updates throttle limits
+        :param bytes_per_second: float or None, 0 means no limit. If None, current limit is kept
+        :param max_in_flight: int or None, 0 means no limit. If None, current limit is kept
+        :param default_transfer_size: int or None, bytes charged by transfers of unknown size. If None, current size
+            is kept
+        """
+
+        if bytes_per_second is not None:
+            self._bucket.set_rate(bytes_per_second)
+        if max_in_flight is not None:
+            self._limiter.set_max_in_flight(max_in_flight)
+        if default_transfer_size is not None:
+            self._default_transfer_size = max(0, default_transfer_size)
+
+    def get_transfer_size(self, sizes):
+        """
+        Returns the bytes charged to the bandwidth limit by a transfer of files with the given sizes
+        :param sizes: list(int or None), size of each file. Files of unknown size (None) are charged with the default
+            transfer size
+        :return: int or None, None if no file is transferred
+        """
+
+        if not sizes:
+            return None
+
+        return sum(size if size is not None else self._default_transfer_size for size in sizes)
+
+    @contextmanager
+    def transfer(self, size=None, is_cancelled=None):
+        """
+        Context manager that wraps a transfer. It waits for a free transfer slot and for enough bandwidth to
+        transfer the given number of bytes
+        :param size: int or None, bytes to transfer. If unknown, default transfer size is charged
+        :param is_cancelled: fn() -> bool or None, checked while waiting
+        """
+
+        if size is None:
+            size = self._default_transfer_size
+            if not size and self.is_bandwidth_limited() and not self._unknown_size_warned:
+                self._unknown_size_warned = True
+                LOGGER.warning(
+                    'Size of synced files is not known and no default transfer size is set. '
+                    'Bandwidth limit cannot be applied to them.')
+
+        self._limiter.acquire(is_cancelled=is_cancelled)
+        try:
+            if size:
+                self._bucket.consume(size, is_cancelled=is_cancelled)
+            yield
+        finally:
+            self._limiter.release()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the disk cache of downscaled thumbnails
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import logging
+import threading
+
+from artellapipe.tools.assetsmanager.core import utils, verify
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+THUMBNAILS_FOLDER_NAME = 'thumbnails'
+THUMBNAIL_FORMAT = 'png'
+
+
+def get_thumbnail_path(item):
+    """
+    Returns the path of the thumbnail image of the given asset or shot
+    :param item: ArtellaAsset or ArtellaShot
+    :return: str or None
+    """
+
+    path_getter = getattr(item, 'get_thumbnail_path', None)
+    if not path_getter:
+        return None
+
+    try:
+        thumbnail_path = path_getter()
+    except Exception as exc:
+        LOGGER.debug('Impossible to retrieve thumbnail path of {}: {}'.format(item, exc))
+        return None
+
+    return thumbnail_path if thumbnail_path and os.path.isfile(thumbnail_path) else None
+
+
+class ThumbnailDiskCache(object):
+    """
+    Stores downscaled thumbnails in disk. Thumbnails are keyed by the hash of the contents of the source image and
+    the size they were downscaled to, so a thumbnail is generated again only when its source image changes.
+    Source images are only hashed again if their modification time or size change.
+    """
+
+    def __init__(self, cache_dir):
+        self._cache_dir = cache_dir
+        self._hashes = dict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_project(cls, project):
+        """
+        Returns the thumbnails disk cache of the given project
+        :param project: ArtellaProject
+        :return: ThumbnailDiskCache
+        """
+
+        return cls(utils.get_data_path(project, THUMBNAILS_FOLDER_NAME))
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def get_key(self, source_path, width, height):
+        """
+        Returns the cache key of the thumbnail of the given image downscaled to the given size
+        :param source_path: str
+        :param width: int
+        :param height: int
+        :return: str or None, None if the source image cannot be read
+        """
+
+        content_hash = self._get_content_hash(source_path)
+        if not content_hash:
+            return None
+
+        return '{}_{}x{}'.format(content_hash, int(width), int(height))
+
+    def get_path(self, key):
+        """
+        Returns the path where the thumbnail with the given key is stored
+        :param key: str
+        :return: str
+        """
+
+        return os.path.join(self._cache_dir, key[:2], '{}.{}'.format(key, THUMBNAIL_FORMAT))
+
+    def get(self, key):
+        """
+        Returns the path of the cached thumbnail with the given key
+        :param key: str
+        :return: str or None, None if the thumbnail is not cached
+        """
+
+        thumbnail_path = self.get_path(key)
+
+        return thumbnail_path if os.path.isfile(thumbnail_path) else None
+
+    def prepare_path(self, key):
+        """
+        Creates the folder where the thumbnail with the given key is stored and returns the thumbnail path
+        :param key: str
+        :return: str
+        """
+
+        thumbnail_path = self.get_path(key)
+        thumbnail_dir = os.path.dirname(thumbnail_path)
+        if not os.path.isdir(thumbnail_dir):
+            try:
+                os.makedirs(thumbnail_dir)
+            except OSError:
+                # Folder can be created by other thread at the same time
+                if not os.path.isdir(thumbnail_dir):
+                    raise
+
+        return thumbnail_path
+
+    def _get_content_hash(self, source_path):
+        """
+        Internal function that returns the hash of the contents of the given file
+        :param source_path: str
+        :return: str or None
+        """
+
+        try:
+            file_stat = os.stat(source_path)
+        except OSError:
+            return None
+
+        file_signature = (file_stat.st_mtime, file_stat.st_size)
+        with self._lock:
+            cached_hash = self._hashes.get(source_path)
+        if cached_hash and cached_hash[0] == file_signature:
+            return cached_hash[1]
+
+        _, content_hash, error = verify.hash_file(source_path)
+        if error:
+            LOGGER.debug('Impossible to hash thumbnail "{}": {}'.format(source_path, error))
+            return None
+        with self._lock:
+            self._hashes[source_path] = (file_signature, content_hash)
+
+        return content_hash
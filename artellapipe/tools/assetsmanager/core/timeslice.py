@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the queue used to process items in small time slices, so the UI is not blocked
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import logging
+from collections import deque
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+# Seconds each slice can take. One frame at 60 FPS
+DEFAULT_SLICE_BUDGET = 0.016
+
+# Seconds the first slice can take, so the first screenful of items is shown at once
+DEFAULT_FIRST_SLICE_BUDGET = 0.2
+
+
+class TimeSlicedQueue(object):
+    """
+    Queue of items that are processed in slices. Each slice processes items until its time budget is spent, and at
+    least one item, so the caller can give control back to the event loop between slices.
+    """
+
+    def __init__(self, process_fn, slice_budget=DEFAULT_SLICE_BUDGET, first_slice_budget=DEFAULT_FIRST_SLICE_BUDGET,
+                 clock=None):
+        self._process_fn = process_fn
+        self._slice_budget = slice_budget
+        self._first_slice_budget = first_slice_budget
+        self._clock = clock or time.time
+        self._pending = deque()
+        self._processed = 0
+        self._total = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def processed(self):
+        return self._processed
+
+    @property
+    def total(self):
+        return self._total
+
+    def is_done(self):
+        return not self._pending
+
+    def extend(self, items):
+        """
+        Adds items to process. If the queue was empty, progress counters start again
+        :param items: list
+        """
+
+        items = list(items)
+        if not items:
+            return
+
+        if not self._pending:
+            self._processed = 0
+            self._total = 0
+        self._pending.extend(items)
+        self._total += len(items)
+
+    def process_slice(self):
+        """
+        Processes items until the time budget of the slice is spent
+        :return: bool, True if there are items pending to process; False otherwise
+        """
+
+        budget = self._first_slice_budget if not self._processed else self._slice_budget
+        start_time = self._clock()
+        while self._pending:
+            self._process(self._pending.popleft())
+            if self._clock() - start_time >= budget:
+                break
+
+        return bool(self._pending)
+
+    def flush(self):
+        """
+        Processes all the pending items at once
+        """
+
+        while self._pending:
+            self._process(self._pending.popleft())
+
+    def clear(self):
+        """
+        Removes all pending items without processing them
+        """
+
+        self._pending.clear()
+        self._processed = 0
+        self._total = 0
+
+    def _process(self, item):
+        """
+        Internal function that processes an item. Errors are logged so they do not stop the processing of the queue
+        :param item: object
+        """
+
+        self._processed += 1
+        try:
+            self._process_fn(item)
+        except Exception as exc:
+            LOGGER.error('Error while processing item {}: {}'.format(item, exc))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains cancellable tokens used to track in-flight requests
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import uuid
+import threading
+
+
+class RequestToken(object):
+    """
+    Identifies a request. Once a token is cancelled, the result of its request must be discarded
+    """
+
+    def __init__(self, channel=None):
+        self._uid = str(uuid.uuid4())
+        self._channel = channel
+        self._cancelled = False
+
+    def __repr__(self):
+        return 'RequestToken({}, channel={}, cancelled={})'.format(self._uid, self._channel, self._cancelled)
+
+    @property
+    def uid(self):
+        return self._uid
+
+    @property
+    def channel(self):
+        return self._channel
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+
+class RequestTracker(object):
+    """
+    Keeps track of the latest request issued in each channel. Issuing a new request in a channel cancels the
+    previous one, so only the result of the latest request of each channel is considered valid
+    """
+
+    def __init__(self):
+        self._current = dict()
+        self._lock = threading.Lock()
+
+    def issue(self, channel):
+        """
+        Creates a new request token for the given channel, cancelling the previous one
+        :param channel: str
+        :return: RequestToken
+        """
+
+        token = RequestToken(channel)
+        with self._lock:
+            previous_token = self._current.get(channel)
+            self._current[channel] = token
+        if previous_token:
+            previous_token.cancel()
+
+        return token
+
+    def current(self, channel):
+        """
+        Returns the latest token issued in the given channel
+        :param channel: str
+        :return: RequestToken or None
+        """
+
+        with self._lock:
+            return self._current.get(channel)
+
+    def is_current(self, token_or_uid, channel=None):
+        """
+        Returns whether the given token is the latest not cancelled token of its channel
+        :param token_or_uid: RequestToken or str
+        :param channel: str or None, required if a token uid is given
+        :return: bool
+        """
+
+        if isinstance(token_or_uid, RequestToken):
+            channel = token_or_uid.channel
+            uid = token_or_uid.uid
+        else:
+            uid = token_or_uid
+
+        current_token = self.current(channel)
+
+        return bool(current_token and current_token.uid == uid and not current_token.is_cancelled())
+
+    def cancel(self, channel):
+        """
+        Cancels the in-flight request of the given channel
+        :param channel: str
+        """
+
+        with self._lock:
+            token = self._current.pop(channel, None)
+        if token:
+            token.cancel()
+
+    def finish(self, token):
+        """
+        Marks the request of the given token as finished
+        :param token: RequestToken
+        """
+
+        with self._lock:
+            if self._current.get(token.channel) is token:
+                self._current.pop(token.channel)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains utility functions used by Assets Manager
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import json
+import time
+import logging
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+DATA_FOLDER_NAME = 'assetsmanager'
+
+
+def get_project_name(project):
+    """
+    Returns name used to store project related data in disk
+    :param project: ArtellaProject or str or None
+    :return: str
+    """
+
+    if not project:
+        return 'default'
+    if not hasattr(project, 'get_clean_name'):
+        return str(project)
+
+    return project.get_clean_name()
+
+
+def get_data_path(project, *paths):
+    """
+    Returns path where Assets Manager stores local data of the given project
+    :param project: ArtellaProject or str or None
+    :param paths: list(str), paths to join to the data path
+    :return: str
+    """
+
+    data_path = os.path.join(
+        os.path.expanduser('~'), 'artellapipe', get_project_name(project), DATA_FOLDER_NAME, *paths)
+
+    return os.path.normpath(data_path)
+
+
+def get_asset_id(asset):
+    """
+    Returns unique identifier of the given asset
+    :param asset: ArtellaAsset
+    :return: str
+    """
+
+    get_id = getattr(asset, 'get_id', None)
+    asset_id = get_id() if get_id else None
+    if not asset_id:
+        get_name = getattr(asset, 'get_name', None)
+        asset_id = get_name() if get_name else str(asset)
+
+    return asset_id
+
+
+def read_json(file_path, default=None):
+    """
+    Reads given JSON file
+    :param file_path: str
+    :param default: object, returned if the file does not exist or is not valid
+    :return: object
+    """
+
+    if not file_path or not os.path.isfile(file_path):
+        return default
+
+    try:
+        with open(file_path, 'r') as fh:
+            return json.load(fh)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+def write_json(file_path, data):
+    """
+    Writes given data into a JSON file. The file is written atomically so readers never get a partial file
+    :param file_path: str
+    :param data: object
+    """
+
+    file_dir = os.path.dirname(file_path)
+    if not os.path.isdir(file_dir):
+        try:
+            os.makedirs(file_dir)
+        except OSError:
+            if not os.path.isdir(file_dir):
+                raise
+
+    fd, temp_path = tempfile.mkstemp(dir=file_dir, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(data, fh)
+        if os.path.isfile(file_path) and os.name == 'nt' and not hasattr(os, 'replace'):
+            os.remove(file_path)
+        getattr(os, 'replace', os.rename)(temp_path, file_path)
+    except Exception:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def lock_file(file_to_lock):
+    """
+    Locks given file without blocking. The lock is released by the OS if the process dies
+    :param file_to_lock: file
+    :return: bool, True if the file was locked; False if it is locked by other process
+    """
+
+    try:
+        if fcntl:
+            fcntl.flock(file_to_lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt:
+            file_to_lock.seek(0)
+            msvcrt.locking(file_to_lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except (IOError, OSError):
+        return False
+
+    return True
+
+
+def unlock_file(file_to_unlock):
+    """
+    Unlocks given file
+    :param file_to_unlock: file
+    """
+
+    try:
+        if fcntl:
+            fcntl.flock(file_to_unlock.fileno(), fcntl.LOCK_UN)
+        elif msvcrt:
+            file_to_unlock.seek(0)
+            msvcrt.locking(file_to_unlock.fileno(), msvcrt.LK_UNLCK, 1)
+    except (IOError, OSError) as exc:
+        LOGGER.warning('Impossible to unlock file "{}": {}'.format(file_to_unlock.name, exc))
+
+
+@contextmanager
+def locked_path(lock_path, timeout=10.0, wait_step=0.05):
+    """
+    Context manager that holds an OS lock on the given lock file, so several sessions can read, merge and write the
+    same data file without overwriting each other changes
+    :param lock_path: str
+    :param timeout: float, seconds to wait for the lock
+    :param wait_step: float, seconds waited between lock attempts
+    :return: bool, True if the lock was acquired; False if it was not acquired before the timeout
+    """
+
+    lock_dir = os.path.dirname(lock_path)
+    if lock_dir and not os.path.isdir(lock_dir):
+        try:
+            os.makedirs(lock_dir)
+        except OSError:
+            if not os.path.isdir(lock_dir):
+                raise
+
+    with open(lock_path, 'a') as fh:
+        end_time = time.time() + timeout
+        locked = lock_file(fh)
+        while not locked and time.time() < end_time:
+            time.sleep(wait_step)
+            locked = lock_file(fh)
+        try:
+            yield locked
+        finally:
+            if locked:
+                unlock_file(fh)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the verification of synced asset files against server checksums
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import os
+import sys
+import mmap
+import hashlib
+import logging
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+CHECKSUM_ALGORITHM = 'md5'
+CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# Verification status of each file
+VALID_STATUS = 'valid'
+CORRUPTED_STATUS = 'corrupted'
+MISSING_STATUS = 'missing'
+UNREADABLE_STATUS = 'unreadable'
+UNKNOWN_STATUS = 'unknown'
+
+
+def hash_file(file_path, algorithm=CHECKSUM_ALGORITHM, chunk_size=CHUNK_SIZE, mmap_threshold=MMAP_THRESHOLD):
+    """
+    Returns the checksum of the given file. Files are read in chunks, so memory usage does not depend on file size.
+    Big files are memory mapped and hashed through a memoryview, so their contents are never copied into Python
+    buffers.
+    This function is executed in worker processes so it must be defined at module level.
+    :param file_path: str
+    :param algorithm: str, name of the hashlib algorithm
+    :param chunk_size: int
+    :param mmap_threshold: int, files bigger than this size (in bytes) are memory mapped. 0 disables memory mapping
+    :return: tuple(str, str or None, str or None), file path, checksum and error
+    """
+
+    try:
+        file_hash = hashlib.new(algorithm)
+        file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as fh:
+            if mmap_threshold and file_size >= mmap_threshold:
+                mapped_file = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    mapped_view = memoryview(mapped_file)
+                    try:
+                        for offset in range(0, file_size, chunk_size):
+                            file_hash.update(mapped_view[offset:offset + chunk_size])
+                    finally:
+                        mapped_view.release()
+                finally:
+                    mapped_file.close()
+            else:
+                chunk = fh.read(chunk_size)
+                while chunk:
+                    file_hash.update(chunk)
+                    chunk = fh.read(chunk_size)
+    except (IOError, OSError, ValueError) as exc:
+        return file_path, None, str(exc)
+
+    return file_path, file_hash.hexdigest(), None
+
+
+def _hash_file_args(args):
+    """
+    Internal function used to call hash_file with a tuple of arguments from a pool
+    :param args: tuple(str, str)
+    :return: tuple(str, str or None, str or None)
+    """
+
+    return hash_file(*args)
+
+
+def is_python_interpreter():
+    """
+    Returns whether current session runs in a Python interpreter (python, mayapy, hython, ...) and not in an
+    application that embeds Python, such as a DCC
+    :return: bool
+    """
+
+    executable_name = os.path.splitext(os.path.basename(sys.executable or ''))[0].lower()
+
+    return executable_name.startswith(('python', 'mayapy', 'hython'))
+
+
+class FileToVerify(object):
+    """
+    Class that defines a local asset file and the checksum it should have
+    """
+
+    def __init__(self, asset_id, file_type, file_path, checksum=None):
+        self.asset_id = asset_id
+        self.file_type = file_type
+        self.file_path = file_path
+        self.checksum = checksum
+        self.status = None
+        self.local_checksum = None
+        self.error = None
+
+    def __repr__(self):
+        return 'FileToVerify({}, {}, status={})'.format(self.asset_id, self.file_type, self.status)
+
+    def to_dict(self):
+        return {
+            'asset': self.asset_id,
+            'file_type': self.file_type,
+            'path': self.file_path,
+            'status': self.status,
+            'error': self.error
+        }
+
+
+def get_files_to_verify(assets, file_type=None, synced_files=None, caller=None):
+    """
+    Returns the local files of the given assets with the checksums stored in server
+    :param assets: list(ArtellaAsset)
+    :param file_type: str or None, if given, only files of that type are returned
+    :param synced_files: dict(str, list(str)) or None, synced file types of each asset id, as stored in the assets
+        index. If given, only files that are recorded as synced or exist in disk are returned, so files synced
+        outside the tool are verified and files that were never synced are not reported as missing
+    :param caller: ResilientCaller or None, if given, server checksums are requested through it
+    :return: list(FileToVerify)
+    """
+
+    files_to_verify = list()
+    for asset in assets:
+        asset_id = utils.get_asset_id(asset)
+        file_types = [file_type] if file_type else assetstate.get_asset_file_types(asset)
+        if synced_files is not None:
+            recorded_file_types = synced_files.get(asset_id, list())
+            file_types = [
+                asset_file_type for asset_file_type in file_types
+                if asset_file_type in recorded_file_types or _is_local_file(asset, asset_file_type)]
+            if not file_types:
+                continue
+        files_state = assetstate.get_server_files_state(asset, file_types, caller=caller)
+        for asset_file_type in file_types:
+            server_state = files_state.get(asset_file_type, dict())
+            file_path = assetstate.get_local_file_path(asset, asset_file_type, server_state)
+            if not file_path:
+                continue
+            files_to_verify.append(FileToVerify(
+                asset_id, asset_file_type, file_path, checksum=server_state.get(assetstate.CHECKSUM_KEY)))
+
+    return files_to_verify
+
+
+def verify_files(files_to_verify, max_workers=None, use_processes=True, progress_callback=None,
+                 algorithm=CHECKSUM_ALGORITHM):
+    """
+    Hashes the given files in parallel and compares the result with server checksums
+    Files that exist but cannot be read (for example, because of their permissions) get the unreadable status and are
+    not flagged to be synced again, because syncing them would fail too
+    :param files_to_verify: list(FileToVerify)
+    :param max_workers: int or None, number of parallel workers. If None, number of CPU cores is used
+    :param use_processes: bool, whether to hash files in a process pool. It only has effect in standalone Python
+        sessions: when Python is embedded in a DCC (Maya, Houdini, ...) or processes cannot be spawned, files are always
+        hashed in threads (hashlib releases the GIL while hashing big buffers, so threads still run in parallel)
+    :param progress_callback: fn(FileToVerify) or None, called each time a file is verified
+    :param algorithm: str, hashlib algorithm used by the server checksums
+    :return: list(FileToVerify), verified files with their status updated
+    """
+
+    files_by_path = dict()
+    for file_to_verify in files_to_verify:
+        if not os.path.isfile(file_to_verify.file_path):
+            file_to_verify.status = MISSING_STATUS
+            _notify(progress_callback, file_to_verify)
+        elif not file_to_verify.checksum:
+            file_to_verify.status = UNKNOWN_STATUS
+            _notify(progress_callback, file_to_verify)
+        else:
+            files_by_path.setdefault(file_to_verify.file_path, list()).append(file_to_verify)
+
+    to_hash = [(file_path, algorithm) for file_path in files_by_path]
+    if not to_hash:
+        return list(files_to_verify)
+
+    # Imported here so multiprocessing is only loaded when files are verified
+    import multiprocessing
+
+    max_workers = max(1, min(max_workers or multiprocessing.cpu_count(), len(to_hash)))
+    pool = _create_pool(max_workers, use_processes)
+    try:
+        for file_path, local_checksum, error in pool.imap_unordered(_hash_file_args, to_hash):
+            for file_to_verify in files_by_path[file_path]:
+                file_to_verify.local_checksum = local_checksum
+                file_to_verify.error = error
+                if error:
+                    file_to_verify.status = UNREADABLE_STATUS if os.path.isfile(file_path) else MISSING_STATUS
+                elif local_checksum.lower() == str(file_to_verify.checksum).lower():
+                    file_to_verify.status = VALID_STATUS
+                else:
+                    file_to_verify.status = CORRUPTED_STATUS
+                _notify(progress_callback, file_to_verify)
+    finally:
+        pool.close()
+        pool.join()
+
+    return list(files_to_verify)
+
+
+def get_files_to_resync(verified_files):
+    """
+    Returns the files that must be synced again
+    :param verified_files: list(FileToVerify)
+    :return: list(FileToVerify)
+    """
+
+    return [
+        verified_file for verified_file in verified_files
+        if verified_file.status in (CORRUPTED_STATUS, MISSING_STATUS)]
+
+
+def get_verify_message(verified_files, title=None):
+    """
+    Returns the message that reports the result of a verification that found no file to sync again.
+    Files without server checksum are never compared, so they are reported as not verified instead of valid
+    :param verified_files: list(FileToVerify)
+    :param title: str or None, name of the verified assets
+    :return: tuple(bool, str), whether all the files were verified and are valid and the message to show
+    """
+
+    title = title or 'assets'
+    summary = get_verify_summary(verified_files)
+    issues = list()
+    if summary[UNREADABLE_STATUS]:
+        issues.append('{} synced files of {} cannot be read'.format(summary[UNREADABLE_STATUS], title))
+    if summary[UNKNOWN_STATUS]:
+        issues.append('{} files could not be verified because their checksum is not available'.format(
+            summary[UNKNOWN_STATUS]))
+    if issues:
+        return False, '{}. Check log for more info.'.format('. '.join(issues))
+    if not summary[VALID_STATUS]:
+        return False, 'No synced files of {} found to verify.'.format(title)
+
+    return True, 'All synced files of {} are valid!'.format(title)
+
+
+def flag_for_resync(verified_files, sync_manifest=None, asset_index=None):
+    """
+    Invalidates the sync state of corrupted and missing files, so next sync transfers them again
+    :param verified_files: list(FileToVerify)
+    :param sync_manifest: SyncManifest or None
+    :param asset_index: AssetStateIndex or None
+    :return: list(FileToVerify), files flagged for sync
+    """
+
+    files_to_resync = get_files_to_resync(verified_files)
+    for file_to_resync in files_to_resync:
+        if sync_manifest is not None:
+            sync_manifest.invalidate(file_to_resync.asset_id, file_to_resync.file_type)
+        if asset_index is not None:
+            asset_index.invalidate_file(file_to_resync.asset_id, file_to_resync.file_type)
+    if sync_manifest is not None and files_to_resync:
+        sync_manifest.save()
+
+    return files_to_resync
+
+
+def get_verify_summary(verified_files):
+    """
+    Returns the number of verified files of each status
+    :param verified_files: list(FileToVerify)
+    :return: dict(str, int)
+    """
+
+    summary = dict((status, 0) for status in (
+        VALID_STATUS, CORRUPTED_STATUS, MISSING_STATUS, UNREADABLE_STATUS, UNKNOWN_STATUS))
+    for verified_file in verified_files:
+        summary[verified_file.status] = summary.get(verified_file.status, 0) + 1
+
+    return summary
+
+
+def _create_pool(max_workers, use_processes):
+    """
+    Internal function that creates the pool used to hash files
+    Processes are always spawned, never forked: verification runs in worker threads, and forking a process with
+    several threads can deadlock the child. Spawning processes from a DCC would require changing the interpreter
+    used by multiprocessing for the whole session, so in that case threads are used instead
+    :param max_workers: int
+    :param use_processes: bool
+    :return: multiprocessing.Pool or ThreadPool
+    """
+
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+
+    if use_processes:
+        get_context = getattr(multiprocessing, 'get_context', None)
+        if not get_context:
+            LOGGER.info('Spawning verification processes is not supported, using threads instead')
+        elif not is_python_interpreter():
+            LOGGER.info('Python is embedded in other application, using threads to verify files instead')
+        else:
+            try:
+                return get_context('spawn').Pool(max_workers)
+            except Exception as exc:
+                LOGGER.warning('Impossible to launch verification processes, using threads instead: {}'.format(exc))
+
+    return ThreadPool(max_workers)
+
+
+def _is_local_file(asset, file_type):
+    """
+    Internal function that returns whether the local file of the given asset file type exists in disk
+    :param asset: ArtellaAsset
+    :param file_type: str
+    :return: bool
+    """
+
+    file_path = assetstate.get_local_file_path(asset, file_type)
+
+    return bool(file_path) and os.path.isfile(file_path)
+
+
+def _notify(progress_callback, verified_file):
+    """
+    Internal function that calls progress callback, if any
+    :param progress_callback: fn(FileToVerify) or None
+    :param verified_file: FileToVerify
+    """
+
+    if not progress_callback:
+        return
+
+    try:
+        progress_callback(verified_file)
+    except Exception as exc:
+        LOGGER.error('Error while reporting verification progress: {}'.format(exc))
@@ -12,8 +12,10 @@ __license__ = "MIT"
 __maintainer__ = "Tomas Poveda"
 __email__ = "tpovedatd@gmail.com"
 
+import time
 import logging
 from functools import partial
+from collections import OrderedDict
 
 from Qt.QtCore import *
 from Qt.QtWidgets import *
@@ -23,35 +25,145 @@ from tpDcc.libs.qt.core import qtutils, base
 from tpDcc.libs.qt.widgets import dividers, stack, tabs
 
 import artellapipe
-from artellapipe.utils import worker
 from artellapipe.core import defines, tool
-from artellapipe.widgets import waiter, assetswidget
 
-from artellapipe.tools.assetsmanager.widgets import shotswidget
+from artellapipe.tools.assetsmanager.core import utils, scheduler, syncengine, manifest, assetindex, batchfetch
+from artellapipe.tools.assetsmanager.core import metadatacache, snapshot, tokens, prefetch, journal, planner
+from artellapipe.tools.assetsmanager.core import throttle, resilience, assetstate, actionqueue, verify, assetlookup
+from artellapipe.tools.assetsmanager.core import timeslice, thumbnails
+from artellapipe.tools.assetsmanager.widgets import thumbnailloader
 
 LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
 
 
 class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
 
-    ASSET_WIDGET_CLASS = assetswidget.AssetsWidget
-    SHOTS_WIDGET_CLASS = shotswidget.ShotsWidget
-
-    def __init__(self, project, config, settings, parent, auto_start_assets_viewer=True):
-
-        self._artella_worker = worker.Worker(app=QApplication.instance())
-        self._artella_worker.workCompleted.connect(self._on_artella_worker_completed)
-        self._artella_worker.workFailure.connect(self._on_artella_worker_failed)
-        self._artella_worker.start()
-
-        self._is_blocked = False
+    # Widget classes are imported when the tool UI is created, so importing this module does not load them.
+    # If None, default ones are used. For projects with lots of assets, assetsview.AssetsView can be used as
+    # assets widget class: it does not create a widget per asset
+    ASSET_WIDGET_CLASS = None
+    SHOTS_WIDGET_CLASS = None
+    RESERVED_INTERACTIVE_CONSUMERS = 1
+    RESERVED_SYNC_CONSUMERS = 1
+    ASSET_INFO_CHANNEL = 'asset_info'
+    SYNC_PLAN_CHANNEL = 'sync_plan'
+    PREFETCH_DELAY = 150
+
+    # Synchronize menu entries of each project and icons, shared by all the manager instances
+    _sync_menu_entries_cache = dict()
+    _icons_cache = dict()
+
+    # Emitted once the background work of the tool is stopped, so owners of shared resources can release them
+    shutdownFinished = Signal()
+
+    def __init__(self, project, config, settings, parent, auto_start_assets_viewer=True, asset_index=None):
+
+        max_sync_workers = int(self._get_setting(settings, 'sync_max_workers', syncengine.DEFAULT_MAX_WORKERS))
+
+        # Interactive and prefetch jobs always have a reserved consumer so syncs never block them. Syncs requested
+        # by the user have other reserved consumer so they are not queued behind bulk syncs
+        self._scheduler_notifier = JobSchedulerNotifier()
+        self._scheduler_notifier.workCompleted.connect(self._on_artella_worker_completed)
+        self._scheduler_notifier.workFailure.connect(self._on_artella_worker_failed)
+        self._scheduler_notifier.assetsFetched.connect(self._on_project_assets_fetched)
+        self._scheduler_notifier.syncPlanned.connect(self._on_sync_planned)
+        self._scheduler_notifier.artellaAvailabilityChanged.connect(self._on_artella_availability_changed)
+        self._scheduler_notifier.assetsVerified.connect(self._on_assets_verified)
+
+        # Artella calls are retried if they fail with transient errors. If Artella keeps failing, calls fail fast
+        # until the circuit breaker lets a new call probe whether Artella is available again
+        artella_reset_timeout = float(self._get_setting(settings, 'artella_reset_timeout', 30.0))
+        self._artella_caller = resilience.ResilientCaller(
+            retry_policy=resilience.RetryPolicy(
+                max_attempts=int(self._get_setting(settings, 'artella_max_attempts', 3))),
+            circuit_breaker=resilience.CircuitBreaker(
+                failure_threshold=int(self._get_setting(settings, 'artella_failure_threshold', 5)),
+                reset_timeout=artella_reset_timeout, state_callback=self._on_artella_circuit_changed))
+        self._artella_available = True
+        self._revalidating_assets = False
+        self._artella_probe_timer = QTimer()
+        self._artella_probe_timer.setSingleShot(True)
+        self._artella_probe_timer.setInterval(int(artella_reset_timeout * 1000))
+        self._scheduler = scheduler.JobScheduler(
+            consumers=max_sync_workers + self.RESERVED_INTERACTIVE_CONSUMERS + self.RESERVED_SYNC_CONSUMERS,
+            reserved_consumers=self.RESERVED_INTERACTIVE_CONSUMERS,
+            reserved_sync_consumers=self.RESERVED_SYNC_CONSUMERS,
+            completed_callback=self._scheduler_notifier.workCompleted.emit,
+            failed_callback=self._scheduler_notifier.workFailure.emit)
+        self._scheduler.start()
+        self._metadata_fetcher = batchfetch.BatchMetadataFetcher(self._scheduler, fetch_fn=self._fetch_artella_data)
+        self._metadata_cache = metadatacache.MetadataCache(
+            max_size=int(self._get_setting(settings, 'metadata_cache_size', metadatacache.DEFAULT_MAX_SIZE)),
+            ttl=float(self._get_setting(settings, 'metadata_cache_ttl', metadatacache.DEFAULT_TTL)))
+
+        self._prefetcher = prefetch.AssetPrefetcher(self._metadata_fetcher, self._metadata_cache)
+        self._prefetcher.set_enabled(self._get_setting(settings, 'prefetch_enabled', True))
+        self._prefetch_radius = int(self._get_setting(settings, 'prefetch_radius', prefetch.DEFAULT_PREFETCH_RADIUS))
+        self._prefetch_anchor = None
+        self._prefetch_timer = QTimer()
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(self.PREFETCH_DELAY)
+
+        self._requests = tokens.RequestTracker()
         self._asset_to_sync = None
         self._sequence_to_sync = None
 
+        # Interactive syncs (started from an asset) and background syncs (bulk syncs) are throttled separately
+        default_transfer_size = float(self._get_setting(
+            settings, 'default_transfer_size', throttle.DEFAULT_TRANSFER_SIZE / throttle.MEGABYTE)) * throttle.MEGABYTE
+        self._interactive_throttle = throttle.SyncThrottle(
+            bytes_per_second=float(self._get_setting(settings, 'interactive_bandwidth_limit', 0)) * throttle.MEGABYTE,
+            max_in_flight=int(self._get_setting(settings, 'interactive_max_in_flight', 0)),
+            default_transfer_size=default_transfer_size)
+        self._background_throttle = throttle.SyncThrottle(
+            bytes_per_second=float(self._get_setting(settings, 'background_bandwidth_limit', 0)) * throttle.MEGABYTE,
+            max_in_flight=int(self._get_setting(settings, 'background_max_in_flight', 0)),
+            default_transfer_size=default_transfer_size)
+        self._sync_engine = syncengine.SyncEngine(
+            max_workers=max_sync_workers, job_scheduler=self._scheduler, throttle=self._background_throttle,
+            caller=self._artella_caller)
+        self._sync_manifest = manifest.SyncManifest.for_project(project)
+        self._sync_journal = journal.SyncJournal.for_project(project)
+        self._journaled_batch = None
+        self._transfer_stats = planner.TransferStats.for_project(project)
+        self._sync_plan_dialog = None
+        self._incremental_sync = bool(self._get_setting(settings, 'incremental_sync', True))
+        self._owns_asset_index = asset_index is None
+        self._asset_index = asset_index or assetindex.AssetStateIndex.for_project(project)
+        self._assets_to_index = list()
+        self._sync_notifier = SyncProgressNotifier()
+        self._sync_batches = list()
+        self._sync_messages = dict()
+        self._assets_snapshot = snapshot.AssetsSnapshot.for_project(project)
+        self._shots_snapshot = snapshot.AssetsSnapshot.for_project(project, snapshot.SHOTS_SNAPSHOT_FILE_NAME)
+        self._shots_outdated = True
+        self._pending_actions = actionqueue.PendingActionsQueue.for_project(project)
+        self._asset_widgets = OrderedDict()
+        self._assets_lookup = assetlookup.AssetsLookup()
+        try:
+            self._assets_lookup.load_synced_files(self._asset_index.get_synced_files())
+        except Exception as exc:
+            LOGGER.warning('Impossible to read sync state from assets index: {}'.format(exc))
+        self._displayed_entries = list()
+        self._displayed_shot_entries = list()
+        self._progressive_population = bool(self._get_setting(settings, 'progressive_population', True))
+        self._assets_populator = ViewerPopulator(self._add_asset_to_viewer)
+        self._thumbnails_cache = thumbnails.ThumbnailDiskCache.for_project(project)
+        self._thumbnail_loader = None
+        self._shots_populator = ViewerPopulator(self._add_shot_to_viewer)
+        self._is_shutdown = False
+
         super(ArtellaAssetsManager, self).__init__(project=project, config=config, settings=settings, parent=parent)
 
         if auto_start_assets_viewer:
-            self._assets_widget.update_assets()
+            self._start_assets_viewer()
+
+        if self._sync_journal.is_active():
+            QTimer.singleShot(0, self._check_interrupted_sync)
+
+    def closeEvent(self, event):
+        self.shutdown()
+        super(ArtellaAssetsManager, self).closeEvent(event)
 
     def get_main_layout(self):
         main_layout = QVBoxLayout()
@@ -128,6 +240,8 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         no_assets_frame_layout.addWidget(no_assets_found_label)
         no_assets_frame_layout.addItem(QSpacerItem(10, 0, QSizePolicy.Expanding, QSizePolicy.Preferred))
 
+        from artellapipe.widgets import waiter
+
         self._waiter = waiter.ArtellaWaiter()
 
         self._user_info_layout = QVBoxLayout()
@@ -147,8 +261,13 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         self._tab_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self._tab_widget.setMinimumHeight(330)
 
-        self._assets_widget = self.ASSET_WIDGET_CLASS(project=self._project, show_viewer_menu=True)
-        self._shots_widget = self.SHOTS_WIDGET_CLASS(project=self._project)
+        self._assets_widget = self.get_asset_widget_class()(project=self._project, show_viewer_menu=True)
+        if hasattr(self._assets_widget, 'set_thumbnail_loader'):
+            self._thumbnail_loader = thumbnailloader.ThumbnailLoader(
+                self._scheduler, self._thumbnails_cache, size=self._assets_widget.get_thumbnail_size(), parent=self)
+            self._assets_widget.set_thumbnail_loader(self._thumbnail_loader)
+        # Shots widget is created the first time shots tab is opened
+        self._shots_widget = None
         self._settings_widget = AssetsManagerSettingsWidget(settings=self.settings)
 
         assets_widget = QWidget()
@@ -163,7 +282,17 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         shots_layout.setSpacing(0)
         shots_widget.setLayout(shots_layout)
 
+        self._sync_progress = QProgressBar()
+        self._sync_progress.setTextVisible(True)
+        self._sync_progress.setVisible(False)
+
+        self._populate_progress = QProgressBar()
+        self._populate_progress.setTextVisible(True)
+        self._populate_progress.setVisible(False)
+
         self.main_layout.addWidget(self._main_stack)
+        self.main_layout.addWidget(self._populate_progress)
+        self.main_layout.addWidget(self._sync_progress)
 
         self._main_stack.addWidget(no_assets_widget)
         self._main_stack.addWidget(self._tab_widget)
@@ -181,13 +310,12 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         assets_splitter.addWidget(self._assets_widget)
         assets_splitter.addWidget(self._attrs_stack)
 
-        shots_splitter = QSplitter(Qt.Horizontal)
-        shots_splitter.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        shots_splitter.addWidget(self._shots_widget)
-        shots_splitter.addWidget(self._shots_stack)
+        self._shots_splitter = QSplitter(Qt.Horizontal)
+        self._shots_splitter.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self._shots_splitter.addWidget(self._shots_stack)
 
         self._tab_widget.addTab(assets_splitter, 'Assets')
-        self._tab_widget.addTab(shots_splitter, 'Sequences | Shots')
+        self._tab_widget.addTab(self._shots_splitter, 'Sequences | Shots')
 
         if not artellapipe.Tracker().needs_login():
             self._main_stack.slide_in_index(1)
@@ -196,10 +324,29 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         self._project_artella_btn.clicked.connect(self._on_open_project_in_artella)
         self._project_folder_btn.clicked.connect(self._on_open_project_folder)
         self._settings_btn.clicked.connect(self._on_open_settings)
-        self._assets_widget.assetAdded.connect(self._on_asset_added)
+        if getattr(self._assets_widget, 'VIRTUALIZED', False):
+            self._assets_widget.assetsAdded.connect(self._on_assets_added)
+            self._assets_widget.assetClicked.connect(self._on_asset_clicked)
+            self._assets_widget.startSync.connect(self._on_start_asset_sync)
+            self._assets_widget.viewportChanged.connect(self._schedule_prefetch)
+        else:
+            self._assets_widget.assetAdded.connect(self._on_asset_added)
         self._attrs_stack.animFinished.connect(self._on_attrs_stack_anim_finished)
-        self._shots_widget.shotAdded.connect(self._on_shot_added)
+        self._tab_widget.currentChanged.connect(self._on_tab_changed)
         self._settings_widget.closed.connect(self._on_close_settings)
+        self._settings_widget.maxSyncWorkersChanged.connect(self._on_max_sync_workers_changed)
+        self._settings_widget.incrementalSyncChanged.connect(self._on_incremental_sync_changed)
+        self._settings_widget.progressivePopulationChanged.connect(self._on_progressive_population_changed)
+        self._assets_populator.progress.connect(partial(self._on_populate_progress, 'assets'))
+        self._assets_populator.finished.connect(self._on_populate_finished)
+        self._shots_populator.progress.connect(partial(self._on_populate_progress, 'shots'))
+        self._shots_populator.finished.connect(self._on_populate_finished)
+        self._settings_widget.syncThrottleChanged.connect(self._on_sync_throttle_changed)
+        self._settings_widget.prefetchChanged.connect(self._prefetcher.set_enabled)
+        self._prefetch_timer.timeout.connect(self._on_prefetch_timeout)
+        self._artella_probe_timer.timeout.connect(self.revalidate_assets)
+        self._sync_notifier.syncProgress.connect(self._on_sync_progress)
+        self._sync_notifier.syncFinished.connect(self._on_sync_finished)
         artellapipe.Tracker().logged.connect(self._on_valid_login)
         artellapipe.Tracker().unlogged.connect(self._on_valid_unlogin)
 
@@ -232,6 +379,398 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
 
         self._set_sequence_info(sequence_info)
 
+    @property
+    def asset_index(self):
+        return self._asset_index
+
+    @property
+    def metadata_cache(self):
+        return self._metadata_cache
+
+    @property
+    def assets_lookup(self):
+        return self._assets_lookup
+
+    def get_assets(self, asset_type=None, file_type=None, synced=None):
+        """
+        Returns project assets that match the given filters using the assets lookup.
+        Assets are added to the lookup as soon as they are listed, even if the viewer is still being populated.
+        If no assets were listed yet, assets are requested to the assets manager
+        :param asset_type: str or None, if given only assets of that type are returned
+        :param file_type: str or None, if given only assets that have that file type are returned
+        :param synced: bool or None, if given only synced (True) or not synced (False) assets are returned
+        :return: list(ArtellaAsset)
+        """
+
+        if not len(self._assets_lookup):
+            self._assets_lookup.add_assets(artellapipe.AssetsMgr().assets or list())
+
+        return self._assets_lookup.get_assets(asset_type=asset_type, file_type=file_type, synced=synced)
+
+    def get_metadata_cache_stats(self):
+        """
+        Returns hits and misses statistics of the assets metadata cache
+        :return: dict
+        """
+
+        return self._metadata_cache.stats()
+
+    def invalidate_asset_data(self, asset=None):
+        """
+        Removes cached Artella metadata of the given asset, forcing its retrieval next time its info is shown
+        :param asset: ArtellaAsset or None, if None, all cached metadata is removed
+        """
+
+        if asset is None:
+            self._metadata_cache.clear()
+        else:
+            self._metadata_cache.invalidate(utils.get_asset_id(asset))
+
+    def prefetch_assets_data(self, asset_widget=None):
+        """
+        Requests in background the metadata of the assets that are visible in the assets viewer and of the assets
+        that are next to the given one, so their info can be shown without waiting for Artella when clicked
+        :param asset_widget: ArtellaAssetWidget or None, if given, its neighbours are prefetched first
+        """
+
+        asset_ids = list(self._asset_widgets.keys())
+        candidates = list()
+        if asset_widget:
+            candidates.extend(
+                prefetch.get_neighbours(asset_ids, utils.get_asset_id(asset_widget.asset), self._prefetch_radius))
+        get_visible_asset_ids = getattr(self._assets_widget, 'get_visible_asset_ids', None)
+        if get_visible_asset_ids:
+            candidates.extend(asset_id for asset_id in get_visible_asset_ids() if asset_id in self._asset_widgets)
+        else:
+            candidates.extend(
+                asset_id for asset_id, widget in self._asset_widgets.items() if self._is_asset_widget_visible(widget))
+
+        assets_to_prefetch = [self._asset_widgets[asset_id].asset for asset_id in candidates]
+        self._prefetcher.prefetch(assets_to_prefetch)
+
+    def get_asset_state(self, asset):
+        """
+        Returns the last known state of the given asset stored in the assets index
+        :param asset: ArtellaAsset
+        :return: dict or None
+        """
+
+        return self._asset_index.get_asset(utils.get_asset_id(asset))
+
+    @classmethod
+    def get_asset_widget_class(cls):
+        """
+        Returns the class of the widget used to show project assets
+        :return: class
+        """
+
+        if cls.ASSET_WIDGET_CLASS is not None:
+            return cls.ASSET_WIDGET_CLASS
+
+        from artellapipe.widgets import assetswidget
+
+        return assetswidget.AssetsWidget
+
+    @classmethod
+    def get_shots_widget_class(cls):
+        """
+        Returns the class of the widget used to show project shots
+        :return: class
+        """
+
+        if cls.SHOTS_WIDGET_CLASS is not None:
+            return cls.SHOTS_WIDGET_CLASS
+
+        from artellapipe.tools.assetsmanager.widgets import shotswidget
+
+        return shotswidget.ShotsWidget
+
+    def sync_assets(self, assets, file_type=None, sync_type=defines.ArtellaFileStatus.ALL, finished_message=None,
+                    incremental=None, journaled=False, interactive=False):
+        """
+        Synchronizes given assets in background using the bulk sync engine
+        :param assets: list(ArtellaAsset)
+        :param file_type: str or None, file type to sync. If None, all asset files are synced
+        :param sync_type: ArtellaFileStatus, type of sync we want to do
+        :param finished_message: str or None, message to show once all assets are synced
+        :param incremental: bool or None, whether to sync only files that changed in server since last sync.
+            If None, the value defined in tool settings is used
+        :param journaled: bool, whether to record sync progress in disk so the sync can be resumed if interrupted.
+            Only one journaled sync can be running at the same time
+        :param interactive: bool, whether the sync was requested by the user for specific assets. Interactive syncs
+            are not queued behind bulk syncs and are throttled with interactive limits
+        :return: SyncBatch or None, None if Artella is not available and the sync was queued
+        """
+
+        if not self._artella_available:
+            self._queue_sync(assets, file_type=file_type, sync_type=sync_type)
+            return None
+
+        if incremental is None:
+            incremental = self._incremental_sync
+
+        if journaled and self._journaled_batch and not self._journaled_batch.is_done():
+            LOGGER.warning('Other resumable sync is running. This sync will not be resumable if interrupted.')
+            journaled = False
+        if journaled and not self._sync_journal.acquire():
+            LOGGER.warning(
+                'Other session is running a resumable sync. This sync will not be resumable if interrupted.')
+            journaled = False
+
+        batch = self._sync_engine.sync_assets(
+            assets, file_type=file_type, sync_type=sync_type,
+            manifest=self._sync_manifest if incremental else None,
+            journal=self._sync_journal if journaled else None,
+            throttle=self._interactive_throttle if interactive else self._background_throttle,
+            priority=scheduler.JobPriority.INTERACTIVE_SYNC if interactive else scheduler.JobPriority.BULK,
+            progress_callback=self._on_sync_job_processed,
+            finished_callback=self._sync_notifier.notify_finished)
+        if journaled:
+            self._journaled_batch = batch
+        if finished_message:
+            self._sync_messages[batch] = finished_message
+        if not batch.is_done():
+            self._sync_batches.append(batch)
+            self._update_sync_progress()
+
+        return batch
+
+    def verify_assets(self, assets, file_type=None, title=None):
+        """
+        Verifies in background that the synced files of the given assets match server checksums. Files are hashed
+        in parallel using all the CPU cores. Corrupted and missing files are flagged to be synced again
+        :param assets: list(ArtellaAsset)
+        :param file_type: str or None, file type to verify. If None, all asset files are verified
+        :param title: str or None, name of the verified assets shown in result messages
+        """
+
+        self.show_ok_message('Verifying synced files of {} assets ...'.format(len(assets)))
+        self._scheduler.queue_work(
+            partial(self._verify_assets, assets, file_type), priority=scheduler.JobPriority.BULK,
+            callback=lambda job: self._scheduler_notifier.assetsVerified.emit(
+                title or '', job.result, job.error or ''))
+
+    def resume_sync(self):
+        """
+        Resumes the bulk synchronization that was interrupted in a previous session, skipping the assets that were
+        already synced
+        :return: SyncBatch or None
+        """
+
+        if not self._sync_journal.acquire():
+            LOGGER.warning('Interrupted sync is being resumed by other session.')
+            return None
+        if not self._sync_journal.is_active():
+            self._sync_journal.release()
+            return None
+
+        asset_ids = self._sync_journal.asset_ids
+        if not len(self._assets_lookup):
+            self._assets_lookup.add_assets(artellapipe.AssetsMgr().assets or list())
+        assets_to_sync = [self._assets_lookup.get_asset(asset_id) for asset_id in asset_ids]
+        assets_to_sync = [asset for asset in assets_to_sync if asset]
+        if not assets_to_sync:
+            LOGGER.warning('Assets of the interrupted sync are not available anymore. Discarding it ...')
+            self._sync_journal.discard()
+            return None
+        if len(assets_to_sync) != len(asset_ids):
+            # Journal only resumes syncs of the same list of assets, so in this case sync is started again
+            LOGGER.warning('{} assets of the interrupted sync are not available anymore. Restarting sync ...'.format(
+                len(asset_ids) - len(assets_to_sync)))
+
+        return self.sync_assets(
+            assets_to_sync, file_type=self._sync_journal.file_type, sync_type=self._sync_journal.sync_type,
+            finished_message='Interrupted synchronization has been completed!', journaled=True)
+
+    def is_artella_available(self):
+        """
+        Returns whether Artella is considered available. If not, cached data is shown and syncs are queued
+        :return: bool
+        """
+
+        return self._artella_available
+
+    def cancel_sync(self):
+        """
+        Cancels all the bulk synchronizations that are being processed
+        """
+
+        for batch in self._sync_batches:
+            batch.cancel()
+
+    def shutdown(self):
+        """
+        Stops all the background work of the tool. Running syncs are cancelled and pending jobs are dropped, so
+        consumer threads exit once the jobs they are running finish. Journaled syncs keep their journal in disk, so
+        they can be resumed next time the tool is opened
+        """
+
+        if self._is_shutdown:
+            return
+        self._is_shutdown = True
+
+        self._prefetch_timer.stop()
+        self._artella_probe_timer.stop()
+        self._assets_populator.clear()
+        self._shots_populator.clear()
+        self._requests.cancel(self.ASSET_INFO_CHANNEL)
+        self._requests.cancel(self.SYNC_PLAN_CHANNEL)
+
+        self.cancel_sync()
+        self._sync_engine.shutdown()
+        self._scheduler.stop()
+        self._sync_journal.release()
+
+        # Work done by cancelled syncs is stored, so next syncs do not transfer it again
+        self._sync_manifest.save()
+        self._transfer_stats.save()
+        if self._thumbnail_loader:
+            self._thumbnail_loader.clear()
+        if self._owns_asset_index:
+            self._asset_index.close()
+        self.shutdownFinished.emit()
+
+    def update_shots(self):
+        """
+        Updates the shots viewer. If Artella is not available, last known list of shots is shown
+        If shots tab was never opened, shots are updated the first time it is opened
+        """
+
+        if not self._shots_widget:
+            self._shots_outdated = True
+            return
+
+        self._shots_outdated = False
+        if not self._artella_available:
+            entries = self._shots_snapshot.load() or list()
+            shots = [snapshot.create_shot_from_entry(entry) for entry in entries]
+            self._populate_shots([shot for shot in shots if shot])
+            self._displayed_shot_entries = entries
+            return
+
+        if self._progressive_population:
+            shots = artellapipe.ShotsMgr().shots or list()
+            self._populate_shots(shots)
+        else:
+            self._shots_widget.update_shots()
+            shots = artellapipe.ShotsMgr().shots
+        self._displayed_shot_entries = snapshot.get_shots_entries(shots)
+        self._shots_snapshot.save(self._displayed_shot_entries)
+
+    def refresh_shots(self):
+        """
+        Updates the shots viewer adding only the shots that are not displayed yet. Shots viewer cannot remove or
+        update single shots, so it is only rebuilt if displayed shots were removed or changed
+        """
+
+        if not self._shots_widget or not self._artella_available or not self._displayed_shot_entries:
+            self.update_shots()
+            return
+
+        shots = artellapipe.ShotsMgr().shots or list()
+        entries, shots_map = snapshot.get_entries_map(shots, entry_fn=snapshot.get_shot_entry)
+        added, removed, changed = snapshot.diff_entries(self._displayed_shot_entries, entries)
+        if removed or changed:
+            self.update_shots()
+            return
+        if not added:
+            return
+
+        LOGGER.info('Shots updated: {} added'.format(len(added)))
+        shots_to_add = [shots_map[shot_id] for shot_id in added]
+        if self._progressive_population:
+            self._shots_populator.populate(shots_to_add)
+        else:
+            for shot in shots_to_add:
+                self._add_shot_to_viewer(shot)
+        self._displayed_shot_entries = entries
+        self._shots_snapshot.save(entries)
+
+    def update_assets(self):
+        """
+        Rebuilds the assets viewer with the current list of project assets and updates the assets snapshot
+        """
+
+        if not self._artella_available:
+            LOGGER.warning('Artella is not available. Showing last known list of assets.')
+            return
+
+        if self._progressive_population:
+            assets = artellapipe.AssetsMgr().find_all_assets() or list()
+            self._clear_assets_viewer()
+            self._populate_assets(assets)
+        else:
+            self._assets_populator.clear()
+            self._asset_widgets.clear()
+            self._assets_lookup.clear()
+            self._assets_widget.update_assets()
+            assets = artellapipe.AssetsMgr().assets
+        self._displayed_entries = snapshot.get_assets_entries(assets)
+        self._assets_snapshot.save(self._displayed_entries)
+
+    def revalidate_assets(self):
+        """
+        Retrieves the list of project assets in background and applies the differences with the assets that are
+        currently displayed in the assets viewer
+        """
+
+        self._revalidating_assets = True
+        self._scheduler.queue_work(
+            self._fetch_project_assets, priority=scheduler.JobPriority.PREFETCH, group='assets_revalidation',
+            supersede=True, callback=self._on_project_assets_job_finished)
+
+    def refresh_assets(self):
+        """
+        Updates the assets viewer applying only the differences between the current list of project assets and the
+        displayed ones, so unchanged assets keep their widgets, selection and scroll position.
+        If no assets are displayed yet, the assets viewer is fully populated
+        """
+
+        if not self._displayed_entries:
+            self.update_assets()
+            return
+
+        self.revalidate_assets()
+
+    def _verify_assets(self, assets, file_type=None):
+        """
+        Internal function that verifies the synced files of the given assets. It is executed in a consumer thread
+        :param assets: list(ArtellaAsset)
+        :param file_type: str or None
+        :return: list(FileToVerify)
+        """
+
+        # Files recorded as synced in the assets index or found in disk are verified, so files synced by other
+        # sessions or outside the tool are verified too
+        files_to_verify = verify.get_files_to_verify(
+            assets, file_type=file_type, synced_files=self._asset_index.get_synced_files(),
+            caller=self._artella_caller)
+        # Python is embedded in the DCC, so verification falls back to threads instead of using a process pool
+        verified_files = verify.verify_files(files_to_verify)
+        files_to_resync = verify.flag_for_resync(
+            verified_files, sync_manifest=self._sync_manifest, asset_index=self._asset_index)
+        for file_to_resync in files_to_resync:
+            self._assets_lookup.mark_outdated(file_to_resync.asset_id, file_to_resync.file_type)
+
+        return verified_files
+
+    @staticmethod
+    def _get_setting(settings, name, default_value):
+        """
+        Internal function that returns the value of a tool setting
+        :param settings: QtSettings or None
+        :param name: str
+        :param default_value: object, value returned if the setting is not defined
+        :return: object
+        """
+
+        if not settings:
+            return default_value
+
+        value = settings.getw(name, default_value=default_value)
+
+        return default_value if value is None else value
+
     def _setup_menubar(self):
         """
         Internal function used to setup Artella Manager menu bar
@@ -270,44 +809,92 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
 
     def _setup_synchronize_menu(self):
         """
-        Internal function that creates the synchronize menu
+        Internal function that creates the synchronize menu. Menu entries are added the first time it is shown
         """
 
         sync_menu = QMenu(self)
-        sync_icon = tpDcc.ResourcesMgr().icon('sync')
+        sync_menu.aboutToShow.connect(self._on_synchronize_menu_about_to_show)
+        self._synchronize_btn.setMenu(sync_menu)
+
+    @classmethod
+    def _get_icon(cls, icon_name):
+        """
+        Internal function that returns the icon with the given name. Icons are cached across manager instances
+        :param icon_name: str
+        :return: QIcon or None
+        """
+
+        if icon_name not in cls._icons_cache:
+            cls._icons_cache[icon_name] = tpDcc.ResourcesMgr().icon(icon_name)
+
+        return cls._icons_cache[icon_name]
 
+    def _get_synchronize_menu_entries(self):
+        """
+        Internal function that returns the asset types and file types listed in synchronize menu.
+        Entries are cached across manager instances of the same project
+        :return: list(tuple(str, list(tuple(str, bool)))), asset types with their file types and whether each file
+            type has a file template
+        """
+
+        project_name = utils.get_project_name(self._project)
+        if project_name in self._sync_menu_entries_cache:
+            return self._sync_menu_entries_cache[project_name]
+
+        menu_entries = list()
         for asset_type in artellapipe.AssetsMgr().get_asset_types():
-            action_icon = tpDcc.ResourcesMgr().icon(asset_type.lower())
+            asset_file_types = artellapipe.AssetsMgr().get_asset_type_files(asset_type=asset_type) or list()
+            file_type_entries = list()
+            for asset_file_type in asset_file_types:
+                asset_file_template = artellapipe.FilesMgr().get_template(asset_file_type)
+                if not asset_file_template:
+                    LOGGER.warning('No File Template found for File Type: "{}"'.format(asset_file_type))
+                file_type_entries.append((asset_file_type, bool(asset_file_template)))
+            menu_entries.append((asset_type, file_type_entries))
+        self._sync_menu_entries_cache[project_name] = menu_entries
+
+        return menu_entries
+
+    def _populate_synchronize_menu(self, sync_menu):
+        """
+        Internal function that adds the entries of the synchronize menu
+        :param sync_menu: QMenu
+        """
+
+        sync_icon = self._get_icon('sync')
+
+        for asset_type, asset_file_types in self._get_synchronize_menu_entries():
+            action_icon = self._get_icon(asset_type.lower())
             if action_icon:
                 sync_action = QAction(action_icon, asset_type.title(), self)
             else:
                 sync_action = QAction(asset_type.title(), self)
             sync_menu.addAction(sync_action)
-            asset_file_types = artellapipe.AssetsMgr().get_asset_type_files(asset_type=asset_type) or list()
             if asset_file_types:
                 asset_files_menu = QMenu(sync_menu)
                 sync_action.setMenu(asset_files_menu)
-                for asset_file_type in asset_file_types:
-                    asset_type_icon = tpDcc.ResourcesMgr().icon(asset_file_type)
+                for asset_file_type, has_template in asset_file_types:
+                    asset_type_icon = self._get_icon(asset_file_type)
                     asset_file_action = QAction(asset_type_icon, asset_file_type.title(), asset_files_menu)
                     asset_files_menu.addAction(asset_file_action)
-                    asset_file_template = artellapipe.FilesMgr().get_template(asset_file_type)
-                    if not asset_file_template:
-                        LOGGER.warning('No File Template found for File Type: "{}"'.format(asset_file_type))
+                    if not has_template:
                         asset_file_action.setEnabled(False)
                         continue
                     asset_file_action.triggered.connect(partial(self._on_sync_file_type, asset_type, asset_file_type))
                 all_asset_types_action = QAction(sync_icon, 'All', asset_files_menu)
                 all_asset_types_action.triggered.connect(partial(self._on_sync_all_assets_of_type, asset_type))
                 asset_files_menu.addAction(all_asset_types_action)
+                asset_files_menu.addSeparator()
+                verify_action = QAction('Verify', asset_files_menu)
+                verify_action.setToolTip('Checks that synced files are not corrupted and syncs them again if they are')
+                verify_action.triggered.connect(partial(self._on_verify_assets_of_type, asset_type))
+                asset_files_menu.addAction(verify_action)
 
         sync_menu.addSeparator()
         sync_all_action = QAction(sync_icon, 'All', self)
         sync_all_action.triggered.connect(self._on_sync_all_types)
         sync_menu.addAction(sync_all_action)
 
-        self._synchronize_btn.setMenu(sync_menu)
-
     def _setup_asset_signals(self, asset_widget):
         """
         Internal function that sets proper signals to given asset widget
@@ -334,15 +921,111 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
             self._user_info_layout.addWidget(asset_info)
             self._attrs_stack.slide_in_index(2)
 
-    def _get_asset_data_from_artella(self, data):
+    def _request_asset_data(self, asset_widget, token):
+        """
+        Internal function that requests asset data from Artella asynchronously.
+        Requests done in a short period of time are resolved together with a single batched request
+        :param asset_widget: ArtellaAssetWidget
+        :param token: RequestToken, token of the request. If cancelled before data arrives, data is not shown
+        """
+
+        self._metadata_fetcher.request(
+            asset_widget.asset, partial(self._on_asset_data_fetched, asset_widget, token))
+
+    def _fetch_artella_data(self, assets):
+        """
+        Internal function, executed in a scheduler consumer thread, that retrieves Artella metadata of the given assets
+        and stores the remote version of their files in the assets index
+        :param assets: list(ArtellaAsset)
+        :return: dict(str, object), maps each asset id with its Artella data or with the exception raised while
+            fetching it
+        """
+
+        assets_data = assetstate.get_assets_artella_data(assets, caller=self._artella_caller) or dict()
+
+        files_states = dict()
+        for asset in assets:
+            asset_id = utils.get_asset_id(asset)
+            artella_data = assets_data.get(asset_id)
+            if artella_data is None or isinstance(artella_data, Exception):
+                continue
+            try:
+                files_state = assetstate.get_files_state_from_artella_data(
+                    asset, assetstate.get_asset_file_types(asset), artella_data)
+            except Exception as exc:
+                LOGGER.debug('Impossible to read server state of asset "{}" files: {}'.format(asset_id, exc))
+                continue
+            if files_state:
+                files_states[asset_id] = files_state
+        try:
+            self._asset_index.update_remote_versions(files_states)
+        except Exception as exc:
+            LOGGER.warning('Impossible to store remote versions in assets index: {}'.format(exc))
+
+        return assets_data
+
+    def _on_asset_data_fetched(self, asset_widget, token, asset, data, error):
+        """
+        Internal callback function that is called from a scheduler consumer thread when asset data is fetched
+        :param asset_widget: ArtellaAssetWidget
+        :param token: RequestToken
+        :param asset: ArtellaAsset
+        :param data: object
+        :param error: str or None
+        """
+
+        if not error:
+            self._metadata_cache.set(utils.get_asset_id(asset), data)
+
+        # Data of superseded requests is cached but not shown
+        if token.is_cancelled():
+            return
+
+        if error:
+            self._scheduler_notifier.workFailure.emit(token.uid, error, '')
+        else:
+            self._scheduler_notifier.workCompleted.emit(token.uid, asset_widget)
+
+    def _schedule_prefetch(self, asset_widget=None):
         """
-        Internal function that starts worker to get asset data from Artella asynchronously
-        :param data, dict
+        Internal function that prefetches assets metadata after a short delay. Consecutive calls restart the delay,
+        so fast browsing only triggers one prefetch
+        :param asset_widget: ArtellaAssetWidget or None
         """
 
-        data.get('asset_widget').asset.get_artella_data()
+        if not self._prefetcher.enabled:
+            return
 
-        return data['asset_widget']
+        self._prefetch_anchor = asset_widget
+        self._prefetch_timer.start()
+
+    def _is_asset_widget_visible(self, asset_widget):
+        """
+        Internal function that returns whether or not given asset widget is visible in the assets viewer viewport
+        :param asset_widget: ArtellaAssetWidget
+        :return: bool
+        """
+
+        is_asset_visible = getattr(self._assets_widget, 'is_asset_visible', None)
+        if is_asset_visible:
+            return is_asset_visible(utils.get_asset_id(asset_widget.asset))
+
+        try:
+            return asset_widget.isVisible() and not asset_widget.visibleRegion().isEmpty()
+        except RuntimeError:
+            # Underlying C++ widget was already deleted
+            return False
+
+    def _request_pending_asset_data(self):
+        """
+        Internal function that requests the data of the asset waiting to be shown, superseding any in-flight request
+        """
+
+        if not self._asset_to_sync:
+            return
+
+        token = self._requests.issue(self.ASSET_INFO_CHANNEL)
+        self._request_asset_data(self._asset_to_sync, token)
 
     def _show_asset_info(self, asset_widget):
         """
@@ -351,7 +1034,6 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         """
 
         self.show_asset_info(asset_widget)
-        self._is_blocked = False
         self._asset_to_sync = None
         self._attrs_stack.slide_in_index(2)
 
@@ -372,10 +1054,24 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         """
 
         self.show_sequence_info(sequence_widget)
-        self._is_blocked = False
         self._sequence_to_sync = None
         self._shots_stack.slide_in_index(1)
 
+    def _create_shots_widget(self):
+        """
+        Internal function that creates the shots viewer and adds it into the shots tab
+        :return: ShotsWidget
+        """
+
+        if self._shots_widget:
+            return self._shots_widget
+
+        self._shots_widget = self.get_shots_widget_class()(project=self._project)
+        self._shots_widget.shotAdded.connect(self._on_shot_added)
+        self._shots_splitter.insertWidget(0, self._shots_widget)
+
+        return self._shots_widget
+
     def _set_sequence_info(self, sequence_info):
         """
         Sets the sequence info widget currently being showed
@@ -392,19 +1088,429 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
             self._shots_info_layout.addWidget(sequence_info)
             self._shots_stack.slide_in_index(1)
 
+    def _register_asset_widgets(self, asset_widgets):
+        """
+        Internal function that registers the given asset widgets (or virtualized viewer items) and schedules the
+        update of their state in the assets index
+        :param asset_widgets: list(ArtellaAssetWidget or AssetItem)
+        """
+
+        if not asset_widgets:
+            return
+
+        assets = [asset_widget.asset for asset_widget in asset_widgets]
+        for asset_widget in asset_widgets:
+            self._asset_widgets[utils.get_asset_id(asset_widget.asset)] = asset_widget
+        self._assets_lookup.add_assets(assets)
+
+        if not self._assets_to_index:
+            QTimer.singleShot(0, self._index_added_assets)
+        self._assets_to_index.extend(assets)
+
+    def _index_added_assets(self):
+        """
+        Internal function that schedules the storage in the assets index of all the assets added to the viewer since
+        last call. Index writes can wait for other sessions to release the database, so they are done in a bulk job
+        instead of in the UI thread
+        """
+
+        assets_to_index, self._assets_to_index = self._assets_to_index, list()
+        if not assets_to_index or self._is_shutdown:
+            return
+
+        self._scheduler.queue_work(self._update_index, assets_to_index, priority=scheduler.JobPriority.BULK)
+
+    def _update_index(self, assets):
+        """
+        Internal function, executed in a scheduler consumer thread, that stores the given assets in the assets index
+        :param assets: list(ArtellaAsset)
+        """
+
+        try:
+            self._asset_index.update_from_assets(assets)
+        except Exception as exc:
+            LOGGER.warning('Impossible to update assets index: {}'.format(exc))
+
+    def _remove_assets_from_index(self, asset_ids):
+        """
+        Internal function that schedules the removal from the assets index of the assets that do not exist in the
+        project anymore
+        :param asset_ids: list(str)
+        """
+
+        if not asset_ids or self._is_shutdown:
+            return
+
+        self._scheduler.queue_work(self._remove_index_assets, list(asset_ids), priority=scheduler.JobPriority.BULK)
+
+    def _remove_index_assets(self, asset_ids):
+        """
+        Internal function, executed in a scheduler consumer thread, that removes the given assets from the assets index
+        :param asset_ids: list(str)
+        """
+
+        try:
+            self._asset_index.remove_assets(asset_ids)
+        except Exception as exc:
+            LOGGER.warning('Impossible to remove deleted assets from assets index: {}'.format(exc))
+
+    def _get_sync_summary_message(self, assets):
+        """
+        Internal function that returns a message with the last known sync state of the given assets
+        :param assets: list(ArtellaAsset)
+        :return: str
+        """
+
+        try:
+            summary = self._asset_index.get_sync_summary([utils.get_asset_id(asset) for asset in assets])
+        except Exception as exc:
+            LOGGER.warning('Impossible to read sync state from assets index: {}'.format(exc))
+            return ''
+
+        if not summary['synced']:
+            return 'None of these assets were synced before.'
+
+        return '{} of {} assets were synced before. Oldest sync: {}.'.format(
+            summary['synced'], len(assets), time.strftime('%Y-%m-%d %H:%M', time.localtime(summary['oldest_sync'])))
+
+    def _confirm_sync(self, title, message, assets, file_type=None, sync_type=None):
+        """
+        Internal function that asks the user to confirm a sync. While the dialog is shown, the files the sync will
+        transfer are computed in background and the dialog is updated with the total size and estimated time
+        :param title: str
+        :param message: str
+        :param assets: list(ArtellaAsset)
+        :param file_type: str or None
+        :param sync_type: str or None
+        :return: bool
+        """
+
+        sync_summary = self._get_sync_summary_message(assets)
+        base_message = '{}\n\n{}'.format(message, sync_summary) if sync_summary else message
+        if not self._artella_available:
+            result = qtutils.show_question(
+                None, title, '{}\n\nArtella is not available. Sync will start once it is available again.'.format(
+                    base_message))
+            return result == QMessageBox.Yes
+
+        token = self._requests.issue(self.SYNC_PLAN_CHANNEL)
+        plan_fn = partial(
+            planner.plan_sync, assets, file_type=file_type, sync_type=sync_type,
+            sync_manifest=self._sync_manifest if self._incremental_sync else None,
+            transfer_stats=self._transfer_stats, is_cancelled=token.is_cancelled, caller=self._artella_caller,
+            fetch_fn=self._metadata_fetcher.fetch)
+        # Plans can request metadata of many assets, so they do not take the place of clicks of the user
+        self._scheduler.queue_work(
+            plan_fn, priority=scheduler.JobPriority.PREFETCH,
+            callback=lambda job: self._scheduler_notifier.syncPlanned.emit(token.uid, job.result, job.error or ''))
+
+        self._sync_plan_dialog = QMessageBox(
+            QMessageBox.Question, title, '{}\n\nComputing files to transfer ...'.format(base_message),
+            QMessageBox.Yes | QMessageBox.No, self)
+        self._sync_plan_dialog.setProperty('base_message', base_message)
+        try:
+            result = self._sync_plan_dialog.exec_()
+        finally:
+            self._sync_plan_dialog = None
+            self._requests.cancel(self.SYNC_PLAN_CHANNEL)
+
+        return result == QMessageBox.Yes
+
+    def _queue_sync(self, assets, file_type=None, sync_type=None):
+        """
+        Internal function that queues the sync of the given assets until Artella is available again
+        :param assets: list(ArtellaAsset)
+        :param file_type: str or None
+        :param sync_type: str or None
+        """
+
+        self._pending_actions.enqueue_many(actionqueue.SYNC_ACTION, [
+            {'asset': utils.get_asset_id(asset), 'file_type': file_type, 'sync_type': sync_type} for asset in assets])
+
+        self.show_warning_message(
+            'Artella is not available. Sync of {} assets will start once it is available again.'.format(len(assets)))
+
+    def _replay_pending_actions(self, assets):
+        """
+        Internal function that executes the actions that were requested while Artella was not available
+        Actions are removed from the queue once they are executed, so if Artella is not available again they are
+        kept to be replayed later
+        :param assets: list(ArtellaAsset), all project assets, used to find the assets of the pending actions
+        """
+
+        actions = self._pending_actions.get_actions()
+        if not actions:
+            return
+
+        assets_by_id = dict((utils.get_asset_id(asset), asset) for asset in assets)
+        invalid_actions = list()
+        syncs_to_replay = OrderedDict()
+        for action in actions:
+            if action['action'] != actionqueue.SYNC_ACTION:
+                LOGGER.warning('Pending action "{}" is not supported. Skipping ...'.format(action['action']))
+                invalid_actions.append(action)
+                continue
+            params = action['params']
+            asset = assets_by_id.get(params['asset'])
+            if asset is None:
+                LOGGER.warning('Asset "{}" of pending sync is not available anymore. Skipping ...'.format(
+                    params['asset']))
+                invalid_actions.append(action)
+                continue
+            assets_to_sync, sync_actions = syncs_to_replay.setdefault(
+                (params.get('file_type'), params.get('sync_type')), (list(), list()))
+            assets_to_sync.append(asset)
+            sync_actions.append(action)
+        self._pending_actions.remove(invalid_actions)
+
+        for (file_type, sync_type), (assets_to_sync, sync_actions) in syncs_to_replay.items():
+            LOGGER.info('Replaying sync of {} assets requested while Artella was not available'.format(
+                len(assets_to_sync)))
+            batch = self.sync_assets(
+                assets_to_sync, file_type=file_type, sync_type=sync_type,
+                finished_message='Syncs requested while Artella was not available have been completed!')
+            if batch is not None:
+                self._pending_actions.remove(sync_actions)
+
+    def _start_assets_viewer(self):
+        """
+        Internal function that populates the assets viewer. If an assets snapshot from a previous session exists,
+        the viewer is populated immediately with it and the list of assets is revalidated in background
+        """
+
+        entries = self._assets_snapshot.load()
+        if not entries:
+            self.update_assets()
+            return
+
+        assets = [snapshot.create_asset_from_entry(entry) for entry in entries]
+        assets = [asset for asset in assets if asset]
+        if self._progressive_population:
+            self._populate_assets(assets)
+        else:
+            for asset in assets:
+                self._add_asset_to_viewer(asset)
+        self._displayed_entries = entries
+
+        self.revalidate_assets()
+        self._schedule_prefetch()
+
+    def _fetch_project_assets(self):
+        """
+        Internal function, executed in a scheduler consumer thread, that retrieves project assets from Artella
+        :return: tuple(list(ArtellaAsset), list(dict), dict), assets, their snapshot entries and assets by entry id
+        """
+
+        assets = self._artella_caller.call(
+            artellapipe.AssetsMgr().find_all_assets, kwargs={'force_update': True}) or list()
+        entries, assets_map = snapshot.get_entries_map(assets)
+
+        return assets, entries, assets_map
+
+    def _add_asset_to_viewer(self, asset):
+        """
+        Internal function that adds a new asset to the assets viewer
+        :param asset: ArtellaAsset
+        """
+
+        self._assets_widget.add_asset(asset)
+
+    def _populate_assets(self, assets):
+        """
+        Internal function that adds the given assets to the assets viewer in small batches.
+        Assets are added to the assets lookup at once, so bulk operations target all of them while the viewer is
+        still being populated
+        :param assets: list(ArtellaAsset)
+        """
+
+        self._assets_lookup.add_assets(assets)
+        self._assets_populator.populate(assets)
+
+    def _clear_assets_viewer(self):
+        """
+        Internal function that removes all the assets from the assets viewer, including the ones pending to be added
+        """
+
+        self._assets_populator.clear()
+        clear_viewer = getattr(self._assets_widget, 'clear', None)
+        if clear_viewer:
+            clear_viewer()
+        else:
+            for asset_id in list(self._asset_widgets.keys()):
+                self._remove_asset_from_viewer(asset_id)
+        self._asset_widgets.clear()
+        self._assets_lookup.clear()
+
+    def _add_shot_to_viewer(self, shot):
+        """
+        Internal function that adds a new shot to the shots viewer
+        :param shot: ArtellaShot
+        """
+
+        if self._shots_widget:
+            self._shots_widget.add_shot(shot)
+
+    def _populate_shots(self, shots):
+        """
+        Internal function that fills the shots viewer with the given shots. If progressive population is enabled,
+        shots are added in small batches so the UI is not blocked
+        :param shots: list(ArtellaShot)
+        """
+
+        if not self._progressive_population:
+            self._shots_widget.load_shots(shots)
+            return
+
+        self._shots_populator.clear()
+        self._shots_widget.clear_shots()
+        self._shots_populator.populate(shots)
+
+    def _remove_asset_from_viewer(self, asset_id):
+        """
+        Internal function that removes the asset with given id from the assets viewer
+        :param asset_id: str
+        """
+
+        self._assets_lookup.remove(asset_id)
+        asset_widget = self._asset_widgets.pop(asset_id, None)
+        if not asset_widget:
+            return
+
+        if self._asset_to_sync == asset_widget:
+            self._asset_to_sync = None
+        self._assets_widget.remove_asset(asset_widget.asset)
+
+    def _update_asset_in_viewer(self, asset):
+        """
+        Internal function that updates the given asset in the assets viewer without modifying its position.
+        If the viewer cannot update assets in place, the asset is removed from the viewer
+        :param asset: ArtellaAsset
+        :return: bool, True if the asset was updated in place; False if it must be added again
+        """
+
+        asset_id = utils.get_asset_id(asset)
+        update_viewer_asset = getattr(self._assets_widget, 'update_asset', None)
+        old_widget = self._asset_widgets.get(asset_id)
+        new_widget = update_viewer_asset(asset) if update_viewer_asset and old_widget else None
+        if not new_widget:
+            self._remove_asset_from_viewer(asset_id)
+            return False
+
+        if self._asset_to_sync == old_widget:
+            self._asset_to_sync = new_widget
+        self.invalidate_asset_data(asset)
+        self._register_asset_widgets([new_widget])
+
+        return True
+
+    def _apply_assets_diff(self, entries, assets_map):
+        """
+        Internal function that updates the assets viewer adding, removing and updating only the assets that differ
+        from the ones that are currently displayed
+        :param entries: list(dict), snapshot entries of the project assets
+        :param assets_map: dict, maps the id of each entry to its asset
+        :return: tuple(list(str), list(str), list(str)), ids of added, removed and changed assets
+        """
+
+        # Displayed entries include assets pending to be added, so they must be added before applying the diff
+        self._assets_populator.flush()
+
+        added, removed, changed = snapshot.diff_entries(self._displayed_entries, entries)
+
+        for asset_id in removed:
+            self._remove_asset_from_viewer(asset_id)
+        self._remove_assets_from_index(removed)
+        assets_to_add = [assets_map[asset_id] for asset_id in added]
+        for asset_id in changed:
+            if not self._update_asset_in_viewer(assets_map[asset_id]):
+                assets_to_add.append(assets_map[asset_id])
+        if self._progressive_population:
+            self._populate_assets(assets_to_add)
+        else:
+            for asset in assets_to_add:
+                self._add_asset_to_viewer(asset)
+        self._displayed_entries = entries
+
+        return added, removed, changed
+
+    def _update_sync_progress(self):
+        """
+        Internal function that updates sync progress bar taking into account all the running sync batches
+        """
+
+        total = sum(batch.total for batch in self._sync_batches)
+        processed = sum(batch.processed for batch in self._sync_batches)
+        if not total or processed >= total:
+            self._sync_progress.setVisible(False)
+            return
+
+        self._sync_progress.setMaximum(total)
+        self._sync_progress.setValue(processed)
+        self._sync_progress.setFormat('Synchronizing assets: %v / %m')
+        self._sync_progress.setVisible(True)
+
+    def _on_artella_circuit_changed(self, old_state, new_state):
+        """
+        Internal callback function that is called, from any thread, when Artella circuit breaker changes its state
+        :param old_state: str
+        :param new_state: str
+        """
+
+        self._scheduler_notifier.artellaAvailabilityChanged.emit(new_state == resilience.CircuitBreaker.CLOSED)
+
+    def _on_artella_availability_changed(self, available):
+        """
+        Internal callback function that is called when Artella becomes available or not available
+        :param available: bool
+        """
+
+        if available:
+            self._on_artella_available()
+        else:
+            self._on_artella_not_available()
+
     def _on_artella_not_available(self):
         """
-        Internal callback function that is called by ArtellaUserInfo widget when Artella is not available
-        TODO: If Artella is not enabled we should disable all the widget of the UI and notify the user
+        Internal callback function that is called when Artella is not available.
+        The UI only shows locally stored data and syncs are queued until Artella is available again
         """
 
-        pass
+        if self._artella_available:
+            self._artella_available = False
+            self.show_warning_message('Artella is not available. Showing cached data until it is available again.')
+
+        if self._asset_to_sync:
+            self._requests.cancel(self.ASSET_INFO_CHANNEL)
+            self._show_asset_info(self._asset_to_sync)
+
+        self._artella_probe_timer.start()
+
+    def _on_artella_available(self):
+        """
+        Internal callback function that is called when Artella is available again after being not available
+        """
+
+        self._artella_probe_timer.stop()
+        if self._artella_available:
+            return
+
+        self._artella_available = True
+        self.show_ok_message('Artella is available again!')
+        # If Artella answered the revalidation used to probe it, its result is applied once it arrives, so project
+        # assets are not listed and pending actions are not replayed again
+        if not self._revalidating_assets:
+            self.revalidate_assets()
+        self.refresh_shots()
 
     def _on_artella_worker_completed(self, uid, asset_widget):
         """
         Internal callback function that is called when worker finishes its job
         """
 
+        if not self._requests.is_current(uid, channel=self.ASSET_INFO_CHANNEL):
+            return
+
+        self._requests.finish(self._requests.current(self.ASSET_INFO_CHANNEL))
         self._show_asset_info(asset_widget)
 
     def _on_artella_worker_failed(self, uid, msg, trace):
@@ -415,11 +1521,13 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         :param trace: str
         """
 
+        if not self._requests.is_current(uid, channel=self.ASSET_INFO_CHANNEL):
+            return
+
+        self._requests.finish(self._requests.current(self.ASSET_INFO_CHANNEL))
         if self._asset_to_sync:
             self._show_asset_info(self._asset_to_sync)
         else:
-            self._is_blocked = False
-            self._asset_to_sync = None
             self._attrs_stack.slide_in_index(0)
 
     def _on_attrs_stack_anim_finished(self, index):
@@ -429,8 +1537,7 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         """
 
         if self._asset_to_sync and index == 1:
-            self._is_blocked = True
-            self._artella_worker.queue_work(self._get_asset_data_from_artella, {'asset_widget': self._asset_to_sync})
+            self._request_pending_asset_data()
 
     def _on_open_project_in_artella(self):
         """
@@ -482,6 +1589,16 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
             return
 
         self._setup_asset_signals(asset_widget)
+        self._register_asset_widgets([asset_widget])
+
+    def _on_assets_added(self, asset_items):
+        """
+        Internal callback function that is called when assets are added to a virtualized assets viewer
+        Viewer signals are connected once, so no signals are connected per asset
+        :param asset_items: list(AssetItem)
+        """
+
+        self._register_asset_widgets(asset_items)
 
     def _on_asset_clicked(self, asset_widget, skip_sync=True):
         """
@@ -489,19 +1606,25 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         :param asset_widget: ArtellaAssetWidget
         """
 
-        if not asset_widget or self._is_blocked:
+        if not asset_widget:
             return
 
-        if skip_sync:
+        # A new click always supersedes the in-flight asset data request
+        self._requests.cancel(self.ASSET_INFO_CHANNEL)
+
+        # Without Artella, asset info is shown with locally stored data
+        if skip_sync or not self._artella_available or self._metadata_cache.get(
+                utils.get_asset_id(asset_widget.asset)) is not None:
             self._show_asset_info(asset_widget)
         else:
-            asset_data = asset_widget.asset.get_artella_data(update=False)
-            if asset_data:
-                self._show_asset_info(asset_widget)
+            self._asset_to_sync = asset_widget
+            if self._attrs_stack.currentIndex() == 1:
+                self._request_pending_asset_data()
             else:
-                self._asset_to_sync = asset_widget
                 self._attrs_stack.slide_in_index(1)
 
+        self._schedule_prefetch(asset_widget)
+
     def _on_start_asset_sync(self, asset, file_type, sync_type):
         """
         Internal callback function that is called when an asset needs to be synced
@@ -513,7 +1636,35 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         if not asset:
             return
 
-        asset.sync(file_type, sync_type)
+        # Duplicated requests of an asset that is being synced are merged with the running sync by the sync engine
+        self.sync_assets(
+            [asset], file_type=file_type, sync_type=sync_type, incremental=False, interactive=True,
+            finished_message='Asset "{}" has been synced!'.format(asset.get_name()))
+
+    def _on_synchronize_menu_about_to_show(self):
+        """
+        Internal callback function that is called before showing synchronize menu. Entries are added the first time
+        """
+
+        sync_menu = self.sender()
+        if not sync_menu or sync_menu.actions():
+            return
+
+        self._populate_synchronize_menu(sync_menu)
+
+    def _on_tab_changed(self, index):
+        """
+        Internal callback function that is called when the active tab changes
+        Shots viewer is created and populated the first time shots tab is opened and kept afterwards
+        :param index: int
+        """
+
+        if self._tab_widget.widget(index) != self._shots_splitter:
+            return
+
+        self._create_shots_widget()
+        if self._shots_outdated:
+            self.update_shots()
 
     def _on_shot_added(self, shot_widget):
         """
@@ -532,7 +1683,7 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         :param shot_widget: ArtellaShotWidget
         """
 
-        if not shot_widget or self._is_blocked:
+        if not shot_widget:
             return
 
         # if skip_sync:
@@ -550,15 +1701,17 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         Internal callback function that is called anytime user log in into Tracking Manager
         """
 
+        self.invalidate_asset_data()
         self._main_stack.slide_in_index(1)
-        self._assets_widget.update_assets()
-        self._shots_widget.update_shots()
+        self.refresh_assets()
+        self.refresh_shots()
 
     def _on_valid_unlogin(self):
         """
         Internal callback function that is called anytime user log out from Tracking Manager
         """
 
+        self.invalidate_asset_data()
         self._main_stack.slide_in_index(0)
 
     def _on_sync_file_type(self, asset_type, file_type, sync_type=defines.ArtellaFileStatus.ALL):
@@ -568,15 +1721,14 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         :param sync_type: ArtellaFileStatus, type of sync we want to do
         """
 
-        assets_to_sync = artellapipe.AssetsMgr().get_assets_by_type(asset_type)
+        assets_to_sync = self.get_assets(asset_type=asset_type)
         if not assets_to_sync:
             LOGGER.warning('No Assets found of type "{}" to sync!'.format(asset_type))
             return
 
-        for asset in assets_to_sync:
-            asset.sync(file_type=file_type, sync_type=defines.ArtellaFileStatus.ALL)
-
-        self.show_ok_message('Files of type {} has been synced!'.format(file_type))
+        self.sync_assets(
+            assets_to_sync, file_type=file_type, sync_type=sync_type,
+            finished_message='Files of type {} has been synced!'.format(file_type))
 
     def _on_sync_all_assets_of_type(self, asset_type, ask=True):
         """
@@ -585,24 +1737,23 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         :param ask: bol
         """
 
-        assets_to_sync = artellapipe.AssetsMgr().get_assets_by_type(asset_type)
+        assets_to_sync = self.get_assets(asset_type=asset_type)
         if not assets_to_sync:
             LOGGER.warning('No Assets found of type "{}" to sync!'.format(asset_type))
             return
 
         total_assets = len(assets_to_sync)
         if ask:
-            result = qtutils.show_question(
-                None, 'Synchronizing All {} Assets ({})'.format(asset_type, total_assets),
-                'Are you sure you want to synchronize all {} assets ({})? This can take lot of time!'.format(
-                    asset_type, total_assets))
-            if result == QMessageBox.No:
+            confirmed = self._confirm_sync(
+                'Synchronizing All {} Assets ({})'.format(asset_type, total_assets),
+                'Are you sure you want to synchronize all {} assets ({})?'.format(asset_type, total_assets),
+                assets_to_sync, sync_type=defines.ArtellaFileStatus.ALL)
+            if not confirmed:
                 return
 
-        for asset in assets_to_sync:
-            asset.sync(sync_type=defines.ArtellaFileStatus.ALL)
-
-        self.show_ok_message('All assets have been synced!')
+        self.sync_assets(
+            assets_to_sync, sync_type=defines.ArtellaFileStatus.ALL,
+            finished_message='All {} assets have been synced!'.format(asset_type), journaled=True)
 
     def _on_sync_all_types(self, ask=True):
         """
@@ -610,27 +1761,409 @@ class ArtellaAssetsManager(tool.ArtellaToolWidget, object):
         :param ask: bol
         """
 
-        assets_to_sync = artellapipe.AssetsMgr().assets
+        assets_to_sync = self.get_assets()
         if not assets_to_sync:
             LOGGER.warning('No Assets found to sync!')
             return
 
         total_assets = len(assets_to_sync)
         if ask:
-            result = qtutils.show_question(
-                None, 'Synchronizing All Assets ({})'.format(total_assets),
-                'Are you sure you want to synchronize all assets ({})? This will take lot of time!'.format(
-                    total_assets))
-            if result == QMessageBox.No:
+            confirmed = self._confirm_sync(
+                'Synchronizing All Assets ({})'.format(total_assets),
+                'Are you sure you want to synchronize all assets ({})?'.format(total_assets),
+                assets_to_sync, sync_type=defines.ArtellaFileStatus.ALL)
+            if not confirmed:
                 return
 
-        for asset in assets_to_sync:
-            asset.sync(sync_type=defines.ArtellaFileStatus.ALL)
+        self.sync_assets(
+            assets_to_sync, sync_type=defines.ArtellaFileStatus.ALL, finished_message='All assets have been synced!',
+            journaled=True)
+
+    def _on_verify_assets_of_type(self, asset_type):
+        """
+        Internal callback function that is called when verify option of an asset type is selected from sync menu
+        :param asset_type: str
+        """
+
+        # Assets synced outside the tool are not marked as synced in the assets lookup, so all the assets of the type
+        # are checked and only the files found in disk or in the assets index are verified
+        assets_to_verify = self.get_assets(asset_type=asset_type)
+        if not assets_to_verify:
+            LOGGER.warning('No Assets found of type "{}" to verify!'.format(asset_type))
+            return
+
+        self.verify_assets(assets_to_verify, title='{} assets'.format(asset_type))
+
+    def _on_assets_verified(self, title, verified_files, error):
+        """
+        Internal callback function that is called when the verification of synced files finishes
+        :param title: str
+        :param verified_files: list(FileToVerify) or None
+        :param error: str
+        """
+
+        if error or verified_files is None:
+            LOGGER.error('Error while verifying synced files: {}'.format(error))
+            self.show_warning_message('Impossible to verify synced files. Check log for more info.')
+            return
+
+        for verified_file in verified_files:
+            if verified_file.status == verify.UNREADABLE_STATUS:
+                LOGGER.warning('Synced file "{}" cannot be read: {}'.format(
+                    verified_file.file_path, verified_file.error))
+            elif verified_file.status == verify.UNKNOWN_STATUS:
+                LOGGER.warning('Synced file "{}" could not be verified: server checksum is not available'.format(
+                    verified_file.file_path))
+        files_to_resync = verify.get_files_to_resync(verified_files)
+        if not files_to_resync:
+            all_valid, message = verify.get_verify_message(verified_files, title=title)
+            if all_valid:
+                self.show_ok_message(message)
+            else:
+                self.show_warning_message(message)
+            return
+
+        asset_ids = set(file_to_resync.asset_id for file_to_resync in files_to_resync)
+        result = qtutils.show_question(
+            None, 'Corrupted Files Found',
+            '{} files of {} assets are corrupted or missing. Do you want to synchronize them again?'.format(
+                len(files_to_resync), len(asset_ids)))
+        if result != QMessageBox.Yes:
+            self.show_warning_message(
+                '{} corrupted files will be synced again in next synchronization.'.format(len(files_to_resync)))
+            return
+
+        assets_to_sync = [self._assets_lookup.get_asset(asset_id) for asset_id in asset_ids]
+        self.sync_assets(
+            [asset for asset in assets_to_sync if asset], finished_message='Corrupted files have been synced again!',
+            incremental=True)
+
+    def _on_project_assets_job_finished(self, job):
+        """
+        Internal callback function that is called from a scheduler consumer thread when project assets are retrieved
+        :param job: Job
+        """
+
+        if job.error:
+            self._revalidating_assets = False
+            LOGGER.warning('Impossible to revalidate project assets: {}'.format(job.error))
+            if self._artella_caller.circuit_breaker.is_open():
+                # Keep probing until Artella is available again
+                self._scheduler_notifier.artellaAvailabilityChanged.emit(False)
+            return
+
+        self._scheduler_notifier.assetsFetched.emit(*job.result)
+
+    def _on_project_assets_fetched(self, assets, entries, assets_map):
+        """
+        Internal callback function that is called when project assets are retrieved in background
+        :param assets: list(ArtellaAsset)
+        :param entries: list(dict)
+        :param assets_map: dict, maps the id of each entry to its asset
+        """
+
+        self._revalidating_assets = False
+        added, removed, changed = self._apply_assets_diff(entries, assets_map)
+        if added or removed or changed:
+            LOGGER.info('Assets updated: {} added, {} removed, {} changed'.format(
+                len(added), len(removed), len(changed)))
+            self._assets_snapshot.save(entries)
+
+        # Artella answered, so actions requested while it was not available can be done now
+        self._replay_pending_actions(assets)
+
+    def _on_prefetch_timeout(self):
+        """
+        Internal callback function that is called when prefetch delay finishes
+        """
+
+        asset_widget, self._prefetch_anchor = self._prefetch_anchor, None
+        self.prefetch_assets_data(asset_widget)
+
+    def _on_max_sync_workers_changed(self, max_workers):
+        """
+        Internal callback function that is called when the maximum number of parallel syncs is changed in settings
+        :param max_workers: int
+        """
+
+        self._scheduler.set_consumers(
+            max_workers + self.RESERVED_INTERACTIVE_CONSUMERS + self.RESERVED_SYNC_CONSUMERS)
+        self._sync_engine.set_max_workers(max_workers)
+
+    def _on_sync_throttle_changed(
+            self, interactive_bandwidth, interactive_max_in_flight, background_bandwidth, background_max_in_flight):
+        """
+        Internal callback function that is called when sync throttle limits are changed in settings
+        :param interactive_bandwidth: float, MB per second. 0 means no limit
+        :param interactive_max_in_flight: int, 0 means no limit
+        :param background_bandwidth: float, MB per second. 0 means no limit
+        :param background_max_in_flight: int, 0 means no limit
+        """
+
+        self._interactive_throttle.set_limits(
+            bytes_per_second=interactive_bandwidth * throttle.MEGABYTE, max_in_flight=interactive_max_in_flight)
+        self._background_throttle.set_limits(
+            bytes_per_second=background_bandwidth * throttle.MEGABYTE, max_in_flight=background_max_in_flight)
+
+    def _on_progressive_population_changed(self, flag):
+        """
+        Internal callback function that is called when progressive population of viewers is enabled/disabled
+        :param flag: bool
+        """
+
+        self._progressive_population = flag
+        if not flag:
+            self._assets_populator.flush()
+            self._shots_populator.flush()
+
+    def _on_populate_progress(self, name, processed, total):
+        """
+        Internal callback function that is called each time a batch of items is added to a viewer
+        :param name: str, name of the items being added
+        :param processed: int
+        :param total: int
+        """
+
+        if processed >= total:
+            self._populate_progress.setVisible(False)
+            return
+
+        self._populate_progress.setMaximum(total)
+        self._populate_progress.setValue(processed)
+        self._populate_progress.setFormat('Loading {}: %v / %m'.format(name))
+        self._populate_progress.setVisible(True)
+
+    def _on_populate_finished(self):
+        """
+        Internal callback function that is called when a viewer has been populated
+        """
+
+        if not self._assets_populator.is_running() and not self._shots_populator.is_running():
+            self._populate_progress.setVisible(False)
+        self._schedule_prefetch()
+
+    def _on_incremental_sync_changed(self, flag):
+        """
+        Internal callback function that is called when incremental sync is enabled/disabled in settings
+        :param flag: bool
+        """
+
+        self._incremental_sync = flag
+
+    def _on_sync_job_processed(self, batch, job, error):
+        """
+        Internal callback function that is called from sync worker threads each time a sync job is processed
+        :param batch: SyncBatch
+        :param job: SyncJob
+        :param error: str or None
+        """
+
+        if not error and not job.skipped:
+            self._transfer_stats.add_sample(job.transferred_bytes, job.elapsed)
+            self.invalidate_asset_data(job.asset)
+            # Whole asset syncs report a None file type, so all the file types of the asset are marked as synced
+            synced_file_types = assetstate.get_synced_file_types(job.asset, job.synced_file_types)
+            self._assets_lookup.mark_synced(job.asset_id, synced_file_types)
+            try:
+                self._asset_index.mark_synced(
+                    job.asset_id, file_types=synced_file_types, server_states=job.server_states)
+            except Exception as exc:
+                LOGGER.warning('Impossible to store sync state of "{}" in assets index: {}'.format(job.asset_id, exc))
+
+        self._sync_notifier.notify_progress(batch, job, error)
+
+    def _on_sync_progress(self, batch, job, error):
+        """
+        Internal callback function that is called each time an asset of a bulk sync is processed
+        :param batch: SyncBatch
+        :param job: SyncJob
+        :param error: str or None
+        """
+
+        if error:
+            LOGGER.warning('Asset "{}" was not synced: {}'.format(job.asset_id, error))
+
+        self._update_sync_progress()
+
+    def _check_interrupted_sync(self):
+        """
+        Internal function that asks the user whether to resume the bulk sync interrupted in a previous session
+        Journals owned by other sessions that are still syncing are ignored
+        """
+
+        if not self._sync_journal.acquire():
+            return
+        if not self._sync_journal.is_active():
+            self._sync_journal.release()
+            return
+
+        total_assets = len(self._sync_journal.asset_ids)
+        pending_assets = len(self._sync_journal.get_pending_asset_ids())
+        result = qtutils.show_question(
+            None, 'Resume Interrupted Synchronization',
+            'A previous synchronization was interrupted ({} of {} assets pending).\n\n'
+            'Do you want to resume it?'.format(pending_assets, total_assets))
+        if result == QMessageBox.No:
+            self._sync_journal.discard()
+            return
+
+        self.resume_sync()
+
+    def _on_sync_planned(self, uid, plan, error):
+        """
+        Internal callback function that is called when the files to transfer by a sync are computed
+        :param uid: str, unique identifier of the plan request
+        :param plan: SyncPlan or None
+        :param error: str
+        """
+
+        if not self._requests.is_current(uid, channel=self.SYNC_PLAN_CHANNEL) or not self._sync_plan_dialog:
+            return
+
+        base_message = self._sync_plan_dialog.property('base_message')
+        if error or not plan:
+            LOGGER.warning('Impossible to compute files to sync: {}'.format(error))
+            plan_message = 'Impossible to compute files to transfer. This can take lot of time!'
+        else:
+            plan_message = plan.get_message(workers=self._sync_engine.max_workers)
+        self._sync_plan_dialog.setText('{}\n\n{}'.format(base_message, plan_message))
+
+    def _on_sync_finished(self, batch):
+        """
+        Internal callback function that is called when all the assets of a bulk sync are processed
+        :param batch: SyncBatch
+        """
+
+        if batch in self._sync_batches:
+            self._sync_batches.remove(batch)
+        finished_message = self._sync_messages.pop(batch, None)
+        self._update_sync_progress()
+        self._transfer_stats.save()
+
+        if batch.is_cancelled():
+            self.show_warning_message('Synchronization cancelled ({} / {} assets synced)'.format(
+                len(batch.completed), batch.total))
+        elif batch.failed:
+            self.show_warning_message('{} of {} assets could not be synced. Check log for more info.'.format(
+                len(batch.failed), batch.total))
+        elif finished_message:
+            if batch.skipped:
+                finished_message = '{} ({} / {} assets were already up to date)'.format(
+                    finished_message, len(batch.skipped), batch.total)
+            self.show_ok_message(finished_message)
+
+
+class ViewerPopulator(QObject, object):
+    """
+    Adds items to a viewer in small batches from the main thread event loop. Each batch has a time budget, so the
+    UI keeps responding while lots of items are added and the first items are shown immediately
+    """
+
+    progress = Signal(int, int)
+    finished = Signal()
+
+    def __init__(self, add_fn, slice_budget=timeslice.DEFAULT_SLICE_BUDGET,
+                 first_slice_budget=timeslice.DEFAULT_FIRST_SLICE_BUDGET, parent=None):
+        super(ViewerPopulator, self).__init__(parent)
+
+        self._queue = timeslice.TimeSlicedQueue(
+            add_fn, slice_budget=slice_budget, first_slice_budget=first_slice_budget)
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def is_running(self):
+        return not self._queue.is_done()
+
+    def populate(self, items):
+        """
+        Adds the given items to the viewer. First batch is added immediately and the rest ones in next event loop
+        iterations
+        :param items: list
+        """
+
+        self._queue.extend(items)
+        if self._queue.is_done():
+            return
+
+        self._on_timeout()
+
+    def flush(self):
+        """
+        Adds all the pending items at once
+        """
+
+        if self._queue.is_done():
+            return
+
+        self._queue.flush()
+        self._finish()
+
+    def clear(self):
+        """
+        Discards pending items
+        """
+
+        self._timer.stop()
+        self._queue.clear()
+
+    def _finish(self):
+        """
+        Internal function that notifies that all the items were added
+        """
+
+        self._timer.stop()
+        self.progress.emit(self._queue.processed, self._queue.total)
+        self.finished.emit()
+
+    def _on_timeout(self):
+        """
+        Internal callback function that adds the next batch of items
+        """
+
+        if self._queue.process_slice():
+            self.progress.emit(self._queue.processed, self._queue.total)
+            self._timer.start()
+        else:
+            self._finish()
+
+
+class SyncProgressNotifier(QObject, object):
+    """
+    Forwards sync engine callbacks, that are executed in worker threads, to the main thread through signals
+    """
+
+    syncProgress = Signal(object, object, object)
+    syncFinished = Signal(object)
+
+    def notify_progress(self, batch, job, error):
+        self.syncProgress.emit(batch, job, error)
+
+    def notify_finished(self, batch):
+        self.syncFinished.emit(batch)
+
+
+class JobSchedulerNotifier(QObject, object):
+    """
+    Forwards job scheduler results, that are generated in consumer threads, to the main thread through signals
+    """
+
+    workCompleted = Signal(str, object)
+    workFailure = Signal(str, str, str)
+    assetsFetched = Signal(object, object, object)
+    syncPlanned = Signal(str, object, str)
+    artellaAvailabilityChanged = Signal(bool)
+    assetsVerified = Signal(str, object, str)
 
 
 class AssetsManagerSettingsWidget(base.BaseWidget, object):
 
     closed = Signal()
+    maxSyncWorkersChanged = Signal(int)
+    incrementalSyncChanged = Signal(bool)
+    prefetchChanged = Signal(bool)
+    progressivePopulationChanged = Signal(bool)
+    syncThrottleChanged = Signal(float, int, float, int)
 
     def __init__(self, settings, parent=None):
         super(AssetsManagerSettingsWidget, self).__init__(parent=parent)
@@ -647,6 +2180,42 @@ class AssetsManagerSettingsWidget(base.BaseWidget, object):
         self.main_layout.addWidget(self._auto_check_working_cbx)
         self._auto_check_lock_cbx = QCheckBox('Check Lock/Unlock Working Versions?')
         self.main_layout.addWidget(self._auto_check_lock_cbx)
+        self._incremental_sync_cbx = QCheckBox('Only Synchronize Files Changed in Server?')
+        self._incremental_sync_cbx.setChecked(True)
+        self.main_layout.addWidget(self._incremental_sync_cbx)
+        self._prefetch_cbx = QCheckBox('Prefetch Info of Visible and Neighbour Assets?')
+        self._prefetch_cbx.setChecked(True)
+        self.main_layout.addWidget(self._prefetch_cbx)
+        self._progressive_population_cbx = QCheckBox('Load Assets and Shots Progressively?')
+        self._progressive_population_cbx.setChecked(True)
+        self.main_layout.addWidget(self._progressive_population_cbx)
+
+        sync_workers_layout = QHBoxLayout()
+        sync_workers_layout.setContentsMargins(0, 0, 0, 0)
+        sync_workers_layout.setSpacing(2)
+        self._sync_workers_spn = QSpinBox()
+        self._sync_workers_spn.setRange(1, 32)
+        self._sync_workers_spn.setValue(syncengine.DEFAULT_MAX_WORKERS)
+        sync_workers_layout.addWidget(QLabel('Max. Parallel Syncs:'))
+        sync_workers_layout.addWidget(self._sync_workers_spn)
+        self.main_layout.addLayout(sync_workers_layout)
+
+        throttle_layout = QGridLayout()
+        throttle_layout.setContentsMargins(0, 0, 0, 0)
+        throttle_layout.setSpacing(2)
+        self._interactive_bandwidth_spn = self._create_bandwidth_spinbox()
+        self._interactive_in_flight_spn = self._create_in_flight_spinbox()
+        self._background_bandwidth_spn = self._create_bandwidth_spinbox()
+        self._background_in_flight_spn = self._create_in_flight_spinbox()
+        throttle_layout.addWidget(QLabel('Bandwidth (MB/s)'), 0, 1)
+        throttle_layout.addWidget(QLabel('Max. Transfers'), 0, 2)
+        throttle_layout.addWidget(QLabel('Interactive Syncs:'), 1, 0)
+        throttle_layout.addWidget(self._interactive_bandwidth_spn, 1, 1)
+        throttle_layout.addWidget(self._interactive_in_flight_spn, 1, 2)
+        throttle_layout.addWidget(QLabel('Background Syncs:'), 2, 0)
+        throttle_layout.addWidget(self._background_bandwidth_spn, 2, 1)
+        throttle_layout.addWidget(self._background_in_flight_spn, 2, 2)
+        self.main_layout.addLayout(throttle_layout)
 
         self.main_layout.addLayout(dividers.DividerLayout())
         self.main_layout.addItem(QSpacerItem(0, 10, QSizePolicy.Preferred, QSizePolicy.Expanding))
@@ -674,6 +2243,31 @@ class AssetsManagerSettingsWidget(base.BaseWidget, object):
     def settings(self):
         return self._settings
 
+    def _create_bandwidth_spinbox(self):
+        """
+        Internal function that creates a spinbox used to define a bandwidth limit
+        :return: QDoubleSpinBox
+        """
+
+        bandwidth_spn = QDoubleSpinBox()
+        bandwidth_spn.setRange(0, 10000)
+        bandwidth_spn.setDecimals(1)
+        bandwidth_spn.setSpecialValueText('Unlimited')
+
+        return bandwidth_spn
+
+    def _create_in_flight_spinbox(self):
+        """
+        Internal function that creates a spinbox used to define the maximum number of transfers in flight
+        :return: QSpinBox
+        """
+
+        in_flight_spn = QSpinBox()
+        in_flight_spn.setRange(0, 64)
+        in_flight_spn.setSpecialValueText('Unlimited')
+
+        return in_flight_spn
+
     def _load_settings(self):
         """
         Internal function that updates widget status taking into account settings
@@ -686,6 +2280,23 @@ class AssetsManagerSettingsWidget(base.BaseWidget, object):
             auto_check_published = self._settings.getw('auto_check_published', default_value=False)
             auto_check_working = self._settings.getw('auto_check_working', default_value=False)
             auto_check_lock = self._settings.getw('auto_check_lock', default_value=False)
+            sync_max_workers = self._settings.getw(
+                'sync_max_workers', default_value=syncengine.DEFAULT_MAX_WORKERS)
+            self._sync_workers_spn.setValue(int(sync_max_workers))
+            incremental_sync = self._settings.getw('incremental_sync', default_value=True)
+            self._incremental_sync_cbx.setChecked(bool(incremental_sync))
+            prefetch_enabled = self._settings.getw('prefetch_enabled', default_value=True)
+            self._prefetch_cbx.setChecked(bool(prefetch_enabled))
+            progressive_population = self._settings.getw('progressive_population', default_value=True)
+            self._progressive_population_cbx.setChecked(bool(progressive_population))
+            self._interactive_bandwidth_spn.setValue(
+                float(self._settings.getw('interactive_bandwidth_limit', default_value=0)))
+            self._interactive_in_flight_spn.setValue(
+                int(self._settings.getw('interactive_max_in_flight', default_value=0)))
+            self._background_bandwidth_spn.setValue(
+                float(self._settings.getw('background_bandwidth_limit', default_value=0)))
+            self._background_in_flight_spn.setValue(
+                int(self._settings.getw('background_max_in_flight', default_value=0)))
 
             print(auto_check_published, auto_check_working, auto_check_lock)
         except Exception as exc:
@@ -703,6 +2314,21 @@ class AssetsManagerSettingsWidget(base.BaseWidget, object):
         self._settings.setw('auto_check_published', self._auto_check_published_cbx.isChecked())
         self._settings.setw('auto_check_working', self._auto_check_working_cbx.isChecked())
         self._settings.setw('auto_check_lock', self._auto_check_lock_cbx.isChecked())
+        self._settings.setw('sync_max_workers', self._sync_workers_spn.value())
+        self._settings.setw('incremental_sync', self._incremental_sync_cbx.isChecked())
+        self._settings.setw('prefetch_enabled', self._prefetch_cbx.isChecked())
+        self._settings.setw('progressive_population', self._progressive_population_cbx.isChecked())
+        self._settings.setw('interactive_bandwidth_limit', self._interactive_bandwidth_spn.value())
+        self._settings.setw('interactive_max_in_flight', self._interactive_in_flight_spn.value())
+        self._settings.setw('background_bandwidth_limit', self._background_bandwidth_spn.value())
+        self._settings.setw('background_max_in_flight', self._background_in_flight_spn.value())
+        self.maxSyncWorkersChanged.emit(self._sync_workers_spn.value())
+        self.incrementalSyncChanged.emit(self._incremental_sync_cbx.isChecked())
+        self.prefetchChanged.emit(self._prefetch_cbx.isChecked())
+        self.progressivePopulationChanged.emit(self._progressive_population_cbx.isChecked())
+        self.syncThrottleChanged.emit(
+            self._interactive_bandwidth_spn.value(), self._interactive_in_flight_spn.value(),
+            self._background_bandwidth_spn.value(), self._background_in_flight_spn.value())
 
     def _on_save_settings(self):
         """
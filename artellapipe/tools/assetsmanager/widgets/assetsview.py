@@ -0,0 +1,692 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains virtualized assets viewer implementation based on Qt model/view framework
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import logging
+
+from Qt.QtCore import *
+from Qt.QtWidgets import *
+from Qt.QtGui import *
+
+from tpDcc.libs.qt.core import base
+
+import artellapipe
+from artellapipe.core import defines
+
+from artellapipe.tools.assetsmanager.core import utils, assetstate, thumbnails, metadatacache
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+
+class AssetItem(object):
+    """
+    Lightweight item that represents an asset of the virtualized viewer. It exposes the same interface the assets
+    manager uses from asset widgets, but no widget is created for it
+    """
+
+    __slots__ = ('asset', 'asset_id', 'name', 'asset_type', 'thumbnail_path', '_view', '_asset_info')
+
+    def __init__(self, asset, view):
+        self.asset = asset
+        self.asset_id = utils.get_asset_id(asset)
+        self.name = asset.get_name() if hasattr(asset, 'get_name') else self.asset_id
+        self.asset_type = assetstate.get_asset_type(asset) or ''
+        # Resolved once, when the item is added, so painting the item does not access the disk
+        self.thumbnail_path = thumbnails.get_thumbnail_path(asset) or ''
+        self._view = view
+        self._asset_info = None
+
+    def get_name(self):
+        return self.name
+
+    def get_asset_info(self):
+        """
+        Returns the info widget of the asset. It is created the first time it is requested
+        :return: AssetInfoWidget or None
+        """
+
+        if self._asset_info is None:
+            self._asset_info = self._view.create_asset_info(self)
+
+        return self._asset_info
+
+
+class AssetsListModel(QAbstractListModel, object):
+    """
+    Model that stores the assets shown in the virtualized assets viewer
+    """
+
+    ItemRole = Qt.UserRole + 1
+    AssetRole = Qt.UserRole + 2
+    AssetIdRole = Qt.UserRole + 3
+    AssetTypeRole = Qt.UserRole + 4
+
+    def __init__(self, view=None, parent=None):
+        super(AssetsListModel, self).__init__(parent)
+
+        self._view = view
+        self._items = list()
+        self._rows = dict()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._items):
+            return None
+
+        item = self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return item.name
+        elif role == Qt.DecorationRole:
+            return self._view.get_thumbnail(item) if self._view else None
+        elif role == Qt.ToolTipRole:
+            return '{} ({})'.format(item.name, item.asset_type) if item.asset_type else item.name
+        elif role == self.ItemRole:
+            return item
+        elif role == self.AssetRole:
+            return item.asset
+        elif role == self.AssetIdRole:
+            return item.asset_id
+        elif role == self.AssetTypeRole:
+            return item.asset_type
+
+        return None
+
+    def get_item(self, index):
+        """
+        Returns the asset item of the given model index
+        :param index: QModelIndex
+        :return: AssetItem or None
+        """
+
+        if not index.isValid() or not 0 <= index.row() < len(self._items):
+            return None
+
+        return self._items[index.row()]
+
+    def get_items(self):
+        return list(self._items)
+
+    def index_of(self, asset_id):
+        """
+        Returns the model index of the asset with the given id
+        :param asset_id: str
+        :return: QModelIndex
+        """
+
+        row = self._rows.get(asset_id)
+
+        return self.index(row, 0) if row is not None else QModelIndex()
+
+    def notify_changed(self, asset_id, roles=None):
+        """
+        Notifies views that the data of the given asset changed
+        :param asset_id: str
+        :param roles: list(int) or None
+        """
+
+        index = self.index_of(asset_id)
+        if index.isValid():
+            self.dataChanged.emit(index, index, roles or list())
+
+    def set_assets(self, assets):
+        """
+        Replaces all the assets of the model
+        :param assets: list(ArtellaAsset)
+        :return: list(AssetItem), created items
+        """
+
+        self.beginResetModel()
+        try:
+            self._items = [AssetItem(asset, self._view) for asset in assets]
+            self._rows = dict((item.asset_id, row) for row, item in enumerate(self._items))
+        finally:
+            self.endResetModel()
+
+        return list(self._items)
+
+    def add_assets(self, assets):
+        """
+        Appends the given assets to the model. Assets that are already in the model are skipped
+        :param assets: list(ArtellaAsset)
+        :return: list(AssetItem), created items
+        """
+
+        new_items = list()
+        new_ids = set()
+        for asset in assets:
+            item = AssetItem(asset, self._view)
+            if item.asset_id in self._rows or item.asset_id in new_ids:
+                continue
+            new_ids.add(item.asset_id)
+            new_items.append(item)
+        if not new_items:
+            return new_items
+
+        first_row = len(self._items)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_items) - 1)
+        try:
+            for row, item in enumerate(new_items, first_row):
+                self._items.append(item)
+                self._rows[item.asset_id] = row
+        finally:
+            self.endInsertRows()
+
+        return new_items
+
+    def update_asset(self, asset):
+        """
+        Replaces the item of the given asset keeping its row, so selection and scroll position are not modified
+        :param asset: ArtellaAsset
+        :return: AssetItem or None, new item of the asset; None if the asset was not in the model
+        """
+
+        item = AssetItem(asset, self._view)
+        row = self._rows.get(item.asset_id)
+        if row is None:
+            return None
+
+        self._items[row] = item
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index, list())
+
+        return item
+
+    def remove_asset(self, asset_id):
+        """
+        Removes the asset with the given id from the model
+        :param asset_id: str
+        :return: bool, True if the asset was removed; False if it was not in the model
+        """
+
+        row = self._rows.get(asset_id)
+        if row is None:
+            return False
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        try:
+            self._items.pop(row)
+            self._rows.pop(asset_id)
+            for next_row in range(row, len(self._items)):
+                self._rows[self._items[next_row].asset_id] = next_row
+        finally:
+            self.endRemoveRows()
+
+        return True
+
+
+class AssetsFilterModel(QSortFilterProxyModel, object):
+    """
+    Proxy model that filters assets by name and type
+    """
+
+    def __init__(self, parent=None):
+        super(AssetsFilterModel, self).__init__(parent)
+
+        self._asset_type = None
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+    def set_asset_type(self, asset_type):
+        """
+        Sets the type of the assets that are shown
+        :param asset_type: str or None, if None, assets of all types are shown
+        """
+
+        self._asset_type = asset_type or None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._asset_type:
+            index = self.sourceModel().index(source_row, 0, source_parent)
+            if index.data(AssetsListModel.AssetTypeRole) != self._asset_type:
+                return False
+
+        return super(AssetsFilterModel, self).filterAcceptsRow(source_row, source_parent)
+
+
+class AssetItemDelegate(QStyledItemDelegate, object):
+    """
+    Delegate that paints assets of the virtualized viewer. Only the rows that are visible are painted
+    """
+
+    ITEM_SIZE = QSize(120, 140)
+    MARGIN = 4
+    TEXT_HEIGHT = 20
+    MAX_SCALED_THUMBNAILS = 256
+
+    def __init__(self, parent=None):
+        super(AssetItemDelegate, self).__init__(parent)
+
+        self._scaled_thumbnails = metadatacache.MetadataCache(max_size=self.MAX_SCALED_THUMBNAILS, ttl=0)
+
+    @classmethod
+    def get_thumbnail_size(cls):
+        """
+        Returns the size of the thumbnails painted by the delegate
+        :return: QSize
+        """
+
+        thumb_size = min(cls.ITEM_SIZE.width(), cls.ITEM_SIZE.height() - cls.TEXT_HEIGHT) - cls.MARGIN * 2
+
+        return QSize(thumb_size, thumb_size)
+
+    def sizeHint(self, option, index):
+        return self.ITEM_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        try:
+            rect = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+            if option.state & QStyle.State_Selected:
+                painter.fillRect(rect, option.palette.highlight())
+            elif option.state & QStyle.State_MouseOver:
+                painter.fillRect(rect, option.palette.alternateBase())
+
+            thumb_size = min(rect.width(), rect.height() - self.TEXT_HEIGHT)
+            thumb_rect = QRect(rect.x() + (rect.width() - thumb_size) // 2, rect.y(), thumb_size, thumb_size)
+            self._paint_thumbnail(painter, thumb_rect, index)
+
+            text_rect = QRect(rect.x(), thumb_rect.bottom(), rect.width(), self.TEXT_HEIGHT)
+            name = option.fontMetrics.elidedText(index.data(Qt.DisplayRole) or '', Qt.ElideRight, rect.width())
+            if option.state & QStyle.State_Selected:
+                painter.setPen(option.palette.highlightedText().color())
+            else:
+                painter.setPen(option.palette.text().color())
+            painter.drawText(text_rect, Qt.AlignCenter, name)
+        finally:
+            painter.restore()
+
+    def _paint_thumbnail(self, painter, rect, index):
+        """
+        Internal function that paints the thumbnail of the asset
+        :param painter: QPainter
+        :param rect: QRect
+        :param index: QModelIndex
+        """
+
+        thumbnail = index.data(Qt.DecorationRole)
+        if isinstance(thumbnail, QIcon):
+            thumbnail.paint(painter, rect, Qt.AlignCenter)
+        elif isinstance(thumbnail, QPixmap) and not thumbnail.isNull():
+            scaled_thumbnail = self._get_scaled_thumbnail(thumbnail, rect.size())
+            painter.drawPixmap(
+                rect.x() + (rect.width() - scaled_thumbnail.width()) // 2,
+                rect.y() + (rect.height() - scaled_thumbnail.height()) // 2, scaled_thumbnail)
+        else:
+            painter.setPen(QPen(QColor(128, 128, 128, 90), 1, Qt.DashLine))
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+    def _get_scaled_thumbnail(self, thumbnail, size):
+        """
+        Internal function that returns the given thumbnail fitted into the given size. Thumbnails are loaded already
+        downscaled to the size of the cells, so usually they are painted as they are. Otherwise, scaled thumbnails are
+        cached, so they are not scaled again each time they are painted
+        :param thumbnail: QPixmap
+        :param size: QSize
+        :return: QPixmap
+        """
+
+        if thumbnail.width() <= size.width() and thumbnail.height() <= size.height():
+            return thumbnail
+
+        cache_key = (thumbnail.cacheKey(), size.width(), size.height())
+        scaled_thumbnail = self._scaled_thumbnails.get(cache_key)
+        if scaled_thumbnail is None:
+            scaled_thumbnail = thumbnail.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self._scaled_thumbnails.set(cache_key, scaled_thumbnail)
+
+        return scaled_thumbnail
+
+
+class AssetsView(base.BaseWidget, object):
+    """
+    Virtualized assets viewer. It can be used as ASSET_WIDGET_CLASS of the assets manager for projects with lots of
+    assets: no widget is created per asset, only visible rows are painted and signals are connected only once
+    """
+
+    # Assets manager connects to the signals of the viewer instead of connecting to each asset widget
+    VIRTUALIZED = True
+
+    assetsAdded = Signal(object)
+    assetClicked = Signal(object)
+    startSync = Signal(object, object, object)
+    viewportChanged = Signal()
+
+    def __init__(self, project, show_viewer_menu=False, parent=None):
+
+        self._project = project
+        self._show_viewer_menu = show_viewer_menu
+        self._thumbnail_loader = None
+        self._thumbnail_group = 'thumbnails_{}'.format(id(self))
+        self._asset_type_counts = dict()
+        if not self._project:
+            LOGGER.warning('Invalid project for AssetsView!')
+
+        super(AssetsView, self).__init__(parent=parent)
+
+    def get_main_layout(self):
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.setSpacing(2)
+
+        return main_layout
+
+    def ui(self):
+        super(AssetsView, self).ui()
+
+        filter_layout = QHBoxLayout()
+        filter_layout.setContentsMargins(2, 2, 2, 2)
+        filter_layout.setSpacing(2)
+        self._search_line = QLineEdit()
+        self._search_line.setPlaceholderText('Search assets ...')
+        self._search_line.setClearButtonEnabled(True)
+        self._types_combo = QComboBox()
+        self._types_combo.addItem('All', None)
+        filter_layout.addWidget(self._search_line)
+        filter_layout.addWidget(self._types_combo)
+
+        self._model = AssetsListModel(view=self, parent=self)
+        self._filter_model = AssetsFilterModel(parent=self)
+        self._filter_model.setSourceModel(self._model)
+
+        self._list_view = QListView()
+        self._list_view.setViewMode(QListView.IconMode)
+        self._list_view.setResizeMode(QListView.Adjust)
+        self._list_view.setMovement(QListView.Static)
+        self._list_view.setUniformItemSizes(True)
+        self._list_view.setLayoutMode(QListView.Batched)
+        self._list_view.setBatchSize(256)
+        self._list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self._list_view.setMouseTracking(True)
+        self._list_view.setItemDelegate(AssetItemDelegate(self._list_view))
+        self._list_view.setModel(self._filter_model)
+        if self._show_viewer_menu:
+            self._list_view.setContextMenuPolicy(Qt.CustomContextMenu)
+
+        self.main_layout.addLayout(filter_layout)
+        self.main_layout.addWidget(self._list_view)
+
+    def setup_signals(self):
+        self._search_line.textChanged.connect(self._filter_model.setFilterFixedString)
+        self._types_combo.currentIndexChanged.connect(self._on_asset_type_changed)
+        self._list_view.clicked.connect(self._on_index_clicked)
+        self._list_view.customContextMenuRequested.connect(self._on_context_menu_requested)
+        self._list_view.verticalScrollBar().valueChanged.connect(lambda value: self.viewportChanged.emit())
+        self._filter_model.layoutChanged.connect(lambda *args: self.viewportChanged.emit())
+        self.viewportChanged.connect(self._cancel_hidden_thumbnails)
+
+    @property
+    def model(self):
+        return self._model
+
+    @staticmethod
+    def get_thumbnail_size():
+        """
+        Returns the size thumbnails must be downscaled to
+        :return: QSize
+        """
+
+        return AssetItemDelegate.get_thumbnail_size()
+
+    def set_thumbnail_loader(self, thumbnail_loader):
+        """
+        Sets the loader used to load asset thumbnails in background. Until a thumbnail is loaded, a placeholder is
+        painted in its place
+        :param thumbnail_loader: ThumbnailLoader or None
+        """
+
+        if self._thumbnail_loader:
+            self._thumbnail_loader.thumbnailReady.disconnect(self._on_thumbnail_ready)
+        self._thumbnail_loader = thumbnail_loader
+        if self._thumbnail_loader:
+            self._thumbnail_loader.thumbnailReady.connect(self._on_thumbnail_ready)
+
+    def get_thumbnail(self, asset_item):
+        """
+        Returns the thumbnail of the given asset. Only the assets that are painted request their thumbnails
+        :param asset_item: AssetItem
+        :return: QPixmap or None, None if the thumbnail is not loaded yet
+        """
+
+        if not self._thumbnail_loader:
+            return None
+
+        return self._thumbnail_loader.get(asset_item.asset_id, asset_item.thumbnail_path, group=self._thumbnail_group)
+
+    def update_assets(self):
+        """
+        Updates the list of assets with the assets of the current project
+        """
+
+        self.set_assets(artellapipe.AssetsMgr().find_all_assets() or list())
+
+    def set_assets(self, assets):
+        """
+        Replaces all the assets shown in the viewer
+        :param assets: list(ArtellaAsset)
+        """
+
+        items = self._model.set_assets(assets)
+        self._asset_type_counts.clear()
+        self._count_asset_types(items)
+        self._update_asset_types()
+        if items:
+            self.assetsAdded.emit(items)
+
+    def add_asset(self, asset):
+        """
+        Adds a new asset to the viewer
+        :param asset: ArtellaAsset
+        """
+
+        self.add_assets([asset])
+
+    def add_assets(self, assets):
+        """
+        Adds the given assets to the viewer
+        :param assets: list(ArtellaAsset)
+        """
+
+        items = self._model.add_assets(assets)
+        if not items:
+            return
+
+        self._count_asset_types(items)
+        self._update_asset_types()
+        self.assetsAdded.emit(items)
+
+    def remove_asset(self, asset):
+        """
+        Removes the given asset from the viewer
+        :param asset: ArtellaAsset
+        """
+
+        asset_id = utils.get_asset_id(asset)
+        item = self._model.get_item(self._model.index_of(asset_id))
+        if self._model.remove_asset(asset_id):
+            self._count_asset_types([item], -1)
+            self._update_asset_types()
+
+    def update_asset(self, asset):
+        """
+        Updates the data of the given asset in place, without modifying its position in the viewer
+        :param asset: ArtellaAsset
+        :return: AssetItem or None, new item of the asset; None if the asset was not in the viewer
+        """
+
+        old_item = self._model.get_item(self._model.index_of(utils.get_asset_id(asset)))
+        item = self._model.update_asset(asset)
+        if item:
+            self._count_asset_types([old_item], -1)
+            self._count_asset_types([item])
+            self._update_asset_types()
+
+        return item
+
+    def clear(self):
+        """
+        Removes all the assets from the viewer
+        """
+
+        self._model.set_assets(list())
+        self._asset_type_counts.clear()
+        self._update_asset_types()
+
+    def get_visible_asset_ids(self):
+        """
+        Returns the ids of the assets that are visible in the viewer viewport
+        :return: list(str)
+        """
+
+        row_count = self._filter_model.rowCount()
+        if not row_count:
+            return list()
+
+        viewport_rect = self._list_view.viewport().rect()
+        first_index = self._list_view.indexAt(viewport_rect.topLeft() + QPoint(1, 1))
+        last_index = self._list_view.indexAt(viewport_rect.bottomRight() - QPoint(1, 1))
+        first_row = first_index.row() if first_index.isValid() else 0
+        last_row = last_index.row() if last_index.isValid() else row_count - 1
+
+        visible_ids = list()
+        for row in range(first_row, last_row + 1):
+            index = self._filter_model.index(row, 0)
+            if viewport_rect.intersects(self._list_view.visualRect(index)):
+                visible_ids.append(index.data(AssetsListModel.AssetIdRole))
+
+        return visible_ids
+
+    def is_asset_visible(self, asset_id):
+        """
+        Returns whether the asset with the given id is visible in the viewer viewport
+        :param asset_id: str
+        :return: bool
+        """
+
+        index = self._filter_model.mapFromSource(self._model.index_of(asset_id))
+        if not index.isValid():
+            return False
+
+        return self._list_view.viewport().rect().intersects(self._list_view.visualRect(index))
+
+    def create_asset_info(self, asset_item):
+        """
+        Returns the widget that shows the info of the given asset
+        :param asset_item: AssetItem
+        :return: AssetInfoWidget or None
+        """
+
+        from artellapipe.widgets import assetinfo
+
+        try:
+            return assetinfo.AssetInfoWidget(asset_item)
+        except Exception as exc:
+            LOGGER.warning('Impossible to create info widget of asset "{}": {}'.format(asset_item.get_name(), exc))
+            return None
+
+    def _count_asset_types(self, items, increment=1):
+        """
+        Internal function that updates the number of assets of each type with the given items, so asset types are
+        updated without walking all the items of the model each time assets are added
+        :param items: list(AssetItem)
+        :param increment: int, 1 if the items were added; -1 if they were removed
+        """
+
+        for item in items:
+            if item and item.asset_type:
+                self._asset_type_counts[item.asset_type] = self._asset_type_counts.get(item.asset_type, 0) + increment
+
+    def _update_asset_types(self):
+        """
+        Internal function that updates the asset types that can be used to filter assets
+        """
+
+        asset_types = sorted(asset_type for asset_type, count in self._asset_type_counts.items() if count > 0)
+        current_types = [self._types_combo.itemData(i) for i in range(1, self._types_combo.count())]
+        if asset_types == current_types:
+            return
+
+        current_type = self._types_combo.itemData(self._types_combo.currentIndex())
+        self._types_combo.blockSignals(True)
+        try:
+            self._types_combo.clear()
+            self._types_combo.addItem('All', None)
+            for asset_type in asset_types:
+                self._types_combo.addItem(asset_type.title(), asset_type)
+            current_index = self._types_combo.findData(current_type) if current_type else 0
+            self._types_combo.setCurrentIndex(max(0, current_index))
+        finally:
+            self._types_combo.blockSignals(False)
+        self._filter_model.set_asset_type(self._types_combo.itemData(self._types_combo.currentIndex()))
+
+    def _cancel_hidden_thumbnails(self):
+        """
+        Internal function that cancels the pending thumbnail loads of the assets that left the viewport
+        """
+
+        if self._thumbnail_loader:
+            self._thumbnail_loader.cancel_hidden(self.get_visible_asset_ids(), self._thumbnail_group)
+
+    def _on_thumbnail_ready(self, asset_id):
+        """
+        Internal callback function that is called when the thumbnail of an asset is loaded
+        :param asset_id: str
+        """
+
+        self._model.notify_changed(asset_id, [Qt.DecorationRole])
+
+    def _on_asset_type_changed(self, index):
+        """
+        Internal callback function that is called when the asset type filter changes
+        :param index: int
+        """
+
+        self._filter_model.set_asset_type(self._types_combo.itemData(index))
+
+    def _on_index_clicked(self, index):
+        """
+        Internal callback function that is called when an asset of the viewer is clicked
+        :param index: QModelIndex
+        """
+
+        asset_item = index.data(AssetsListModel.ItemRole)
+        if asset_item:
+            self.assetClicked.emit(asset_item)
+
+    def _on_context_menu_requested(self, pos):
+        """
+        Internal callback function that is called when the context menu of an asset is requested
+        :param pos: QPoint
+        """
+
+        asset_item = self._list_view.indexAt(pos).data(AssetsListModel.ItemRole)
+        if not asset_item:
+            return
+
+        context_menu = QMenu(self)
+        for file_type in assetstate.get_asset_file_types(asset_item.asset):
+            sync_action = context_menu.addAction('Sync {}'.format(file_type.title()))
+            sync_action.triggered.connect(
+                lambda checked=False, file_type=file_type: self.startSync.emit(
+                    asset_item.asset, file_type, defines.ArtellaFileStatus.ALL))
+        if context_menu.actions():
+            context_menu.addSeparator()
+        sync_all_action = context_menu.addAction('Sync All')
+        sync_all_action.triggered.connect(
+            lambda: self.startSync.emit(asset_item.asset, None, defines.ArtellaFileStatus.ALL))
+
+        context_menu.exec_(self._list_view.viewport().mapToGlobal(pos))
@@ -158,3 +158,29 @@ class ShotsWidget(base.BaseWidget, object):
         """
 
         self._shots_viewer.update_shots()
+
+    def load_shots(self, shots):
+        """
+        Fills the shots viewer with the given shots, without querying Artella
+        :param shots: list(ArtellaShot)
+        """
+
+        self.clear_shots()
+        for shot in shots:
+            self.add_shot(shot)
+
+    def clear_shots(self):
+        """
+        Removes all the shots from the shots viewer
+        """
+
+        self._shots_viewer.clear()
+        self._shots_viewer.first_empty_cell()
+
+    def add_shot(self, shot):
+        """
+        Adds a new shot to the shots viewer
+        :param shot: ArtellaShot
+        """
+
+        self._shots_viewer.add_shot(shot)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the asynchronous loader of assets and shots thumbnails
+"""
+
+from __future__ import print_function, division, absolute_import
+
+__author__ = "Tomas Poveda"
+__license__ = "MIT"
+__maintainer__ = "Tomas Poveda"
+__email__ = "tpovedatd@gmail.com"
+
+import time
+import logging
+
+from Qt.QtCore import *
+from Qt.QtGui import *
+
+from artellapipe.tools.assetsmanager.core import scheduler, metadatacache, thumbnails
+
+LOGGER = logging.getLogger('artellapipe-tools-assetsmanager')
+
+DEFAULT_MAX_PIXMAPS = 512
+
+# Seconds to wait before loading again a thumbnail whose load failed. Images can be synced after the failure
+DEFAULT_RETRY_DELAY = 60.0
+
+
+class ThumbnailLoader(QObject, object):
+    """
+    Loads thumbnails in scheduler consumer threads. Images are decoded already downscaled to the size of the viewer
+    cells and stored in a disk cache, so next loads of the same image only read a small file.
+    Loaded pixmaps are kept in a bounded least recently used cache. Until the thumbnail of an item is ready, None is
+    returned, so viewers can show a placeholder, and thumbnailReady is emitted once it is loaded.
+    Loads are queued in the group of the viewer that requested them, so viewers can cancel the loads of the items
+    that are not visible anymore. Failed loads are retried once the retry delay passes.
+    """
+
+    thumbnailReady = Signal(str)
+    _imageLoaded = Signal(str, str, object, str)
+
+    def __init__(self, job_scheduler, disk_cache, size, max_pixmaps=DEFAULT_MAX_PIXMAPS,
+                 retry_delay=DEFAULT_RETRY_DELAY, clock=None, parent=None):
+        super(ThumbnailLoader, self).__init__(parent)
+
+        self._scheduler = job_scheduler
+        self._disk_cache = disk_cache
+        self._size = QSize(size)
+        self._pixmaps = metadatacache.MetadataCache(max_size=max_pixmaps, ttl=0)
+        self._retry_delay = retry_delay
+        self._clock = clock or time.time
+        self._pending = dict()
+        self._failed = dict()
+
+        # Images are loaded in consumer threads, pixmaps can only be created in the main thread
+        self._imageLoaded.connect(self._on_image_loaded)
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, item_id, source_path, group=None):
+        """
+        Returns the thumbnail of the given item. If it is not loaded yet, its load is requested
+        :param item_id: str, identifier passed to thumbnailReady once the thumbnail is loaded
+        :param source_path: str or None, path of the full resolution image
+        :param group: str or None, scheduler group of the load, used to cancel it with cancel_hidden
+        :return: QPixmap or None
+        """
+
+        if not source_path:
+            return None
+
+        failed_time = self._failed.get(source_path)
+        if failed_time is not None:
+            if self._clock() - failed_time < self._retry_delay:
+                return None
+            self._failed.pop(source_path)
+
+        pixmap = self._pixmaps.get(source_path)
+        if pixmap is not None:
+            return pixmap
+
+        if (item_id, source_path) not in self._pending:
+            job_uid = self._scheduler.queue_work(
+                lambda: self._load_image(source_path), priority=scheduler.JobPriority.PREFETCH, group=group,
+                callback=lambda job: self._imageLoaded.emit(
+                    item_id, source_path, job.result, job.error or ''))
+            self._pending[(item_id, source_path)] = (job_uid, group)
+
+        return None
+
+    def cancel_hidden(self, visible_item_ids, group):
+        """
+        Cancels the pending loads of the given group whose items are not visible anymore. Loads that already started
+        are not cancelled. Items request their thumbnail again once they are painted
+        :param visible_item_ids: list(str)
+        :param group: str
+        :return: int, number of cancelled loads
+        """
+
+        visible_item_ids = set(visible_item_ids)
+        cancelled = 0
+        for (item_id, source_path), (job_uid, job_group) in list(self._pending.items()):
+            if job_group != group or item_id in visible_item_ids:
+                continue
+            if self._scheduler.cancel(job_uid):
+                self._pending.pop((item_id, source_path))
+                cancelled += 1
+
+        return cancelled
+
+    def clear(self):
+        """
+        Removes all the loaded pixmaps from memory and cancels pending loads. Disk cache is kept
+        """
+
+        for job_uid, _ in self._pending.values():
+            self._scheduler.cancel(job_uid)
+        self._pending.clear()
+        self._pixmaps.clear()
+        self._failed.clear()
+
+    def _load_image(self, source_path):
+        """
+        Internal function, executed in a scheduler consumer thread, that returns the downscaled image of the given
+        source image, reading it from disk cache if possible
+        :param source_path: str
+        :return: QImage or None
+        """
+
+        cache_key = self._disk_cache.get_key(source_path, self._size.width(), self._size.height())
+        if not cache_key:
+            return None
+
+        cached_path = self._disk_cache.get(cache_key)
+        if cached_path:
+            image = QImage(cached_path)
+            if not image.isNull():
+                return image
+
+        image_reader = QImageReader(source_path)
+        source_size = image_reader.size()
+        if source_size.isValid():
+            # Images are decoded already downscaled, so full resolution images are never kept in memory
+            image_reader.setScaledSize(source_size.scaled(self._size, Qt.KeepAspectRatio))
+        image = image_reader.read()
+        if image.isNull():
+            raise RuntimeError('Impossible to read image "{}": {}'.format(source_path, image_reader.errorString()))
+        if image.width() > self._size.width() or image.height() > self._size.height():
+            image = image.scaled(self._size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        try:
+            image.save(self._disk_cache.prepare_path(cache_key), thumbnails.THUMBNAIL_FORMAT.upper())
+        except Exception as exc:
+            LOGGER.warning('Impossible to store thumbnail of "{}" in disk cache: {}'.format(source_path, exc))
+
+        return image
+
+    def _on_image_loaded(self, item_id, source_path, image, error):
+        """
+        Internal callback function that is called in the main thread when an image is loaded
+        :param item_id: str
+        :param source_path: str
+        :param image: QImage or None
+        :param error: str
+        """
+
+        self._pending.pop((item_id, source_path), None)
+        if error or image is None:
+            if error:
+                LOGGER.debug('Impossible to load thumbnail "{}": {}'.format(source_path, error))
+            self._failed[source_path] = self._clock()
+            return
+
+        self._pixmaps.set(source_path, QPixmap.fromImage(image))
+        self.thumbnailReady.emit(item_id)
@@ -0,0 +1,137 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for artellapipe-tools-assetsmanager assets index
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from artellapipe.tools.assetsmanager.core import assetindex, assetlookup, assetstate
+
+
+def test_index_stores_asset_state(tmp_path):
+    index = assetindex.AssetStateIndex(str(tmp_path / 'index.db'))
+    index.update_asset('prop_a', name='Prop A', asset_type='Prop')
+    index.mark_synced('prop_a', ['rig'], server_states={'rig': {'version': 3, 'locked': True}}, timestamp=10.0)
+
+    asset_data = index.get_asset('prop_a')
+    assert asset_data['asset_type'] == 'Prop'
+    assert asset_data['last_sync'] == 10.0
+    assert asset_data['files']['rig']['local_version'] == '3'
+    assert asset_data['files']['rig']['locked'] == 1
+    assert index.get_asset_types() == ['Prop']
+    assert index.get_sync_summary(['prop_a', 'missing']) == {'synced': 1, 'oldest_sync': 10.0}
+
+    index.update_asset('prop_b', name='Prop B', asset_type='Prop')
+    index.remove_assets(['prop_a', 'missing'])
+    assert index.get_asset('prop_a') is None
+    assert not index.get_files('prop_a')
+    assert [asset_data['asset_id'] for asset_data in index.get_assets()] == ['prop_b']
+    index.close()
+
+
+def test_index_uses_wal_and_is_shared_between_instances(tmp_path):
+    db_path = str(tmp_path / 'index.db')
+    first_index = assetindex.AssetStateIndex(db_path)
+    second_index = assetindex.AssetStateIndex(db_path)
+    connection = first_index._get_connection()
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    def _write(index, prefix):
+        for i in range(50):
+            index.update_asset('{}_{}'.format(prefix, i), asset_type=prefix)
+
+    threads = [
+        threading.Thread(target=_write, args=(first_index, 'Prop')),
+        threading.Thread(target=_write, args=(second_index, 'Character'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(first_index.get_assets()) == 100
+    assert len(second_index.get_assets(asset_type='Prop')) == 50
+    first_index.close()
+    second_index.close()
+
+
+def test_index_stores_remote_versions_and_closes_connections_of_all_threads(tmp_path):
+    index = assetindex.AssetStateIndex(str(tmp_path / 'index.db'))
+    index.mark_synced('prop_a', ['rig'], server_states={'rig': {'version': 3}}, timestamp=10.0)
+    index.update_remote_versions({
+        'prop_a': {'rig': {'version': 4, 'locked': False}},
+        'prop_b': {'model': {'version': 1}, 'rig': None}})
+
+    files = index.get_files('prop_a')
+    assert (files['rig']['local_version'], files['rig']['remote_version']) == ('3', '4')
+    assert files['rig']['last_sync'] == 10.0
+    files = index.get_files('prop_b')
+    assert list(files.keys()) == ['model']
+    assert (files['model']['local_version'], files['model']['remote_version']) == (None, '1')
+
+    connections = list()
+    thread = threading.Thread(target=lambda: connections.append(index._get_connection()))
+    thread.start()
+    thread.join()
+    index.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute('SELECT 1')
+
+
+class FakeAsset(object):
+    def __init__(self, asset_id, category):
+        self._id = asset_id
+        self._category = category
+
+    def get_id(self):
+        return self._id
+
+    def get_category(self):
+        return self._category
+
+
+def test_assets_lookup_filters_by_type_file_type_and_sync_status(tmp_path):
+    file_types = {'Prop': ['model', 'rig'], 'Character': ['model', 'groom']}
+    lookup = assetlookup.AssetsLookup(file_types_fn=lambda asset: file_types[asset.get_category()])
+    lookup.add_assets([FakeAsset('prop_a', 'Prop'), FakeAsset('char_a', 'Character'), FakeAsset('prop_b', 'Prop')])
+
+    index = assetindex.AssetStateIndex(str(tmp_path / 'index.db'))
+    index.mark_synced('prop_a', ['rig', 'model'])
+    index.mark_synced('char_a', ['model'])
+    index.invalidate_file('prop_a', 'model')
+    lookup.load_synced_files(index.get_synced_files())
+    index.close()
+
+    def _ids(assets):
+        return [asset.get_id() for asset in assets]
+
+    assert _ids(lookup.get_assets(asset_type='Prop')) == ['prop_a', 'prop_b']
+    assert _ids(lookup.get_assets(file_type='groom')) == ['char_a']
+    assert _ids(lookup.get_assets(file_type='model', synced=True)) == ['char_a']
+    assert _ids(lookup.get_assets(asset_type='Prop', synced=False)) == ['prop_b']
+
+    lookup.mark_synced('prop_b', ['model'])
+    lookup.mark_outdated('char_a')
+    lookup.remove('prop_a')
+    assert _ids(lookup.get_assets(file_type='model', synced=True)) == ['prop_b']
+    assert sorted(lookup.get_asset_types()) == ['Character', 'Prop']
+
+
+def test_whole_asset_syncs_mark_all_asset_file_types_as_synced(monkeypatch):
+    file_types = {'Prop': ['model', 'rig']}
+    lookup = assetlookup.AssetsLookup(file_types_fn=lambda asset: file_types[asset.get_category()])
+    lookup.add_assets([FakeAsset('prop_a', 'Prop'), FakeAsset('prop_b', 'Prop')])
+
+    lookup.mark_synced('prop_a', [None])
+    assert [asset.get_id() for asset in lookup.get_assets(synced=True)] == ['prop_a']
+    assert lookup.is_synced('prop_a', 'model') and lookup.is_synced('prop_a', 'rig')
+    assert not lookup.is_synced('prop_b')
+
+    monkeypatch.setattr(assetstate, 'get_asset_file_types', lambda asset: file_types[asset.get_category()])
+    assert assetstate.get_synced_file_types(FakeAsset('prop_b', 'Prop'), [None]) == ['model', 'rig']
+    assert assetstate.get_synced_file_types(FakeAsset('prop_b', 'Prop'), ['rig', None]) == ['rig', 'model']
+    assert assetstate.get_synced_file_types(FakeAsset('prop_b', 'Prop'), ['rig']) == ['rig']
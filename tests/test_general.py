@@ -5,10 +5,145 @@
 Module that contains general tests for artellapipe-tools-assetsmanager
 """
 
-import pytest
+import sys
+import json
+import subprocess
 
 from artellapipe.tools.assetsmanager import __version__
 
+# Modules that must only be loaded once the tool UI is created or files are verified
+HEAVY_MODULES = ('Qt', 'tpDcc', 'artellapipe.widgets', 'artellapipe.tools.assetsmanager.widgets', 'multiprocessing')
+
+# Packages whose modules are imported when the tool is registered. Must match import_order of the tool config
+REGISTERED_PACKAGES = ('artellapipe.tools.assetsmanager.core', )
+
+# Importing the tool modules can take, at most, this number of times the import of the modules they depend on
+IMPORT_TIME_FACTOR = 4.0
+
+# Number of times imports are measured. Fastest measurement is used, so other processes do not affect the results
+IMPORT_TIME_RUNS = 3
+
+# artellapipe core is not installed in CI, so it is replaced by a stub that only defines what the tool modules use
+STUB_ARTELLAPIPE_CORE = (
+    'import sys, types\n'
+    'core = types.ModuleType("artellapipe.core")\n'
+    'tool = types.ModuleType("artellapipe.core.tool")\n'
+    'defines = types.ModuleType("artellapipe.core.defines")\n'
+    'class ArtellaTool(object):\n'
+    '    def __init__(self, *args, **kwargs):\n'
+    '        pass\n'
+    '    @classmethod\n'
+    '    def config_dict(cls, file_name=None):\n'
+    '        return {"name": "Tool", "file_name": file_name, "tags": list()}\n'
+    'class ArtellaToolset(object):\n'
+    '    def __init__(self, *args, **kwargs):\n'
+    '        pass\n'
+    'class ArtellaToolWidget(object):\n'
+    '    pass\n'
+    'tool.ArtellaTool, tool.ArtellaToolset, tool.ArtellaToolWidget = ArtellaTool, ArtellaToolset, ArtellaToolWidget\n'
+    'core.tool, core.defines = tool, defines\n'
+    'sys.modules.update({"artellapipe.core": core, "artellapipe.core.tool": tool})\n'
+    'sys.modules["artellapipe.core.defines"] = defines\n'
+)
+
+
+def _run_in_clean_interpreter(code):
+    """
+    Runs the given code in a new interpreter, with artellapipe core stubbed, and returns the JSON data it prints
+    :param code: str
+    :return: object
+    """
+
+    output = subprocess.check_output([sys.executable, '-c', STUB_ARTELLAPIPE_CORE + code])
+
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def _import_in_clean_interpreter(module_names=None, package_names=None):
+    """
+    Imports given modules, and all the modules of the given packages, in a new interpreter and returns the heavy
+    modules they loaded, the time the import took and the top level modules, not part of artellapipe, they loaded
+    :param module_names: list(str) or None
+    :param package_names: list(str) or None
+    :return: tuple(list(str), float, list(str))
+    """
+
+    return _run_in_clean_interpreter((
+        'import json, time, pkgutil, importlib\n'
+        'loaded = set(sys.modules)\n'
+        'start = time.time()\n'
+        'module_names = list({!r})\n'
+        'for package_name in {!r}:\n'
+        '    package = importlib.import_module(package_name)\n'
+        '    module_names.extend(name for _, name, _ in pkgutil.iter_modules(package.__path__, package_name + "."))\n'
+        'for module_name in module_names:\n'
+        '    importlib.import_module(module_name)\n'
+        'elapsed = time.time() - start\n'
+        'new_modules = set(sys.modules) - loaded\n'
+        'heavy = sorted(m for m in new_modules if m.startswith({!r}))\n'
+        'dependencies = sorted(set(m.split(".")[0] for m in new_modules) - set(["artellapipe"]))\n'
+        'print(json.dumps([heavy, elapsed, dependencies]))\n').format(
+            list(module_names or list()), list(package_names or list()), HEAVY_MODULES))
+
+
+def _get_import_time(module_names):
+    """
+    Returns the time that importing the given modules takes in a new interpreter
+    :param module_names: list(str)
+    :return: float
+    """
+
+    return _run_in_clean_interpreter((
+        'import json, time, importlib\n'
+        'start = time.time()\n'
+        'for module_name in {!r}:\n'
+        '    importlib.import_module(module_name)\n'
+        'print(json.dumps(time.time() - start))\n').format(list(module_names)))
+
 
 def test_version():
     assert __version__.get_version()
+
+
+def test_core_import_is_light():
+    heavy_modules, _, _ = _import_in_clean_interpreter(module_names=['artellapipe.tools.assetsmanager.core.headless'])
+
+    assert not heavy_modules
+
+
+def test_tool_registration_import_is_light():
+    heavy_modules, _, _ = _import_in_clean_interpreter(package_names=REGISTERED_PACKAGES)
+
+    assert not heavy_modules
+
+
+def test_tool_config_is_built_once():
+    tool_config = _run_in_clean_interpreter(
+        'import json\n'
+        'from artellapipe.tools.assetsmanager.core import assetsmanager\n'
+        'calls = list()\n'
+        'build_config_dict = assetsmanager.AssetsManagerTool._build_config_dict\n'
+        'assetsmanager.AssetsManagerTool._build_config_dict = classmethod(\n'
+        '    lambda cls, file_name=None: calls.append(file_name) or build_config_dict.__func__(cls, file_name))\n'
+        'config = assetsmanager.AssetsManagerTool.config_dict()\n'
+        'config["tags"].append("changed")\n'
+        'config = assetsmanager.AssetsManagerTool.config_dict()\n'
+        'print(json.dumps([len(calls), config["import_order"], config["tags"]]))\n')
+
+    assert tool_config == [1, ['core'], ['assets', 'manager']]
+
+
+def test_tool_registration_import_time():
+    """
+    Import time of the tool modules is compared with the import time of the modules they depend on (standard library
+    ones), measured in the same machine, so the benchmark does not depend on how fast the machine is
+    """
+
+    import_times = list()
+    dependencies = list()
+    for _ in range(IMPORT_TIME_RUNS):
+        _, elapsed, dependencies = _import_in_clean_interpreter(package_names=REGISTERED_PACKAGES)
+        import_times.append(elapsed)
+    baseline_times = [_get_import_time(dependencies) for _ in range(IMPORT_TIME_RUNS)]
+
+    assert min(import_times) <= IMPORT_TIME_FACTOR * min(baseline_times)
@@ -0,0 +1,242 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for artellapipe-tools-assetsmanager assets metadata functionality
+"""
+
+import threading
+
+from artellapipe.tools.assetsmanager.core import scheduler, batchfetch, metadatacache, snapshot, tokens, prefetch
+from artellapipe.tools.assetsmanager.core import actionqueue, timeslice, thumbnails
+
+
+class FakeAsset(object):
+    def __init__(self, name):
+        self._name = name
+
+    def get_id(self):
+        return self._name
+
+
+def test_batch_fetcher_coalesces_requests_in_a_single_job():
+    calls = list()
+    results = dict()
+    done = threading.Event()
+
+    def _fetch(assets):
+        calls.append(sorted(asset.get_id() for asset in assets))
+        return dict((asset.get_id(), 'data_{}'.format(asset.get_id())) for asset in assets)
+
+    def _on_fetched(asset, data, error):
+        results.setdefault(asset.get_id(), list()).append(data)
+        if sum(len(values) for values in results.values()) == 4:
+            done.set()
+
+    job_scheduler = scheduler.JobScheduler(consumers=1, reserved_consumers=0)
+    job_scheduler.start()
+    fetcher = batchfetch.BatchMetadataFetcher(job_scheduler, fetch_fn=_fetch, window=0.05)
+    asset_a, asset_b, asset_c = FakeAsset('a'), FakeAsset('b'), FakeAsset('c')
+    for asset in (asset_a, asset_b, asset_a, asset_c):
+        fetcher.request(asset, _on_fetched, priority=scheduler.JobPriority.PREFETCH)
+
+    assert done.wait(5)
+    assert calls == [['a', 'b', 'c']]
+    assert results['a'] == ['data_a', 'data_a']
+    assert results['c'] == ['data_c']
+
+    # Interactive requests are not delayed by the batch window, but requests done at the same time are still merged
+    fetcher = batchfetch.BatchMetadataFetcher(job_scheduler, fetch_fn=_fetch, window=60, interactive_window=0.05)
+    clicked = threading.Event()
+    asset_d = FakeAsset('d')
+    for asset in (asset_d, FakeAsset('e'), asset_d):
+        fetcher.request(asset, lambda asset, data, error: clicked.set())
+    assert clicked.wait(5)
+    job_scheduler.stop()
+    assert calls[1:] == [['d', 'e']]
+
+
+def test_metadata_cache_evicts_least_recently_used_entries():
+    cache = metadatacache.MetadataCache(max_size=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 1
+
+
+def test_metadata_cache_expires_and_invalidates_entries():
+    now = [100.0]
+    cache = metadatacache.MetadataCache(ttl=10, clock=lambda: now[0])
+    cache.set('a', 'data')
+    cache.set('b', 'data')
+    assert 'a' in cache
+
+    now[0] += 11
+    assert cache.get('a') is None
+    cache.set('a', 'new_data')
+    assert cache.get('a') == 'new_data'
+    assert cache.invalidate('a')
+    assert cache.get('a') is None
+
+
+def test_assets_snapshot_roundtrip_and_diff(tmp_path):
+    assets_snapshot = snapshot.AssetsSnapshot(str(tmp_path / 'snapshot.json'))
+    assert assets_snapshot.load() is None
+
+    old_entries = [
+        {'id': 'a', 'name': 'A', 'type': 'Prop', 'data': {'path': '/a'}},
+        {'id': 'b', 'name': 'B', 'type': 'Prop', 'data': {'path': '/b'}}]
+    assert assets_snapshot.save(old_entries)
+    assert assets_snapshot.load() == old_entries
+
+    new_entries = [
+        {'id': 'b', 'name': 'B', 'type': 'Prop', 'data': {'path': '/b2'}},
+        {'id': 'c', 'name': 'C', 'type': 'Character', 'data': {'path': '/c'}}]
+    assert snapshot.diff_entries(old_entries, new_entries) == (['c'], ['a'], ['b'])
+
+
+def test_entries_map_skips_items_that_cannot_be_serialized():
+    class FakeShot(FakeAsset):
+        def get_name(self):
+            return self._name
+
+        @property
+        def data(self):
+            if self._name == 'broken':
+                raise ValueError('Shot data is not valid')
+            return {'name': self._name}
+
+    shots = [FakeShot('sh010'), FakeShot('broken'), FakeShot('sh020'), FakeShot('sh030')]
+    entries, shots_map = snapshot.get_entries_map(shots, entry_fn=snapshot.get_shot_entry)
+
+    assert [entry['id'] for entry in entries] == ['sh010', 'sh020', 'sh030']
+    assert [entry['data'] for entry in entries] == [{'name': 'sh010'}, {'name': 'sh020'}, {'name': 'sh030'}]
+    assert dict((shot_id, shot.get_name()) for shot_id, shot in shots_map.items()) == {
+        'sh010': 'sh010', 'sh020': 'sh020', 'sh030': 'sh030'}
+    assert snapshot.get_shots_entries(shots) == entries
+
+
+def test_request_tracker_supersedes_previous_requests():
+    tracker = tokens.RequestTracker()
+    first_token = tracker.issue('asset_info')
+    second_token = tracker.issue('asset_info')
+
+    assert first_token.is_cancelled()
+    assert not tracker.is_current(first_token)
+    assert tracker.is_current(second_token.uid, channel='asset_info')
+
+    tracker.finish(second_token)
+    assert not tracker.is_current(second_token)
+    assert not second_token.is_cancelled()
+
+
+def test_prefetcher_warms_cache_of_neighbour_assets():
+    requests = list()
+
+    class _Fetcher(object):
+        def request(self, asset, callback, priority):
+            requests.append((asset.get_id(), priority))
+            callback(asset, 'data_{}'.format(asset.get_id()), None)
+
+    ordered_ids = ['a', 'b', 'c', 'd', 'e']
+    assert prefetch.get_neighbours(ordered_ids, 'c', radius=1) == ['d', 'b']
+    assert prefetch.get_neighbours(ordered_ids, 'a', radius=2) == ['b', 'c']
+    assert prefetch.get_neighbours(ordered_ids, 'z') == list()
+
+    cache = metadatacache.MetadataCache()
+    cache.set('b', 'cached')
+    prefetcher = prefetch.AssetPrefetcher(_Fetcher(), cache, max_prefetch=2)
+    assert prefetcher.prefetch([FakeAsset(asset_id) for asset_id in ('b', 'c', 'd', 'e')]) == 2
+    assert requests == [('c', scheduler.JobPriority.PREFETCH), ('d', scheduler.JobPriority.PREFETCH)]
+    assert cache.get('c') == 'data_c'
+
+    prefetcher.set_enabled(False)
+    assert prefetcher.prefetch([FakeAsset('e')]) == 0
+
+
+def test_pending_actions_are_persisted_without_duplicates(tmp_path):
+    queue_path = str(tmp_path / 'pending_actions.json')
+    pending_actions = actionqueue.PendingActionsQueue(queue_path)
+    assert pending_actions.enqueue(actionqueue.SYNC_ACTION, asset='a', file_type='rig', sync_type='all')
+    assert not pending_actions.enqueue(actionqueue.SYNC_ACTION, asset='a', file_type='rig', sync_type='all')
+    assert pending_actions.enqueue(actionqueue.SYNC_ACTION, asset='b', file_type=None, sync_type='all')
+
+    restored_actions = actionqueue.PendingActionsQueue(queue_path)
+    assert restored_actions.remove(restored_actions.get_actions()[:1]) == 1
+    assert [action['params']['asset'] for action in actionqueue.PendingActionsQueue(queue_path).get_actions()] == ['b']
+    assert restored_actions.enqueue(actionqueue.SYNC_ACTION, asset='a', file_type='rig', sync_type='all')
+
+    restored_actions = actionqueue.PendingActionsQueue(queue_path)
+    actions = restored_actions.take_all()
+    assert [action['params']['asset'] for action in actions] == ['b', 'a']
+    assert not len(restored_actions)
+    assert not len(actionqueue.PendingActionsQueue(queue_path))
+
+
+def test_pending_actions_are_queued_at_once(tmp_path, monkeypatch):
+    queue_path = str(tmp_path / 'pending_actions.json')
+    pending_actions = actionqueue.PendingActionsQueue(queue_path)
+    assert pending_actions.enqueue(actionqueue.SYNC_ACTION, asset='a', file_type=None, sync_type='all')
+
+    saves = list()
+    write_json = actionqueue.utils.write_json
+    monkeypatch.setattr(actionqueue.utils, 'write_json', lambda *args: saves.append(args) or write_json(*args))
+    params_list = [{'asset': asset_id, 'file_type': None, 'sync_type': 'all'} for asset_id in ('a', 'b', 'c', 'b')]
+    assert pending_actions.enqueue_many(actionqueue.SYNC_ACTION, params_list) == 2
+    assert len(saves) == 1
+    assert not pending_actions.enqueue_many(actionqueue.SYNC_ACTION, params_list)
+    assert len(saves) == 1
+
+    restored_actions = actionqueue.PendingActionsQueue(queue_path)
+    assert [action['params']['asset'] for action in restored_actions.get_actions()] == ['a', 'b', 'c']
+    assert not restored_actions.enqueue(actionqueue.SYNC_ACTION, sync_type='all', file_type=None, asset='c')
+
+
+def test_time_sliced_queue_respects_slice_budgets():
+    clock = [0.0]
+    processed = list()
+
+    def _process(item):
+        if item == 3:
+            raise RuntimeError('Invalid item')
+        processed.append(item)
+        clock[0] += 0.01
+
+    queue = timeslice.TimeSlicedQueue(
+        _process, slice_budget=0.02, first_slice_budget=0.05, clock=lambda: clock[0])
+    queue.extend(range(12))
+
+    assert queue.process_slice()
+    assert queue.processed == 6
+    assert queue.process_slice()
+    assert queue.processed == 8
+    queue.flush()
+    assert queue.is_done() and queue.processed == queue.total == 12
+    assert processed == [i for i in range(12) if i != 3]
+
+    queue.extend(['a'])
+    assert queue.total == 1 and not queue.process_slice()
+
+
+def test_thumbnail_disk_cache_is_keyed_by_content_and_size(tmp_path):
+    source_path = tmp_path / 'thumb.png'
+    source_path.write_bytes(b'image')
+    disk_cache = thumbnails.ThumbnailDiskCache(str(tmp_path / 'cache'))
+
+    key = disk_cache.get_key(str(source_path), 112, 112)
+    assert key == disk_cache.get_key(str(source_path), 112, 112)
+    assert key != disk_cache.get_key(str(source_path), 64, 64)
+    assert disk_cache.get(key) is None
+    with open(disk_cache.prepare_path(key), 'wb') as fh:
+        fh.write(b'thumbnail')
+    assert disk_cache.get(key) == disk_cache.get_path(key)
+
+    source_path.write_bytes(b'other image')
+    assert disk_cache.get_key(str(source_path), 112, 112) != key
+    assert disk_cache.get_key(str(tmp_path / 'missing.png'), 112, 112) is None
@@ -0,0 +1,152 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for artellapipe-tools-assetsmanager Artella calls resilience
+"""
+
+import errno
+
+import pytest
+
+from artellapipe.tools.assetsmanager.core import resilience, assetstate
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, code):
+        super(FakeHTTPError, self).__init__('HTTP Error {}'.format(code))
+        self.code = code
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_caller_retries_transient_errors_with_backoff():
+    clock = FakeClock()
+    calls = list()
+
+    def _flaky():
+        calls.append(clock.now)
+        if len(calls) < 3:
+            raise IOError(errno.ECONNRESET, 'Connection reset by peer')
+        return 'data'
+
+    caller = resilience.ResilientCaller(
+        retry_policy=resilience.RetryPolicy(max_attempts=3, base_delay=1.0, rand=lambda: 1.0), sleep=clock.sleep)
+    assert caller.call(_flaky) == 'data'
+    assert calls == [0.0, 1.0, 3.0]
+
+    def _not_found():
+        calls.append(clock.now)
+        raise ValueError('Asset not found')
+
+    del calls[:]
+    with pytest.raises(ValueError):
+        caller.call(_not_found)
+    assert len(calls) == 1
+
+
+def test_circuit_breaker_fails_fast_and_probes_after_timeout():
+    clock = FakeClock()
+    states = list()
+    breaker = resilience.CircuitBreaker(
+        failure_threshold=2, reset_timeout=30, clock=clock.time, state_callback=lambda old, new: states.append(new))
+    caller = resilience.ResilientCaller(
+        retry_policy=resilience.RetryPolicy(max_attempts=1), circuit_breaker=breaker, sleep=clock.sleep)
+
+    def _down():
+        raise FakeHTTPError(503)
+
+    for _ in range(2):
+        with pytest.raises(FakeHTTPError):
+            caller.call(_down)
+    assert breaker.is_open()
+    with pytest.raises(resilience.CircuitOpenError):
+        caller.call(lambda: 'data')
+
+    clock.now += 30
+    assert breaker.state == resilience.CircuitBreaker.HALF_OPEN
+    assert caller.call(lambda: 'data') == 'data'
+    assert states == [resilience.CircuitBreaker.OPEN, resilience.CircuitBreaker.CLOSED]
+
+
+def test_only_network_errors_and_retryable_http_status_are_transient():
+    assert resilience.is_transient_error(IOError(errno.ECONNRESET, 'Connection reset by peer'))
+    assert resilience.is_transient_error(FakeHTTPError(429))
+    assert not resilience.is_transient_error(FakeHTTPError(404))
+    assert not resilience.is_transient_error(ValueError('Invalid connection settings'))
+    assert not resilience.is_transient_error(IOError(errno.EACCES, 'Permission denied: asset_502.ma'))
+
+
+def test_transient_errors_in_batch_fetch_trip_circuit_breaker(monkeypatch):
+    class _Asset(object):
+        def __init__(self, name, error=None):
+            self._name = name
+            self._error = error
+
+        def get_id(self):
+            return self._name
+
+        def get_artella_data(self):
+            if self._error:
+                raise self._error
+            return {'name': self._name}
+
+    monkeypatch.setattr(assetstate, '_get_bulk_artella_data_getter', lambda: None)
+    clock = FakeClock()
+    breaker = resilience.CircuitBreaker(failure_threshold=3, clock=clock.time)
+    caller = resilience.ResilientCaller(
+        retry_policy=resilience.RetryPolicy(max_attempts=3, rand=lambda: 0.0), circuit_breaker=breaker,
+        sleep=clock.sleep)
+    assets = [_Asset('asset0'), _Asset('asset1', error=FakeHTTPError(503)), _Asset('asset2')]
+
+    assets_data = assetstate.get_assets_artella_data(assets, caller=caller)
+    assert assets_data['asset0'] == {'name': 'asset0'}
+    assert isinstance(assets_data['asset1'], FakeHTTPError)
+    assert isinstance(assets_data['asset2'], resilience.CircuitOpenError)
+    assert breaker.is_open()
+
+
+def test_only_server_errors_close_half_open_circuit():
+    clock = FakeClock()
+    breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock.time)
+    caller = resilience.ResilientCaller(
+        retry_policy=resilience.RetryPolicy(max_attempts=1), circuit_breaker=breaker, sleep=clock.sleep)
+
+    def _raise(exc):
+        raise exc
+
+    with pytest.raises(FakeHTTPError):
+        caller.call(_raise, args=[FakeHTTPError(503)])
+    clock.now += 30
+
+    # Local bugs do not prove Artella is available, but the next call can still probe it
+    with pytest.raises(AttributeError):
+        caller.call(_raise, args=[AttributeError('NoneType has no attribute references')])
+    assert breaker.state == resilience.CircuitBreaker.HALF_OPEN
+    with pytest.raises(FakeHTTPError):
+        caller.call(_raise, args=[FakeHTTPError(404)])
+    assert breaker.state == resilience.CircuitBreaker.CLOSED
+
+
+def test_server_state_reads_go_through_caller():
+    class _Asset(object):
+        def get_artella_data(self):
+            raise FakeHTTPError(503)
+
+    clock = FakeClock()
+    breaker = resilience.CircuitBreaker(failure_threshold=2, clock=clock.time)
+    caller = resilience.ResilientCaller(
+        retry_policy=resilience.RetryPolicy(max_attempts=2, rand=lambda: 0.0), circuit_breaker=breaker,
+        sleep=clock.sleep)
+
+    assert assetstate.get_server_files_state(_Asset(), ['model'], caller=caller) == dict()
+    assert breaker.is_open()
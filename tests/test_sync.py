@@ -0,0 +1,452 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for artellapipe-tools-assetsmanager sync functionality
+"""
+
+import os
+import time
+import threading
+
+import pytest
+
+from artellapipe.tools.assetsmanager.core import scheduler, syncengine, manifest, journal, planner, assetstate, registry
+
+
+class FakeAsset(object):
+    def __init__(self, name, fail=False, versions=None):
+        self._name = name
+        self._fail = fail
+        self.versions = versions or dict()
+        self.synced = list()
+
+    def get_id(self):
+        return self._name
+
+    def get_name(self):
+        return self._name
+
+    def sync(self, file_type=None, sync_type=None):
+        if self._fail:
+            raise RuntimeError('Server not available')
+        self.synced.append((file_type, sync_type))
+
+    def get_server_file_state(self, file_type):
+        return {'version': self.versions[file_type], 'checksum': 'md5_{}'.format(self.versions[file_type])}
+
+
+def test_sync_engine_syncs_all_assets():
+    assets = [FakeAsset('asset{}'.format(i)) for i in range(20)]
+    progress = list()
+    engine = syncengine.SyncEngine(max_workers=4)
+    batch = engine.sync_assets(
+        assets, file_type='rig', sync_type='all', progress_callback=lambda b, job, error: progress.append(job))
+
+    assert batch.wait(5)
+    assert len(batch.completed) == 20
+    assert not batch.failed
+    assert len(progress) == 20
+    assert all(asset.synced == [('rig', 'all')] for asset in assets)
+
+
+def test_sync_engine_reports_failures():
+    assets = [FakeAsset('good'), FakeAsset('bad', fail=True)]
+    finished = threading.Event()
+    engine = syncengine.SyncEngine(max_workers=2)
+    batch = engine.sync_assets(assets, finished_callback=lambda b: finished.set())
+
+    assert finished.wait(5)
+    assert [job.asset_id for job in batch.completed] == ['good']
+    assert [job.asset_id for job, _ in batch.failed] == ['bad']
+
+
+def test_sync_engine_respects_max_workers():
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    class SlowAsset(FakeAsset):
+        def sync(self, file_type=None, sync_type=None):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            threading.Event().wait(0.01)
+            with lock:
+                state['running'] -= 1
+
+    engine = syncengine.SyncEngine(max_workers=3)
+    batch = engine.sync_assets([SlowAsset('asset{}'.format(i)) for i in range(15)])
+
+    assert batch.wait(5)
+    assert 1 < state['peak'] <= 3
+
+
+def test_scheduler_serves_interactive_jobs_first():
+    order = list()
+    gate = threading.Event()
+    job_scheduler = scheduler.JobScheduler(consumers=1, reserved_consumers=0)
+    job_scheduler.queue_work(lambda: gate.wait(5))
+    job_scheduler.start()
+    job_scheduler.queue_work(order.append, 'bulk', priority=scheduler.JobPriority.BULK)
+    job_scheduler.queue_work(order.append, 'prefetch', priority=scheduler.JobPriority.PREFETCH)
+    job_scheduler.queue_work(order.append, 'click1', priority=scheduler.JobPriority.INTERACTIVE)
+    last_uid = job_scheduler.queue_work(order.append, 'click2', priority=scheduler.JobPriority.INTERACTIVE)
+    gate.set()
+
+    job = job_scheduler.get_job(last_uid)
+    assert job.wait(5)
+    while job_scheduler.pending_count():
+        threading.Event().wait(0.01)
+    job_scheduler.stop()
+
+    assert order[:3] == ['click2', 'click1', 'prefetch']
+
+
+def test_scheduler_supersedes_jobs_of_same_group():
+    results = list()
+    gate = threading.Event()
+    job_scheduler = scheduler.JobScheduler(consumers=1, reserved_consumers=0)
+    job_scheduler.queue_work(lambda: gate.wait(5))
+    job_scheduler.queue_work(results.append, 'asset1', group='asset_info', supersede=True)
+    uid = job_scheduler.queue_work(results.append, 'asset2', group='asset_info', supersede=True)
+    job = job_scheduler.get_job(uid)
+    job_scheduler.start()
+    gate.set()
+
+    assert job.wait(5)
+    job_scheduler.stop()
+    assert results == ['asset2']
+
+
+def test_scheduler_reserved_consumer_skips_bulk_jobs():
+    gate = threading.Event()
+    job_scheduler = scheduler.JobScheduler(consumers=2, reserved_consumers=1)
+    job_scheduler.start()
+    job_scheduler.queue_work(lambda: gate.wait(5), priority=scheduler.JobPriority.BULK)
+    job_scheduler.queue_work(lambda: gate.wait(5), priority=scheduler.JobPriority.BULK)
+    served = threading.Event()
+    job_scheduler.queue_work(served.set, priority=scheduler.JobPriority.INTERACTIVE)
+
+    assert served.wait(5)
+    gate.set()
+    job_scheduler.stop()
+
+
+def test_scheduler_interactive_syncs_do_not_block_info_fetches():
+    gate = threading.Event()
+    job_scheduler = scheduler.JobScheduler(consumers=3, reserved_consumers=1, reserved_sync_consumers=1)
+    job_scheduler.start()
+    bulk_started = threading.Event()
+    job_scheduler.queue_work(lambda: bulk_started.set() or gate.wait(5), priority=scheduler.JobPriority.BULK)
+    assert bulk_started.wait(5)
+    job_scheduler.queue_work(lambda: gate.wait(5), priority=scheduler.JobPriority.BULK)
+    synced = threading.Event()
+    job_scheduler.queue_work(lambda: synced.set() or gate.wait(5), priority=scheduler.JobPriority.INTERACTIVE_SYNC)
+    assert synced.wait(5)
+    job_scheduler.queue_work(lambda: gate.wait(5), priority=scheduler.JobPriority.INTERACTIVE_SYNC)
+    served = threading.Event()
+    job_scheduler.queue_work(served.set, priority=scheduler.JobPriority.INTERACTIVE)
+
+    assert served.wait(5)
+    assert job_scheduler.pending_count(scheduler.JobPriority.INTERACTIVE_SYNC) == 1
+    gate.set()
+    job_scheduler.stop()
+
+
+def test_shutdown_drops_pending_syncs_and_stops_consumers():
+    gate = threading.Event()
+
+    class BlockingAsset(FakeAsset):
+        def sync(self, file_type=None, sync_type=None):
+            gate.wait(5)
+
+    job_scheduler = scheduler.JobScheduler(consumers=2, reserved_consumers=1)
+    job_scheduler.start()
+    engine = syncengine.SyncEngine(max_workers=1, job_scheduler=job_scheduler)
+    batch = engine.sync_assets([BlockingAsset('asset{}'.format(i)) for i in range(5)])
+    batch.cancel()
+    engine.shutdown()
+    job_scheduler.stop()
+    gate.set()
+
+    assert batch.wait(5)
+    assert batch.is_cancelled()
+    assert len(batch.failed) == 5
+    for thread in job_scheduler._threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def test_incremental_sync_skips_unchanged_files(tmp_path):
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    assets = [FakeAsset('asset{}'.format(i), versions={'rig': 1}) for i in range(5)]
+    engine = syncengine.SyncEngine(max_workers=2)
+
+    batch = engine.sync_assets(assets, file_type='rig', sync_type='all', manifest=sync_manifest)
+    assert batch.wait(5)
+    assert not batch.skipped
+    assert (tmp_path / 'manifest.json').is_file()
+
+    assets[0].versions['rig'] = 2
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    batch = engine.sync_assets(assets, file_type='rig', sync_type='all', manifest=sync_manifest)
+    assert batch.wait(5)
+    assert len(batch.skipped) == 4
+    assert assets[0].synced == [('rig', 'all'), ('rig', 'all')]
+    assert assets[1].synced == [('rig', 'all')]
+
+
+def test_manifest_save_keeps_entries_of_other_sessions(tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    first_manifest = manifest.SyncManifest(manifest_path, autosave_interval=0)
+    second_manifest = manifest.SyncManifest(manifest_path, autosave_interval=0)
+    first_manifest.update('asset0', 'rig', {'version': 1})
+    first_manifest.update('asset1', 'rig', {'version': 1})
+    first_manifest.save()
+
+    second_manifest.update('asset2', 'rig', {'version': 1})
+    second_manifest.invalidate('asset1')
+    second_manifest.save()
+    assert second_manifest.get('asset0', 'rig')['version'] == 1
+
+    first_manifest.update('asset3', 'model', {'version': 2})
+    first_manifest.save()
+    restored_manifest = manifest.SyncManifest(manifest_path)
+    assert [asset_id for asset_id in ('asset0', 'asset1', 'asset2', 'asset3') if restored_manifest.get(
+        asset_id, 'model' if asset_id == 'asset3' else 'rig')] == ['asset0', 'asset2', 'asset3']
+
+
+def test_incremental_sync_reads_state_from_artella_data_and_syncs_whole_assets(tmp_path, monkeypatch):
+    class _Reference(object):
+        def __init__(self, path, version):
+            self.path = path
+            self.maximum_version = version
+
+    class _ArtellaData(object):
+        def __init__(self, versions):
+            self.references = dict(
+                ('{}.ma'.format(file_type), _Reference('/server/{}.ma'.format(file_type), version))
+                for file_type, version in versions.items())
+
+    class _MetadataAsset(object):
+        def __init__(self, name, versions):
+            self._name = name
+            self.versions = versions
+            self.synced = list()
+
+        def get_id(self):
+            return self._name
+
+        def get_local_file_path(self, file_type):
+            return str(tmp_path / self._name / '{}.ma'.format(file_type))
+
+        def get_artella_data(self):
+            return _ArtellaData(self.versions)
+
+        def sync(self, file_type=None, sync_type=None):
+            self.synced.append((file_type, sync_type))
+            for each_file_type in self.versions:
+                local_path = self.get_local_file_path(each_file_type)
+                if not os.path.isdir(os.path.dirname(local_path)):
+                    os.makedirs(os.path.dirname(local_path))
+                with open(local_path, 'w') as local_file:
+                    local_file.write(str(self.versions[each_file_type]))
+
+    monkeypatch.setattr(assetstate, 'get_asset_file_types', lambda asset: ['model', 'rig'])
+    assets = [_MetadataAsset('asset{}'.format(i), {'model': 1, 'rig': 1}) for i in range(3)]
+    model_path = str(tmp_path / 'asset0' / 'model.ma')
+    rig_path = str(tmp_path / 'asset0' / 'rig.ma')
+    assert assetstate.get_server_files_state(assets[0], ['model', 'rig', 'shading']) == {
+        'model': {'version': 1, 'checksum': None, 'size': None, 'path': model_path, 'locked': None},
+        'rig': {'version': 1, 'checksum': None, 'size': None, 'path': rig_path, 'locked': None}}
+
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    engine = syncengine.SyncEngine(max_workers=2)
+    assert engine.sync_assets(assets, sync_type='all', manifest=sync_manifest).wait(5)
+
+    assets[0].versions['rig'] = 2
+    batch = engine.sync_assets(assets, sync_type='all', manifest=sync_manifest)
+    assert batch.wait(5)
+    assert len(batch.skipped) == 2
+    assert assets[0].synced == [(None, 'all'), (None, 'all')]
+    assert assets[1].synced == [(None, 'all')]
+    assert [job.synced_file_types for job in batch.completed if not job.skipped] == [['model', 'rig']]
+
+    # Synced files removed from disk are not up to date anymore, even if the server did not change
+    os.remove(str(tmp_path / 'asset1' / 'model.ma'))
+    sync_plan = planner.plan_sync(assets, sync_type='all', sync_manifest=sync_manifest)
+    assert [(planned_file.asset_id, planned_file.file_type) for planned_file in sync_plan.files] == [
+        ('asset1', 'model'), ('asset1', 'rig')]
+    fetched = list()
+
+    def _fetch(assets_to_fetch):
+        fetched.append([asset.get_id() for asset in assets_to_fetch])
+        return dict((asset.get_id(), asset.get_artella_data()) for asset in assets_to_fetch)
+
+    batched_plan = planner.plan_sync(
+        assets, sync_type='all', sync_manifest=sync_manifest, fetch_fn=_fetch, batch_size=2)
+    assert fetched == [['asset0', 'asset1'], ['asset2']]
+    assert batched_plan.to_dict() == sync_plan.to_dict()
+    batch = engine.sync_assets(assets, sync_type='all', manifest=sync_manifest)
+    assert batch.wait(5)
+    assert len(batch.skipped) == 2
+    assert assets[1].synced == [(None, 'all'), (None, 'all')]
+    assert os.path.isfile(str(tmp_path / 'asset1' / 'model.ma'))
+
+
+def test_incremental_sync_without_server_state_syncs_whole_assets(tmp_path, monkeypatch):
+    monkeypatch.setattr(assetstate, 'get_asset_file_types', lambda asset: ['model', 'rig'])
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    asset = FakeAsset('asset0')
+    asset.get_server_file_state = None
+
+    engine = syncengine.SyncEngine(max_workers=1)
+    for _ in range(2):
+        assert engine.sync_assets([asset], sync_type='all', manifest=sync_manifest).wait(5)
+
+    assert asset.synced == [(None, 'all'), (None, 'all')]
+
+
+def test_headless_sync_reports_json_progress():
+    import io
+    import json
+    from artellapipe.tools.assetsmanager.core import headless
+
+    stream = io.StringIO()
+    reporter = headless.JsonProgressReporter(stream)
+    assets = [FakeAsset('good{}'.format(i)) for i in range(3)] + [FakeAsset('bad', fail=True)]
+    batch = headless.sync_assets(assets, file_type='rig', max_workers=2, progress_callback=reporter.report_progress)
+    summary = headless.get_batch_summary(batch)
+    reporter.report_finish(summary)
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(events) == 5
+    assert sorted(event['status'] for event in events[:4]) == ['failed', 'synced', 'synced', 'synced']
+    assert events[-1]['event'] == 'finished'
+    assert summary['synced'] == 3 and summary['failed'] == 1
+    assert list(summary['errors']) == ['bad']
+
+
+def test_journaled_sync_resumes_after_interruption(tmp_path):
+    journal_path = str(tmp_path / 'sync_journal.jsonl')
+    assets = [FakeAsset('asset{}'.format(i)) for i in range(5)]
+    asset_ids = [asset.get_id() for asset in assets]
+
+    interrupted_journal = journal.SyncJournal(journal_path)
+    interrupted_journal.begin(asset_ids, file_type='rig', sync_type='all')
+    interrupted_journal.record('asset0')
+    interrupted_journal.record('asset1')
+    with open(journal_path, 'a') as fh:
+        fh.write('{"type": "done", "asse')
+    # Session that owned the journal crashed
+    interrupted_journal.release()
+
+    sync_journal = journal.SyncJournal(journal_path)
+    assert sync_journal.is_active()
+    assert sorted(sync_journal.get_pending_asset_ids()) == ['asset2', 'asset3', 'asset4']
+
+    engine = syncengine.SyncEngine(max_workers=2)
+    batch = engine.sync_assets(assets, file_type='rig', sync_type='all', journal=sync_journal)
+    assert batch.wait(5)
+    assert sorted(job.asset_id for job in batch.skipped) == ['asset0', 'asset1']
+    assert [asset.synced for asset in assets[:2]] == [[], []]
+    assert all(asset.synced == [('rig', 'all')] for asset in assets[2:])
+    assert not sync_journal.is_active()
+    assert not journal.SyncJournal(journal_path).is_active()
+
+
+def test_journal_owned_by_running_session_is_not_resumed_or_discarded(tmp_path):
+    journal_path = str(tmp_path / 'sync_journal.jsonl')
+    running_journal = journal.SyncJournal(journal_path)
+    running_journal.begin(['asset0', 'asset1'], file_type='rig', sync_type='all')
+    running_journal.record('asset0')
+    assert running_journal.owner['pid'] == os.getpid()
+
+    other_journal = journal.SyncJournal(journal_path)
+    assert other_journal.is_active()
+    assert not other_journal.acquire()
+    assert not other_journal.discard()
+    assert os.path.isfile(journal_path)
+    with pytest.raises(journal.JournalOwnedError):
+        other_journal.begin(['asset0', 'asset1'], file_type='rig', sync_type='all')
+
+    running_journal.release()
+    assert other_journal.acquire()
+    assert other_journal.get_pending_asset_ids() == ['asset1']
+    assert other_journal.discard()
+    assert not os.path.isfile(journal_path)
+
+
+def test_sync_plan_reports_files_bytes_and_duration(tmp_path):
+    class _SizedAsset(FakeAsset):
+        def get_server_file_state(self, file_type):
+            file_state = super(_SizedAsset, self).get_server_file_state(file_type)
+            file_state['size'] = 10 * 1024 * 1024
+            return file_state
+
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    assets = [_SizedAsset('asset{}'.format(i), versions={'rig': 1}) for i in range(3)]
+    sync_manifest.update('asset0', 'rig', assets[0].get_server_file_state('rig'), sync_type='all')
+
+    transfer_stats = planner.TransferStats()
+    transfer_stats.add_sample(0, 1.0)
+    plan = planner.plan_sync(
+        assets, file_type='rig', sync_type='all', sync_manifest=sync_manifest, transfer_stats=transfer_stats)
+
+    assert [planned_file.asset_id for planned_file in plan.files] == ['asset1', 'asset2']
+    assert len(plan.up_to_date) == 1
+    assert plan.total_bytes == 20 * 1024 * 1024
+    assert plan.estimated_duration == 20 / 5 + 2 * planner.DEFAULT_SECONDS_PER_FILE
+    assert '20.0 MB' in plan.get_message()
+    assert not any(asset.synced for asset in assets)
+
+
+def test_duplicated_syncs_are_merged_with_running_sync():
+    release = threading.Event()
+
+    class _SlowAsset(FakeAsset):
+        def sync(self, file_type=None, sync_type=None):
+            release.wait(5)
+            super(_SlowAsset, self).sync(file_type=file_type, sync_type=sync_type)
+
+    class _MergesRegistry(registry.SyncRegistry):
+        def __init__(self):
+            super(_MergesRegistry, self).__init__()
+            self.merged = threading.Semaphore(0)
+
+        def begin(self, key, callback):
+            must_run = super(_MergesRegistry, self).begin(key, callback)
+            if not must_run:
+                self.merged.release()
+            return must_run
+
+    asset = _SlowAsset('asset0')
+    sync_registry = _MergesRegistry()
+    engine = syncengine.SyncEngine(max_workers=4, sync_registry=sync_registry)
+    bulk_batch = engine.sync_assets([asset], sync_type='all')
+    while not engine.registry.is_in_flight('asset0', None, 'all'):
+        time.sleep(0.01)
+    click_batches = [engine.sync_assets(
+        [asset], file_type='rig', sync_type='all', priority=scheduler.JobPriority.INTERACTIVE_SYNC) for _ in range(2)]
+    assert all(sync_registry.merged.acquire(timeout=5) for _ in click_batches)
+    release.set()
+
+    assert all(batch.wait(5) for batch in [bulk_batch] + click_batches)
+    assert asset.synced == [(None, 'all')]
+    assert all(len(batch.completed) == 1 for batch in click_batches)
+    assert click_batches[0].completed[0].merged_with is bulk_batch.completed[0]
+    assert not len(engine.registry)
+
+
+def test_incremental_syncs_do_not_cover_full_syncs():
+    sync_registry = registry.SyncRegistry()
+    assert sync_registry.begin(('asset0', None, 'all', True), lambda *args: None)
+    assert sync_registry.is_in_flight('asset0', 'rig', 'all', incremental=True)
+    assert not sync_registry.is_in_flight('asset0', 'rig', 'all')
+    assert sync_registry.begin(('asset0', 'rig', 'all', False), lambda *args: None)
+
+    merged = list()
+    assert not sync_registry.begin(('asset0', 'rig', 'all', True), merged.append)
+    sync_registry.finish(('asset0', 'rig', 'all', False), 'done')
+    assert merged == ['done']
+    assert not sync_registry.is_in_flight('asset0', 'rig', 'all')
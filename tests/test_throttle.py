@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for artellapipe-tools-assetsmanager sync throttling
+"""
+
+import time
+import threading
+
+from artellapipe.tools.assetsmanager.core import throttle, syncengine, manifest
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_limits_average_rate():
+    clock = FakeClock()
+    bucket = throttle.TokenBucket(rate=100, clock=clock.time, sleep=clock.sleep)
+
+    bucket.consume(50)
+    assert clock.now == 0.5
+    bucket.consume(250)
+    assert clock.now == 3.0
+
+    clock.now += 10
+    bucket.consume(100)
+    assert clock.now == 13.0
+
+    bucket.set_rate(0)
+    bucket.consume(10 ** 9)
+    assert clock.now == 13.0
+
+
+def test_sync_throttle_limits_transfers_in_flight():
+    sync_throttle = throttle.SyncThrottle(max_in_flight=2)
+    lock = threading.Lock()
+    state = {'running': 0, 'max_running': 0}
+
+    def _transfer():
+        with sync_throttle.transfer():
+            with lock:
+                state['running'] += 1
+                state['max_running'] = max(state['max_running'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+
+    threads = [threading.Thread(target=_transfer) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert state['max_running'] == 2
+
+
+def test_sync_throttle_charges_default_size_to_transfers_of_unknown_size(tmp_path, monkeypatch):
+    sync_throttle = throttle.SyncThrottle(bytes_per_second=100, default_transfer_size=40)
+    assert sync_throttle.get_transfer_size([10, None]) == 50
+    assert sync_throttle.get_transfer_size(list()) is None
+
+    charged = list()
+    monkeypatch.setattr(sync_throttle._bucket, 'consume', lambda size, is_cancelled=None: charged.append(size))
+
+    class _Asset(object):
+        def __init__(self):
+            self.state_requests = 0
+
+        def get_id(self):
+            return 'asset0'
+
+        def get_server_file_state(self, file_type):
+            self.state_requests += 1
+            return {'version': 1, 'size': 30} if file_type == 'model' else {'version': 1}
+
+        def sync(self, file_type=None, sync_type=None):
+            pass
+
+    asset = _Asset()
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    job = syncengine.SyncJob(asset, file_type='model', manifest=sync_manifest, throttle=sync_throttle)
+    job.run()
+    job = syncengine.SyncJob(asset, file_type='rig', manifest=sync_manifest, throttle=sync_throttle)
+    job.run()
+    assert charged == [30, 40]
+    assert asset.state_requests == 2
+
+    job = syncengine.SyncJob(asset, file_type='model', throttle=sync_throttle)
+    job.run()
+    with sync_throttle.transfer():
+        pass
+    assert charged == [30, 40, 30, 40]
+    assert asset.state_requests == 3
+
+
+def test_transfers_of_unknown_size_respect_bandwidth_limit():
+    clock = FakeClock()
+    sync_throttle = throttle.SyncThrottle(
+        bytes_per_second=100, default_transfer_size=50, clock=clock.time, sleep=clock.sleep)
+    sync_times = list()
+
+    class _Asset(object):
+        def get_id(self):
+            return 'asset0'
+
+        def get_server_file_state(self, file_type):
+            return {'version': 1}
+
+        def sync(self, file_type=None, sync_type=None):
+            sync_times.append(clock.now)
+
+    for _ in range(4):
+        syncengine.SyncJob(_Asset(), file_type='model', throttle=sync_throttle).run()
+
+    # Each transfer is charged with the default size before it starts, so transfers never exceed 100 bytes/second
+    assert sync_times == [0.5, 1.0, 1.5, 2.0]
@@ -0,0 +1,123 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for artellapipe-tools-assetsmanager synced files verification
+"""
+
+import hashlib
+
+from artellapipe.tools.assetsmanager.core import verify, manifest
+
+
+def _write_file(file_path, data):
+    file_path.write_bytes(data)
+    return str(file_path), hashlib.md5(data).hexdigest()
+
+
+def test_hash_file_reads_chunks_and_memory_maps_big_files(tmp_path):
+    file_path, checksum = _write_file(tmp_path / 'model.ma', b'0123456789' * 1000)
+
+    assert verify.hash_file(file_path, chunk_size=64) == (file_path, checksum, None)
+    assert verify.hash_file(file_path, chunk_size=64, mmap_threshold=1) == (file_path, checksum, None)
+
+    missing_path, missing_checksum, error = verify.hash_file(str(tmp_path / 'missing.ma'))
+    assert missing_checksum is None and error
+
+
+def test_verify_flags_corrupted_and_missing_files(tmp_path):
+    valid_path, valid_checksum = _write_file(tmp_path / 'valid.ma', b'valid')
+    corrupted_path, _ = _write_file(tmp_path / 'corrupted.ma', b'partial')
+    files_to_verify = [
+        verify.FileToVerify('asset0', 'model', valid_path, checksum=valid_checksum.upper()),
+        verify.FileToVerify('asset1', 'model', corrupted_path, checksum=hashlib.md5(b'complete').hexdigest()),
+        verify.FileToVerify('asset2', 'model', str(tmp_path / 'missing.ma'), checksum=valid_checksum),
+        verify.FileToVerify('asset3', 'rig', valid_path)
+    ]
+
+    verified_files = verify.verify_files(files_to_verify, max_workers=2, use_processes=False)
+    assert [verified_file.status for verified_file in verified_files] == [
+        verify.VALID_STATUS, verify.CORRUPTED_STATUS, verify.MISSING_STATUS, verify.UNKNOWN_STATUS]
+
+    sync_manifest = manifest.SyncManifest(str(tmp_path / 'manifest.json'))
+    for asset_id in ('asset0', 'asset1', 'asset2'):
+        sync_manifest.update(asset_id, 'model', {'checksum': valid_checksum})
+    flagged = verify.flag_for_resync(verified_files, sync_manifest=sync_manifest)
+
+    assert [flagged_file.asset_id for flagged_file in flagged] == ['asset1', 'asset2']
+    assert sync_manifest.get('asset0', 'model')
+    assert not sync_manifest.get('asset1', 'model') and not sync_manifest.get('asset2', 'model')
+
+
+def test_verify_hashes_files_in_process_pool(tmp_path):
+    files_to_verify = list()
+    for i in range(4):
+        file_path, checksum = _write_file(tmp_path / 'file{}.ma'.format(i), b'data' * (i + 1))
+        files_to_verify.append(verify.FileToVerify('asset{}'.format(i), 'model', file_path, checksum=checksum))
+
+    verified_files = verify.verify_files(files_to_verify, max_workers=2)
+
+    assert verify.get_verify_summary(verified_files)[verify.VALID_STATUS] == 4
+
+
+def test_verify_does_not_flag_unreadable_files(tmp_path, monkeypatch):
+    file_path, checksum = _write_file(tmp_path / 'locked.ma', b'locked')
+    monkeypatch.setattr(verify, 'hash_file', lambda file_path, algorithm: (file_path, None, 'Permission denied'))
+
+    verified_files = verify.verify_files(
+        [verify.FileToVerify('asset0', 'model', file_path, checksum=checksum)], use_processes=False)
+
+    assert verified_files[0].status == verify.UNREADABLE_STATUS
+    assert verified_files[0].error == 'Permission denied'
+    assert not verify.get_files_to_resync(verified_files)
+
+
+def test_verify_does_not_report_files_without_checksum_as_valid(tmp_path):
+    files_to_verify = list()
+    for i in range(3):
+        file_path, _ = _write_file(tmp_path / 'file{}.ma'.format(i), b'data')
+        files_to_verify.append(verify.FileToVerify('asset{}'.format(i), 'model', file_path))
+
+    verified_files = verify.verify_files(files_to_verify, use_processes=False)
+    assert verify.get_verify_summary(verified_files)[verify.UNKNOWN_STATUS] == 3
+    assert not verify.get_files_to_resync(verified_files)
+
+    all_valid, message = verify.get_verify_message(verified_files, title='Prop assets')
+    assert not all_valid
+    assert message.startswith('3 files could not be verified')
+
+    file_path, checksum = _write_file(tmp_path / 'valid.ma', b'valid')
+    verified_files = verify.verify_files(
+        [verify.FileToVerify('asset3', 'model', file_path, checksum=checksum)], use_processes=False)
+    assert verify.get_verify_message(verified_files, title='Prop assets') == (
+        True, 'All synced files of Prop assets are valid!')
+
+
+def test_files_to_verify_are_found_in_disk_or_in_assets_index(tmp_path, monkeypatch):
+    class _Asset(object):
+        def __init__(self, name):
+            self._name = name
+
+        def get_id(self):
+            return self._name
+
+        def get_local_file_path(self, file_type):
+            return str(tmp_path / self._name / '{}.ma'.format(file_type))
+
+        def get_server_file_state(self, file_type):
+            return {'version': 1, 'checksum': 'md5'}
+
+    monkeypatch.setattr(verify.assetstate, 'get_asset_file_types', lambda asset: ['model', 'rig'])
+    (tmp_path / 'synced_outside').mkdir()
+    _write_file(tmp_path / 'synced_outside' / 'model.ma', b'model')
+    assets = [_Asset('synced_outside'), _Asset('synced_by_tool'), _Asset('never_synced')]
+
+    files_to_verify = verify.get_files_to_verify(assets, synced_files={'synced_by_tool': ['rig']})
+    assert [(file_to_verify.asset_id, file_to_verify.file_type) for file_to_verify in files_to_verify] == [
+        ('synced_outside', 'model'), ('synced_by_tool', 'rig')]
+    assert len(verify.get_files_to_verify(assets)) == 6
+
+    monkeypatch.setattr(verify.sys, 'executable', '/usr/autodesk/maya/bin/maya.bin')
+    assert not verify.is_python_interpreter()
+    monkeypatch.setattr(verify.sys, 'executable', '/usr/autodesk/maya/bin/mayapy')
+    assert verify.is_python_interpreter()